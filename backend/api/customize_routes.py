@@ -46,10 +46,9 @@ def manage_subject():
         result = service.add_custom_subject(subject_data)
         print(f"📚 カスタマイズ科目追加結果: {result}")
         
-        # メインAPIのデータリポジトリも強制再読み込み
+        # メインAPIのデータリポジトリにも反映（変更されたファイルだけ再読み込み）
         from .routes import get_data_repository
         main_repo = get_data_repository()
-        main_repo.load_all_data()
         print(f"📚 メインリポジトリ再読み込み完了: {len(main_repo.get_subjects())}件")
         
         return jsonify(result)
@@ -61,10 +60,9 @@ def manage_subject():
         
         result = service.delete_subject(subject_id)
         
-        # メインAPIのデータリポジトリも強制再読み込み
+        # メインAPIのデータリポジトリにも反映（変更されたファイルだけ再読み込み）
         from .routes import get_data_repository
         main_repo = get_data_repository()
-        main_repo.load_all_data()
         
         return jsonify(result)
 
@@ -78,10 +76,9 @@ def manage_teacher():
         result = service.add_custom_teacher(teacher_data)
         print(f"👨‍🏫 カスタマイズ教師追加結果: {result}")
         
-        # メインAPIのデータリポジトリも強制再読み込み
+        # メインAPIのデータリポジトリにも反映（変更されたファイルだけ再読み込み）
         from .routes import get_data_repository
         main_repo = get_data_repository()
-        main_repo.load_all_data()
         print(f"👨‍🏫 メインリポジトリ再読み込み完了: {len(main_repo.get_teachers())}件")
         
         return jsonify(result)
@@ -93,10 +90,9 @@ def manage_teacher():
         
         result = service.delete_teacher(teacher_id)
         
-        # メインAPIのデータリポジトリも強制再読み込み
+        # メインAPIのデータリポジトリにも反映（変更されたファイルだけ再読み込み）
         from .routes import get_data_repository
         main_repo = get_data_repository()
-        main_repo.load_all_data()
         
         return jsonify(result)
 
@@ -0,0 +1,134 @@
+"""時間割レスポンスの形式ネゴシエーション（コンパクト形式・MessagePack・gzip）
+
+既定は従来どおり授業ごとに科目・教師・クラス・時間帯・教室を入れ子にした JSON。
+Accept ヘッダーで次の形式を選べる:
+
+    application/vnd.timetable.compact+json   コンパクト形式の JSON
+    application/msgpack (application/x-msgpack)  コンパクト形式の MessagePack（msgpack 未導入ならコンパクト形式の JSON）
+
+コンパクト形式では入れ子の事実を上位の表（subjects, teachers, ...）に1度だけ置き、
+授業は lesson_fields の順に並べた値の配列（事実は ID）にする:
+
+    {"format": "compact", "lesson_fields": ["id", "subject", "teacher", ...],
+     "lessons": [[1, 3, 12, 4, 7, 2, false], ...], "teachers": [{...}], ...}
+
+Accept-Encoding に gzip を含むクライアントには、一定以上の大きさの応答を gzip 圧縮して返す。
+"""
+import gzip
+import json
+from typing import Dict, Any, List, Union
+
+from flask import Response, request, jsonify
+
+try:
+    import msgpack
+except ImportError:  # 任意依存（未導入ならコンパクト形式の JSON で返す）
+    msgpack = None
+
+COMPACT_JSON_MIMETYPE = "application/vnd.timetable.compact+json"
+MSGPACK_MIMETYPES = ("application/msgpack", "application/x-msgpack")
+
+# 入れ子の事実のキー -> コンパクト形式での表の名前
+FACT_TABLES = {
+    "subject": "subjects",
+    "teacher": "teachers",
+    "student_group": "student_groups",
+    "timeslot": "timeslots",
+    "room": "rooms",
+}
+
+# これより小さい応答は圧縮しない（ヘッダー分で逆に大きくなる・CPU の無駄）
+GZIP_MIN_BYTES = 1024
+GZIP_COMPRESS_LEVEL = 5
+GZIP_MIMETYPES = ("application/json", COMPACT_JSON_MIMETYPE, *MSGPACK_MIMETYPES)
+
+
+def compact_timetable(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """授業の入れ子の事実を上位の表に移し、授業を ID の配列にする
+
+    payload に既に表（/api/optimize の timeslots・rooms など）があればそれを使い、
+    なければ授業に埋め込まれた事実から表を作る（同じ ID は最初のものを採用）。
+    """
+    lessons = payload.get("lessons") or []
+    fields = list(lessons[0].keys()) if lessons else []
+    compact = {key: value for key, value in payload.items() if key != "lessons"}
+
+    for key, table in FACT_TABLES.items():
+        if key not in fields or table in compact:
+            continue
+        facts: Dict[Any, Dict[str, Any]] = {}
+        for lesson in lessons:
+            fact = lesson.get(key)
+            if fact is not None and fact["id"] not in facts:
+                facts[fact["id"]] = fact
+        compact[table] = list(facts.values())
+
+    fact_fields = [i for i, field in enumerate(fields) if field in FACT_TABLES]
+    rows = []
+    for lesson in lessons:
+        row = [lesson.get(field) for field in fields]
+        for i in fact_fields:
+            if row[i] is not None:
+                row[i] = row[i]["id"]
+        rows.append(row)
+
+    compact["format"] = "compact"
+    compact["lesson_fields"] = fields
+    compact["lessons"] = rows
+    return compact
+
+
+def _compact_payload(payload: Union[Dict[str, Any], List[Dict[str, Any]]]) -> Dict[str, Any]:
+    """時間割（またはジョブ結果の solution・授業の配列）をコンパクト形式にする"""
+    if isinstance(payload, list):
+        return compact_timetable({"lessons": payload})
+    if "solution" in payload:
+        # キュー経由のジョブは解が出るまで solution が None
+        solution = payload["solution"]
+        return {**payload, "solution": compact_timetable(solution) if solution else solution}
+    return compact_timetable(payload)
+
+
+def negotiated_mimetype() -> str:
+    """Accept ヘッダーから応答形式を選ぶ（*/* だけのブラウザ・curl には従来の入れ子 JSON）"""
+    best = request.accept_mimetypes.best_match(
+        ["application/json", COMPACT_JSON_MIMETYPE, *MSGPACK_MIMETYPES], default="application/json"
+    )
+    if best in MSGPACK_MIMETYPES and msgpack is None:
+        return COMPACT_JSON_MIMETYPE
+    return best
+
+
+def timetable_response(payload: Union[Dict[str, Any], List[Dict[str, Any]]], status: int = 200) -> Response:
+    """時間割を含む応答を Accept ヘッダーに応じた形式で返す"""
+    mimetype = negotiated_mimetype()
+    if mimetype == "application/json":
+        response = jsonify(payload)
+        response.status_code = status
+    elif mimetype in MSGPACK_MIMETYPES:
+        response = Response(msgpack.packb(_compact_payload(payload), use_bin_type=True),
+                            status=status, mimetype=mimetype)
+    else:
+        body = json.dumps(_compact_payload(payload), ensure_ascii=False, separators=(",", ":"))
+        response = Response(body, status=status, mimetype=COMPACT_JSON_MIMETYPE)
+    response.vary.add("Accept")
+    return response
+
+
+def gzip_response(response: Response) -> Response:
+    """Accept-Encoding に gzip があれば、大きな JSON・MessagePack の応答を圧縮する（after_request 用）"""
+    if (response.direct_passthrough or response.is_streamed
+            or response.status_code < 200 or response.status_code >= 300
+            or "Content-Encoding" in response.headers
+            or response.mimetype not in GZIP_MIMETYPES):
+        return response
+    response.vary.add("Accept-Encoding")
+    if "gzip" not in request.accept_encodings:
+        return response
+
+    data = response.get_data()
+    if len(data) < GZIP_MIN_BYTES:
+        return response
+    response.set_data(gzip.compress(data, compresslevel=GZIP_COMPRESS_LEVEL))
+    response.headers["Content-Encoding"] = "gzip"
+    return response
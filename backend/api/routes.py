@@ -1,29 +1,98 @@
 """API ルート定義"""
+import math
 import os
-from flask import Blueprint, request, jsonify
-from ..models.database import JSONDataRepository
-from ..models.data_models import Subject, Teacher
-from backend.services.optimization_service import OptimizationService
+import json
+import threading
+from flask import Blueprint, Response, request, jsonify, current_app, stream_with_context
+from ..models.database import create_data_repository
+from ..models.data_models import Subject, Teacher, Room
+from ..models.scheduling_rules import EmptyValueRangeError
+from backend.services.queued_job_service import QueuedSolverJobService
+from backend.services.job_queue import unsupported_job_options
+from backend.services.solver_registry import (
+    get_solver_registry, start_jvm, resolve_move_thread_count, DEFAULT_PROFILE, PREVIEW_PROFILE, SOLVER_PROFILES
+)
+from backend.services.solution_cache import get_solution_cache
+from backend.services.demo_problem import build_demo_problem
+from backend.services.local_search_engine import solve_local_search, LOCAL_SEARCH_PROFILE
+from backend.services.quick_preview import build_preview_problem, preview_timetable
+from backend.services.timetable_scorer import score_timetable
+from .response_format import timetable_response, gzip_response
 
 # Blueprint の作成（最初に定義）
 api_bp = Blueprint('api', __name__)
 
-# 最適化サービスのインスタンス化
-optimization_service = OptimizationService()
+# 大きな JSON・MessagePack の応答は Accept-Encoding に応じて gzip 圧縮
+api_bp.after_request(gzip_response)
+
+# 最適化サービス（シングルトン、初回利用時に生成）
+_optimization_service = None
+_optimization_service_lock = threading.Lock()
 
 # グローバルなデータリポジトリ（シングルトン）
 _data_repo = None
+_data_repo_lock = threading.Lock()
+
+# 非同期ソルバージョブサービス（シングルトン）
+_solver_job_service = None
+_solver_job_service_lock = threading.Lock()
+
+# SSE 接続維持のためのコメント送信間隔（秒）
+SSE_KEEPALIVE_SECONDS = 15.0
 
 def get_data_repository():
     """データリポジトリのシングルトン取得"""
     global _data_repo
     if _data_repo is None:
-        _data_repo = JSONDataRepository("backend/data")
+        with _data_repo_lock:
+            if _data_repo is None:
+                _data_repo = create_data_repository("backend/data")
     else:
-        # 最新データを再読み込み
-        _data_repo.load_all_data()
+        # 変更のあったファイルだけ再読み込み（変更がなければ stat のみ）
+        _data_repo.refresh()
     return _data_repo
 
+def new_optimization_service():
+    """最新データで最適化サービスを生成
+    
+    timefold（JVM 起動を伴う）はここで初めて import する。/api/test などソルバーを使わない
+    エンドポイントは JVM なしで応答できるため、コンテナの起動直後からヘルスチェックに通る。
+    """
+    start_jvm()
+    from backend.services.optimization_service import OptimizationService
+    # データは共有リポジトリから（変更のあったファイルだけ再読み込み済み）
+    return OptimizationService(get_data_repository())
+
+def get_optimization_service():
+    """最適化サービスのシングルトン取得"""
+    global _optimization_service
+    if _optimization_service is None:
+        # 同時の初回リクエストでサービス（データ読み込み）を二重に作らない
+        with _optimization_service_lock:
+            if _optimization_service is None:
+                _optimization_service = new_optimization_service()
+    return _optimization_service
+
+def get_solver_job_service():
+    """ソルバージョブサービスのシングルトン取得（SOLVER_MODE=worker ならキュー経由）"""
+    global _solver_job_service
+    if _solver_job_service is None:
+        # 二重に作るとジョブの登録先が分かれ、状態取得・キャンセルが別インスタンスに届く
+        with _solver_job_service_lock:
+            if _solver_job_service is None:
+                if is_worker_mode():
+                    _solver_job_service = QueuedSolverJobService(
+                        optimization_service_factory=new_optimization_service)
+                else:
+                    optimization_service = new_optimization_service()
+                    from backend.services.solver_job_service import SolverJobService
+                    _solver_job_service = SolverJobService(optimization_service)
+    return _solver_job_service
+
+def is_worker_mode():
+    """ソルブを別プロセスのソルバーワーカー（solver_worker.py）に任せるか"""
+    return current_app.config.get('SOLVER_MODE', os.environ.get('SOLVER_MODE', 'inprocess')) == 'worker'
+
 # 最適化関連のエンドポイント
 @api_bp.route('/demo-data', methods=['GET'])
 def get_demo_data():
@@ -31,11 +100,11 @@ def get_demo_data():
     try:
         print("🎯 デモデータ生成中...")
         # 🔧 重要: 新しいインスタンスを作成して最新データを取得
-        fresh_optimization_service = OptimizationService()
+        fresh_optimization_service = new_optimization_service()
         timetable = fresh_optimization_service.generate_demo_data()
         result = fresh_optimization_service.convert_to_json(timetable)
         print("✅ デモデータ生成完了")
-        return jsonify(result)
+        return timetable_response(result)
     except Exception as e:
         print(f"❌ デモデータ生成エラー: {e}")
         import traceback
@@ -60,19 +129,60 @@ def optimize_timetable():
         
         # 全環境で本格TimefoldAI最適化を実行（Cloud Runは2GB、十分なメモリあり）
         
-        fresh_optimization_service = OptimizationService()
-        
         data = request.get_json()
-        if not data:
-            timetable = fresh_optimization_service.generate_demo_data()
-        else:
-            timetable = fresh_optimization_service.convert_from_json(data)
+        try:
+            options = _solver_options(data)
+        except InvalidSolverOptions as e:
+            return jsonify({"error": str(e)}), 400
         
-        solution = fresh_optimization_service.optimize_timetable(timetable)
+        # カスタマイズ画面向けのプレビューは JVM を使わない（ソルバーの起動・ウォームアップを待たない）
+        if options["profile"] == PREVIEW_PROFILE:
+            return quick_preview(data, options)
+        
+        # 指定時、または JVM を起動できない環境では NumPy エンジンで解く
+        if options["profile"] == LOCAL_SEARCH_PROFILE or get_solver_registry().state == "error":
+            return railway_optimization(data, options)
+        
+        fresh_optimization_service = new_optimization_service()
+        timetable, warm_start = fresh_optimization_service.build_problem(data)
+        
+        decompose = options["decompose"]
+        
+        # 同一問題の再実行はキャッシュから即返す（ウォームスタート・分割モードは対象外）
+        cache = get_solution_cache()
+        cache_key = None
+        if options["use_cache"] and not warm_start and not decompose:
+            cache_key = cache.make_key(timetable, options["profile"], options)
+            cached = cache.get(cache_key)
+            if cached is not None:
+                print(f"⚡ 解キャッシュヒット: {cache_key[:12]}")
+                cached["cached"] = True
+                return timetable_response(cached)
+        
+        if decompose:
+            # 大規模校向け: クラス・教師のまとまりごとに並列ソルブ
+            from backend.services.decomposition_service import get_decomposition_service
+            solution, decomposition = get_decomposition_service().optimize(
+                timetable, max_seconds=options["max_seconds"], partition_count=options["partitions"],
+                optimization_service=fresh_optimization_service, move_thread_count=options["move_thread_count"])
+        else:
+            solution = fresh_optimization_service.optimize_timetable(
+                timetable, warm_start=warm_start, max_seconds=options["max_seconds"],
+                move_thread_count=options["move_thread_count"], profile=options["profile"])
+            decomposition = None
         result = fresh_optimization_service.convert_to_json(solution)
+        result["profile"] = options["profile"]
+        result.update(fresh_optimization_service.solution_quality(solution))
+        if solution.score is None:
+            result["score"] = f"{-result['hard_violations']}hard/*soft"
+        if decomposition is not None:
+            result["decomposition"] = decomposition
+        if cache_key is not None:
+            cache.put(cache_key, result)
+        result["cached"] = False
         
         print("🎉 最適化完了 - 結果を返送")
-        return jsonify(result)
+        return timetable_response(result)
         
     except Exception as e:
         print(f"❌ 最適化エラー: {e}")
@@ -80,216 +190,274 @@ def optimize_timetable():
         traceback.print_exc()
         return jsonify({"error": str(e)}), 500
 
-def railway_optimization():
-    """クラウド環境での実用的最適化（カスタマイズデータ反映）"""
+class InvalidSolverOptions(ValueError):
+    """ソルバーオプションの指定誤り（400 で返す）"""
+
+def _solver_options(data):
+    """ソルバーオプション（body の solver_options、またはクエリ文字列）"""
+    options = dict((data or {}).get("solver_options") or {})
+    for key in ("max_seconds", "move_thread_count", "decompose", "partitions", "use_cache", "profile"):
+        if key in request.args:
+            options[key] = request.args.get(key)
+    
+    profile = options.get("profile") or DEFAULT_PROFILE
+    profiles = [*SOLVER_PROFILES, PREVIEW_PROFILE, LOCAL_SEARCH_PROFILE]
+    if profile not in profiles:
+        raise InvalidSolverOptions(f"未知のソルバープロファイル: {profile}（{', '.join(profiles)}）")
+    move_thread_count = options.get("move_thread_count")
     try:
-        print("🔧 クラウド最適化: カスタマイズデータ読み込み中...")
-        
-        # 実際のカスタマイズデータを取得
-        data_repo = get_data_repository()
-        print("📋 データリポジトリ取得完了")
-        
-        subjects = data_repo.get_subjects()
-        print(f"📚 科目データ取得: {len(subjects)}件")
-        for i, subj in enumerate(subjects[:3]):
-            subj_dict = subj.to_dict()
-            print(f"  科目{i+1}: {subj_dict.get('name', 'N/A')} (週{subj_dict.get('weekly_hours', 0)}時間)")
-        
-        teachers = data_repo.get_teachers()
-        print(f"👨‍🏫 教師データ取得: {len(teachers)}件")
-        for i, teacher in enumerate(teachers[:3]):
-            teacher_dict = teacher.to_dict()
-            print(f"  教師{i+1}: {teacher_dict.get('name', 'N/A')} - 担当科目: {teacher_dict.get('subjects', [])}")
-        
-        timeslots = data_repo.get_timeslots()
-        print(f"⏰ 時間帯データ取得: {len(timeslots)}件")
-        
-        student_groups = data_repo.get_student_groups()
-        print(f"👥 学生グループ取得: {len(student_groups)}件")
-        
-        if not subjects or not teachers or not timeslots or not student_groups:
-            raise ValueError(f"必要なデータが不足: 科目{len(subjects)}, 教師{len(teachers)}, 時間帯{len(timeslots)}, 学生グループ{len(student_groups)}")
-        
-        print(f"📊 読み込み完了: 科目{len(subjects)}件, 教師{len(teachers)}件, 時間帯{len(timeslots)}件")
-        
-        # Railway用最適化設定（実際の週時間数を考慮）
-        max_lessons = min(16, len(timeslots))  # 最大16コマに増加
-        selected_subjects = subjects  # 全科目を使用
-        selected_timeslots = timeslots[:max_lessons]
-        
-        # 実際の週時間数の合計を計算
-        total_weekly_hours = sum(subj.to_dict().get('weekly_hours', 0) for subj in selected_subjects)
-        print(f"🎯 最適化設定: {len(selected_subjects)}科目, 週{total_weekly_hours}時間, {len(selected_timeslots)}時間帯使用")
+        resolve_move_thread_count(move_thread_count)
+    except (TypeError, ValueError):
+        raise InvalidSolverOptions(f"move_thread_count は NONE・AUTO・整数のいずれかです: {move_thread_count}")
+    return {
+        "profile": profile,
+        "max_seconds": _positive_option(options, "max_seconds", float),
+        "move_thread_count": move_thread_count,
+        "decompose": _flag(options.get("decompose", False)),
+        "partitions": _positive_option(options, "partitions", int),
+        "use_cache": _flag(options.get("use_cache", True))
+    }
+
+def _positive_option(options, key, cast):
+    """正の数のオプション（未指定は None）"""
+    value = options.get(key)
+    if value in (None, ""):
+        return None
+    try:
+        number = cast(value)
+    except (TypeError, ValueError):
+        number = None
+    # bool は int の派生のため数値として受け付けない
+    if number is None or isinstance(value, bool) or not (0 < number < math.inf):
+        raise InvalidSolverOptions(f"{key} は正の数で指定してください: {value}")
+    return number
+
+def _flag(value):
+    """真偽値オプション（クエリ文字列の "true"/"1" も受け付ける）"""
+    if isinstance(value, str):
+        return value.lower() in ("1", "true", "yes")
+    return bool(value)
+
+@api_bp.route('/optimize/jobs', methods=['POST'])
+def submit_optimization_job():
+    """最適化ジョブを投入し、ジョブIDを即座に返す"""
+    try:
+        data = request.get_json(silent=True)
+        try:
+            options = _solver_options(data)
+        except InvalidSolverOptions as e:
+            return jsonify({"error": str(e)}), 400
+        job_service = get_solver_job_service()
+        unsupported = unsupported_job_options(options)
+        if unsupported:
+            return jsonify({"error": "ジョブでは未対応のオプションです: " + "; ".join(unsupported)}), 400
         
-        # 簡易ルールベース配置アルゴリズム
-        lessons = []
-        lesson_id = 1
+        if is_worker_mode():
+            # Web プロセスでは問題を構築せず、そのままキューに入れる
+            job_id = job_service.enqueue(data, options)
+        else:
+            timetable, warm_start = job_service.optimization_service.build_problem(data)
+            job_id = job_service.submit(timetable, warm_start=warm_start, max_seconds=options["max_seconds"],
+                                        move_thread_count=options["move_thread_count"])
+        return jsonify({
+            "job_id": job_id,
+            "status": "SOLVING_SCHEDULED",
+            "status_url": f"/api/optimize/jobs/{job_id}",
+            "result_url": f"/api/optimize/jobs/{job_id}/result"
+        }), 202
         
-        # 部屋は固定で2つ
-        rooms = [
-            {"id": 1, "name": "教室A"},
-            {"id": 2, "name": "教室B"}
-        ]
+    except Exception as e:
+        print(f"❌ 最適化ジョブ投入エラー: {e}")
+        import traceback
+        traceback.print_exc()
+        return jsonify({"error": str(e)}), 500
+
+@api_bp.route('/optimize/jobs/<job_id>', methods=['GET'])
+def get_optimization_job_status(job_id):
+    """最適化ジョブの状態（現在のスコア・経過時間）"""
+    status = get_solver_job_service().get_status(job_id)
+    if status is None:
+        return jsonify({"error": f"ジョブが見つかりません: {job_id}"}), 404
+    return jsonify(status)
+
+@api_bp.route('/optimize/jobs/<job_id>/result', methods=['GET'])
+def get_optimization_job_result(job_id):
+    """最適化ジョブの現時点のベスト解"""
+    result = get_solver_job_service().get_result(job_id)
+    if result is None:
+        return jsonify({"error": f"ジョブが見つかりません: {job_id}"}), 404
+    return timetable_response(result)
+
+@api_bp.route('/optimize/jobs/<job_id>/events', methods=['GET'])
+def stream_optimization_job_events(job_id):
+    """ベスト解の改善を Server-Sent Events で配信（変更のあった授業の配置のみ）"""
+    job_service = get_solver_job_service()
+    try:
+        # 再接続時はブラウザが Last-Event-ID を送るので続きから配信
+        after_seq = int(request.headers.get('Last-Event-ID') or request.args.get('after') or 0)
+        first = job_service.wait_for_events(job_id, after_seq, timeout=0)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 409
+    if first is None:
+        return jsonify({"error": f"ジョブが見つかりません: {job_id}"}), 404
+    
+    def generate():
+        seq = after_seq
+        while True:
+            result = job_service.wait_for_events(job_id, seq, timeout=SSE_KEEPALIVE_SECONDS)
+            if result is None:
+                return
+            events, finished = result
+            for event in events:
+                seq = event["seq"]
+                yield f"id: {seq}\nevent: best_solution\ndata: {json.dumps(event, ensure_ascii=False)}\n\n"
+            if finished:
+                status = job_service.get_status(job_id)
+                yield f"event: finished\ndata: {json.dumps(status, ensure_ascii=False)}\n\n"
+                return
+            if not events:
+                yield ": keep-alive\n\n"
+    
+    return Response(stream_with_context(generate()), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+@api_bp.route('/optimize/jobs/<job_id>/terminate', methods=['POST'])
+def terminate_optimization_job(job_id):
+    """最適化ジョブを早期終了"""
+    status = get_solver_job_service().terminate(job_id)
+    if status is None:
+        return jsonify({"error": f"ジョブが見つかりません: {job_id}"}), 404
+    return jsonify(status)
+
+@api_bp.route('/optimize/jobs/<job_id>/lessons', methods=['POST', 'DELETE'])
+def change_optimization_job_lessons(job_id):
+    """実行中ジョブへの授業追加・削除（ProblemChange）"""
+    job_service = get_solver_job_service()
+    data = request.get_json(silent=True) or {}
+    
+    try:
+        if request.method == 'POST':
+            status = job_service.add_lessons(job_id, data.get("lessons", []))
+        else:
+            status = job_service.remove_lessons(job_id, data.get("lesson_ids", []))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 409
+    except Exception as e:
+        print(f"❌ 問題変更エラー: {e}")
+        return jsonify({"error": str(e)}), 500
+    
+    if status is None:
+        return jsonify({"error": f"ジョブが見つかりません: {job_id}"}), 404
+    return jsonify(status)
+
+@api_bp.route('/score', methods=['POST'])
+def score():
+    """送信された時間割のスコアとハード違反の授業の組（ソルバーを使わない高速な検証）"""
+    try:
+        data = request.get_json(silent=True)
+        if not data or data.get("lessons") is None:
+            return jsonify({"error": "時間割データ（lessons）が必要です"}), 400
         
-        # 各科目の授業を週時間数に応じて生成・配置
-        timeslot_index = 0
+        return jsonify(score_timetable(data))
         
-        print(f"🎯 授業配置開始: {len(selected_subjects)}科目, {len(selected_timeslots)}時間帯, {len(student_groups)}学生グループ")
+    except Exception as e:
+        print(f"❌ スコア計算エラー: {e}")
+        return jsonify({"error": str(e)}), 500
+
+@api_bp.route('/score/explain', methods=['POST'])
+def explain_score():
+    """制約ごとのスコア内訳（送信された時間割、または job_id 指定のジョブ解）"""
+    try:
+        job_id = request.args.get('job_id')
+        if job_id:
+            job_service = get_solver_job_service()
+            timetable = job_service.get_best_solution(job_id)
+            if timetable is None:
+                return jsonify({"error": f"ジョブが見つかりません: {job_id}"}), 404
+            optimization = get_optimization_service()
+        else:
+            data = request.get_json(silent=True)
+            if not data or data.get("lessons") is None:
+                return jsonify({"error": "時間割データ（lessons）または job_id が必要です"}), 400
+            optimization = new_optimization_service()
+            timetable = optimization.convert_from_json(data)
         
-        try:
-            for subject in selected_subjects:
-                subject_dict = subject.to_dict()
-                weekly_hours = subject_dict.get('weekly_hours', 2)  # 制限を撤廃、実際の値を使用
-                subject_name = subject_dict.get('name', f'科目{subject.id}')
-            
-                print(f"📝 科目'{subject_name}'の授業配置開始 (設定値: 週{weekly_hours}時間)")
-                
-                # その科目を教えられる教師を見つける
-                suitable_teachers = [t for t in teachers 
-                                   if subject_name in t.to_dict().get('subjects', [])]
-                
-                print(f"  適任教師候補: {len(suitable_teachers)}人")
-                if suitable_teachers:
-                    for teacher in suitable_teachers[:1]:  # 最初の適任教師
-                        teacher_dict = teacher.to_dict()
-                        print(f"    選択教師: {teacher_dict.get('name', 'N/A')} - 担当科目: {teacher_dict.get('subjects', [])}")
-                else:
-                    print(f"  ⚠️ 科目'{subject_name}'に適任教師が見つかりません")
-                    print(f"    利用可能な教師: {[t.to_dict().get('name') + ':' + str(t.to_dict().get('subjects', [])) for t in teachers[:3]]}")
-                
-                if suitable_teachers and student_groups:
-                    teacher = suitable_teachers[0]
-                    student_group = student_groups[0]
-                    teacher_name = teacher.to_dict().get('name', f'教師{teacher.id}')
-                    group_name = student_group.to_dict().get('name', f'グループ{student_group.id}')
-                    
-                    assigned_hours = 0
-                    for hour in range(weekly_hours):
-                        if timeslot_index < len(selected_timeslots):
-                            timeslot = selected_timeslots[timeslot_index]
-                            room = rooms[timeslot_index % len(rooms)]
-                            
-                            lesson = {
-                                "id": lesson_id,
-                                "subject": {"id": subject.id, "name": subject_name},
-                                "teacher": {"id": teacher.id, "name": teacher_name},
-                                "student_group": {"id": student_group.id, "name": group_name},
-                                "timeslot": {
-                                    "id": timeslot.id, 
-                                    "day_of_week": timeslot.day_of_week,
-                                    "start_time": timeslot.start_time.strftime("%H:%M"),
-                                    "end_time": timeslot.end_time.strftime("%H:%M")
-                                },
-                                "room": room
-                            }
-                            
-                            lessons.append(lesson)
-                            assigned_hours += 1
-                            print(f"    ✅ 授業{hour+1}: {timeslot.day_of_week} {timeslot.start_time.strftime('%H:%M')}-{timeslot.end_time.strftime('%H:%M')}")
-                            lesson_id += 1
-                            timeslot_index += 1
-                        else:
-                            print(f"    ⚠️ 時間帯不足により授業{hour+1}をスキップ")
-                            break
-                    
-                    print(f"  📊 科目'{subject_name}': {assigned_hours}/{weekly_hours}時間配置完了")
-                else:
-                    print(f"  ❌ 適任教師または学生グループが見つからないため'{subject_name}'をスキップ")
+        return jsonify(optimization.explain_score(timetable))
         
-        except Exception as loop_error:
-            print(f"❌ 授業配置ループでエラー: {loop_error}")
-            import traceback
-            traceback.print_exc()
-            raise loop_error
+    except Exception as e:
+        print(f"❌ スコア分析エラー: {e}")
+        import traceback
+        traceback.print_exc()
+        return jsonify({"error": str(e)}), 500
+
+def railway_optimization(data=None, options=None):
+    """JVM なしの最適化（NumPy 版 Late Acceptance 局所探索、/api/optimize と同じJSONを返す）"""
+    try:
+        options = options or {}
+        if not data or data.get("lessons") is None:
+            # 問題の指定がなければカスタマイズデータからデモ問題を生成
+            problem = build_demo_problem(get_data_repository())
+        else:
+            problem = data
+        if not problem["lessons"]:
+            raise ValueError("配置する授業がありません（科目・教師・クラスの設定を確認してください）")
         
-        # タイムスロットをJSON形式で変換
-        timeslots_json = []
-        for ts in selected_timeslots:
-            timeslots_json.append({
-                "id": ts.id,
-                "day_of_week": ts.day_of_week,
-                "start_time": ts.start_time.strftime("%H:%M"),
-                "end_time": ts.end_time.strftime("%H:%M")
-            })
+        print(f"🧮 NumPy局所探索: {len(problem['lessons'])}授業, {len(problem['timeslots'])}時間帯, "
+              f"{len(problem['rooms'])}教室")
+        result = solve_local_search(problem, max_seconds=options.get("max_seconds"))
+        result["profile"] = LOCAL_SEARCH_PROFILE
+        result["cached"] = False
+        return timetable_response(result)
         
-        result = {
-            "timeslots": timeslots_json,
-            "rooms": rooms,
-            "lessons": lessons,
-            "score": f"Railway最適化完了 ({len(lessons)}授業配置)"
-        }
+    except EmptyValueRangeError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        print(f"❌ NumPy局所探索エラー: {e}")
+        import traceback
+        traceback.print_exc()
+        return jsonify({"error": str(e)}), 500
+
+def quick_preview(data=None, options=None):
+    """⚡ クイックプレビュー（JVM なしの First Fit Decreasing、/api/optimize と同じJSONを返す）"""
+    try:
+        options = options or {}
+        timetable, warm_start = build_preview_problem(data, get_data_repository())
         
-        print(f"🎉 Railway最適化完了: {len(lessons)}授業を配置")
-        print(f"📋 最終結果: {len(timeslots_json)}時間帯, {len(rooms)}教室, {len(lessons)}授業")
+        # 同一問題の再実行はキャッシュから即返す（ウォームスタートは対象外）
+        cache = get_solution_cache()
+        cache_key = None
+        if options.get("use_cache") and not warm_start:
+            cache_key = cache.make_key(timetable, PREVIEW_PROFILE, options)
+            cached = cache.get(cache_key)
+            if cached is not None:
+                print(f"⚡ 解キャッシュヒット: {cache_key[:12]}")
+                cached["cached"] = True
+                return timetable_response(cached)
         
-        # 最小限の結果チェック
-        if len(lessons) == 0:
-            print("⚠️ 授業が1つも配置されませんでした - データ不足の可能性")
-            
-        return jsonify(result)
+        result = preview_timetable(timetable)
+        result["profile"] = PREVIEW_PROFILE
+        if cache_key is not None:
+            cache.put(cache_key, result)
+        result["cached"] = False
+        return timetable_response(result)
         
+    except EmptyValueRangeError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
-        print(f"❌ Railway最適化エラー: {e}")
+        print(f"❌ プレビューエラー: {e}")
         import traceback
         traceback.print_exc()
-        
-        # より詳細なフォールバック: 実際のデータを可能な限り使用
-        try:
-            print("🔄 フォールバック処理開始 - 最小限のデータで再試行")
-            
-            # 最小限のデータでもう一度試行
-            fallback_timeslots = [
-                {"id": 1, "day_of_week": "月曜日", "start_time": "09:00", "end_time": "10:00"},
-                {"id": 2, "day_of_week": "月曜日", "start_time": "10:15", "end_time": "11:15"},
-                {"id": 3, "day_of_week": "火曜日", "start_time": "09:00", "end_time": "10:00"},
-                {"id": 4, "day_of_week": "火曜日", "start_time": "10:15", "end_time": "11:15"}
-            ]
-            
-            fallback_lessons = [
-                {
-                    "id": 1,
-                    "subject": {"id": 1, "name": "数学"},
-                    "teacher": {"id": 1, "name": "田中先生"},
-                    "student_group": {"id": 1, "name": "1年A組"},
-                    "timeslot": {"id": 1, "day_of_week": "月曜日", "start_time": "09:00", "end_time": "10:00"},
-                    "room": {"id": 1, "name": "教室A"}
-                },
-                {
-                    "id": 2,
-                    "subject": {"id": 2, "name": "国語"},
-                    "teacher": {"id": 2, "name": "佐藤先生"},
-                    "student_group": {"id": 1, "name": "1年A組"},
-                    "timeslot": {"id": 2, "day_of_week": "月曜日", "start_time": "10:15", "end_time": "11:15"},
-                    "room": {"id": 1, "name": "教室A"}
-                },
-                {
-                    "id": 3,
-                    "subject": {"id": 3, "name": "英語"},
-                    "teacher": {"id": 3, "name": "鈴木先生"},
-                    "student_group": {"id": 1, "name": "1年A組"},
-                    "timeslot": {"id": 3, "day_of_week": "火曜日", "start_time": "09:00", "end_time": "10:00"},
-                    "room": {"id": 1, "name": "教室A"}
-                }
-            ]
-            
-            return jsonify({
-                "timeslots": fallback_timeslots,
-                "rooms": [{"id": 1, "name": "教室A"}, {"id": 2, "name": "教室B"}],
-                "lessons": fallback_lessons,
-                "score": "Railway フォールバック (改善版)"
-            })
-            
-        except Exception as fallback_error:
-            print(f"❌ フォールバック処理も失敗: {fallback_error}")
-            return jsonify({"error": f"最適化処理が完全に失敗しました: {str(e)}"}), 500
+        return jsonify({"error": str(e)}), 500
 
 @api_bp.route('/refresh-cache', methods=['POST'])
 def refresh_cache():
     """キャッシュを強制更新（新規追加）"""
     try:
-        # グローバルな最適化サービスを再作成
-        global optimization_service
-        optimization_service = OptimizationService()
+        # グローバルな最適化サービスを破棄（次回利用時に最新データで再作成）
+        global _optimization_service
+        _optimization_service = None
         
         return jsonify({
             "status": "success",
@@ -303,20 +471,24 @@ def refresh_cache():
 
 @api_bp.route('/optimization-status', methods=['GET'])
 def get_optimization_status():
-    """最適化機能の状態確認"""
+    """最適化機能の状態確認（ソルバーのウォームアップ状況を含む）"""
     try:
-        # TimefoldAIの動作確認
-        from timefold.solver import SolverFactory
+        solver_status = get_solver_registry().status()
+        if solver_status["state"] == "error":
+            return jsonify({
+                "status": "error",
+                "message": f"最適化エンジンエラー: {solver_status['error']}",
+                "solver": solver_status
+            }), 500
+        
         return jsonify({
-            "status": "ready",
-            "message": "TimefoldAI最適化エンジン準備完了",
-            "version": "TimefoldAI v6 本格版"
+            "status": "ready" if solver_status["ready"] else "warming_up",
+            "message": ("TimefoldAI最適化エンジン準備完了" if solver_status["ready"]
+                        else "TimefoldAI最適化エンジン起動中"),
+            "version": "TimefoldAI v6 本格版",
+            "solver": solver_status,
+            "solution_cache": get_solution_cache().stats()
         })
-    except ImportError as e:
-        return jsonify({
-            "status": "error", 
-            "message": f"TimefoldAI未インストール: {e}"
-        }), 500
     except Exception as e:
         return jsonify({
             "status": "error",
@@ -364,6 +536,34 @@ def manage_teachers():
         except Exception as e:
             return jsonify({"error": str(e)}), 400
 
+@api_bp.route('/rooms', methods=['GET', 'POST', 'DELETE'])
+def manage_rooms():
+    """教室管理API（収容人数・設備）"""
+    data_repo = get_data_repository()
+    
+    if request.method == 'GET':
+        rooms = data_repo.get_rooms()
+        print(f"🏫 /api/rooms GET: {len(rooms)}件の教室を返します")
+        return jsonify([r.to_dict() for r in rooms])
+    
+    elif request.method == 'POST':
+        try:
+            room_data = request.get_json()
+            room = Room(**room_data)
+            saved_room = data_repo.save_room(room)
+            print(f"🏫 /api/rooms POST: 教室'{room.name}'を保存しました")
+            return jsonify(saved_room.to_dict())
+        except Exception as e:
+            return jsonify({"error": str(e)}), 400
+    
+    elif request.method == 'DELETE':
+        room_id = request.args.get('id', type=int)
+        if not room_id:
+            return jsonify({"error": "教室IDが必要です"}), 400
+        if not data_repo.delete_room(room_id):
+            return jsonify({"error": f"教室が見つかりません: {room_id}"}), 404
+        return jsonify({"status": "success", "deleted_id": room_id})
+
 @api_bp.route('/timeslots', methods=['GET'])
 def get_timeslots():
     """時間枠取得API"""
@@ -383,7 +583,7 @@ def manage_lessons():
     """授業管理API"""
     data_repo = get_data_repository()
     lessons = data_repo.generate_lessons()
-    return jsonify([l.to_dict() for l in lessons])
+    return timetable_response([l.to_dict() for l in lessons])
 
 @api_bp.route('/test', methods=['GET'])
 def test_api():
@@ -411,7 +611,8 @@ def test_api():
             "subjects": len(data_repo.get_subjects()),
             "teachers": len(data_repo.get_teachers()),
             "timeslots": len(data_repo.get_timeslots()),
-            "student_groups": len(data_repo.get_student_groups())
+            "student_groups": len(data_repo.get_student_groups()),
+            "rooms": len(data_repo.get_rooms())
         },
         "environment": environment_info
     })
\ No newline at end of file
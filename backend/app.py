@@ -1,8 +1,10 @@
 """TimefoldAI Flask アプリケーション"""
+import os
 from flask import Flask, render_template
 from flask_cors import CORS
 from .api.routes import api_bp
 from .api.customize_routes import customize_bp
+from .services.solver_registry import get_solver_registry
 
 def create_app(config=None):
     """Flask アプリケーションファクトリ"""
@@ -27,6 +29,17 @@ def create_app(config=None):
     app.register_blueprint(api_bp, url_prefix='/api')
     app.register_blueprint(customize_bp)  # カスタマイズAPI追加
     
+    # ワーカーモードではソルブは solver_worker.py が担当（Web プロセスで JVM を起動しない）
+    app.config.setdefault('SOLVER_MODE', os.environ.get('SOLVER_MODE', 'inprocess'))
+    # SOLVER_WARMUP=0/false/no/off でウォームアップを無効化
+    app.config.setdefault(
+        'SOLVER_WARMUP', os.environ.get('SOLVER_WARMUP', '1').strip().lower() not in ('0', 'false', 'no', 'off')
+    )
+    
+    # JVM起動と制約コンパイルをリクエスト経路から外す（バックグラウンドで実施）
+    if app.config['SOLVER_WARMUP'] and app.config['SOLVER_MODE'] != 'worker':
+        get_solver_registry().start_background_warm_up()
+    
     @app.route('/')
     def index():
         """メインページ"""
@@ -0,0 +1 @@
+"""TimefoldAI ソルバーベンチマーク"""
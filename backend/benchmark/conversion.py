@@ -0,0 +1,90 @@
+"""JSON ⇔ ドメインオブジェクト変換のベンチマーク（授業数別の変換時間・共有される事実オブジェクト数・応答サイズ）"""
+import gzip
+import json
+import time
+from typing import Dict, Any, List, Sequence
+
+from backend.api.response_format import compact_timetable, GZIP_COMPRESS_LEVEL
+from backend.benchmark.datasets import build_solution_json
+from backend.services.optimization_service import OptimizationService
+
+DEFAULT_CONVERSION_SIZES = (1000, 10000)
+
+
+def _best_of(repeat: int, func):
+    """repeat 回実行して最短時間と最後の戻り値を返す"""
+    best, result = None, None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def _payload_sizes(result: Dict[str, Any], repeat: int) -> Dict[str, Any]:
+    """従来の入れ子 JSON とコンパクト形式（JSON・gzip・MessagePack）の応答サイズとエンコード時間"""
+    nested_seconds, nested = _best_of(repeat, lambda: json.dumps(result, separators=(",", ":")).encode())
+    compact_seconds, compact = _best_of(repeat, lambda: json.dumps(
+        compact_timetable(result), ensure_ascii=False, separators=(",", ":")).encode())
+    sizes = {
+        "nested_json_bytes": len(nested),
+        "nested_json_gzip_bytes": len(gzip.compress(nested, compresslevel=GZIP_COMPRESS_LEVEL)),
+        "nested_json_encode_seconds": round(nested_seconds, 4),
+        "compact_json_bytes": len(compact),
+        "compact_json_gzip_bytes": len(gzip.compress(compact, compresslevel=GZIP_COMPRESS_LEVEL)),
+        "compact_json_encode_seconds": round(compact_seconds, 4),
+    }
+    try:
+        import msgpack
+    except ImportError:
+        return sizes
+    msgpack_seconds, packed = _best_of(repeat, lambda: msgpack.packb(compact_timetable(result), use_bin_type=True))
+    sizes["compact_msgpack_bytes"] = len(packed)
+    sizes["compact_msgpack_encode_seconds"] = round(msgpack_seconds, 4)
+    return sizes
+
+
+def run_conversion_benchmark(sizes: Sequence[int] = DEFAULT_CONVERSION_SIZES, seed: int = 0,
+                             repeat: int = 3, solver_update: bool = False) -> List[Dict[str, Any]]:
+    """割り当て済みの時間割JSONを各サイズで変換し、変換時間を記録
+
+    solver_update を指定すると、変換した問題を SolutionManager.update に渡し、
+    Python ⇔ Java のオブジェクト変換を含むスコア計算1回の時間も記録する（JVM を起動する）。
+    """
+    service = OptimizationService()
+    results = []
+
+    for size in sizes:
+        data = build_solution_json(size, seed)
+        print(f"📏 変換ベンチマーク: {size}授業")
+
+        from_json_seconds, timetable = _best_of(repeat, lambda: service.convert_from_json(data))
+        to_json_seconds, solution_json = _best_of(repeat, lambda: service.convert_to_json(timetable))
+
+        result = {
+            "lessons": size,
+            "timeslots": len(timetable.timeslots),
+            "rooms": len(timetable.rooms),
+            "seed": seed,
+            "convert_from_json_seconds": round(from_json_seconds, 4),
+            "convert_to_json_seconds": round(to_json_seconds, 4),
+            # 授業間で共有されていれば、教師・クラス・科目のオブジェクト数は ID の数と一致する
+            "teacher_objects": len({id(l.teacher) for l in timetable.lessons}),
+            "student_group_objects": len({id(l.student_group) for l in timetable.lessons}),
+            "subject_objects": len({id(l.subject) for l in timetable.lessons}),
+            **_payload_sizes(solution_json, repeat)
+        }
+        if solver_update:
+            from backend.services.solver_registry import get_solver_registry
+            manager = get_solver_registry().get_solution_manager()
+            start = time.perf_counter()
+            result["score"] = str(manager.update(timetable))
+            result["solver_update_seconds"] = round(time.perf_counter() - start, 3)
+
+        print(f"📈 {size}授業: from_json {result['convert_from_json_seconds']}秒, "
+              f"to_json {result['convert_to_json_seconds']}秒, 応答 {result['nested_json_bytes']}B → "
+              f"コンパクト {result['compact_json_bytes']}B (gzip {result['compact_json_gzip_bytes']}B)")
+        results.append(result)
+
+    return results
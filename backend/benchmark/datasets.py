@@ -0,0 +1,77 @@
+"""ベンチマーク用の再現可能な時間割データセット"""
+import math
+import random
+from typing import Dict, Any
+
+DEFAULT_SIZES = (20, 200, 1000, 5000)
+
+DAYS = ["MONDAY", "TUESDAY", "WEDNESDAY", "THURSDAY", "FRIDAY"]
+PERIODS_PER_DAY = 6
+SUBJECT_NAMES = ["国語", "数学", "英語", "理科", "社会", "音楽", "美術", "体育", "技術"]
+# 1クラスあたりの週授業数（時間帯数30に対して余裕を持たせる）
+LESSONS_PER_GROUP = 25
+# 教師1人あたりの週授業数の目安
+LESSONS_PER_TEACHER = 18
+
+
+def build_problem_json(lesson_count: int, seed: int = 0) -> Dict[str, Any]:
+    """授業数を指定して /api/demo-data と同じ形式の未割り当て問題を生成
+    
+    同じ (lesson_count, seed) からは常に同じデータを生成する。
+    """
+    rng = random.Random(seed * 1000003 + lesson_count)
+
+    timeslots = []
+    for day in DAYS:
+        for period in range(PERIODS_PER_DAY):
+            start_minutes = 8 * 60 + 50 + period * 60
+            timeslots.append({
+                "id": len(timeslots) + 1,
+                "day_of_week": day,
+                "start_time": f"{start_minutes // 60:02d}:{start_minutes % 60:02d}",
+                "end_time": f"{(start_minutes + 50) // 60:02d}:{(start_minutes + 50) % 60:02d}"
+            })
+
+    group_count = max(1, math.ceil(lesson_count / LESSONS_PER_GROUP))
+    teacher_count = max(len(SUBJECT_NAMES), math.ceil(lesson_count / LESSONS_PER_TEACHER))
+
+    rooms = [{"id": i, "name": f"教室{i}"} for i in range(1, group_count + 2)]
+    subjects = [{"id": i + 1, "name": name} for i, name in enumerate(SUBJECT_NAMES)]
+    groups = [{"id": i, "name": f"{(i - 1) // 8 + 1}年{(i - 1) % 8 + 1}組"}
+              for i in range(1, group_count + 1)]
+
+    # 教師は担当科目を1つ持つ（科目ごとにほぼ均等）
+    teachers_by_subject: Dict[int, list] = {s["id"]: [] for s in subjects}
+    for i in range(1, teacher_count + 1):
+        subject = subjects[(i - 1) % len(subjects)]
+        teachers_by_subject[subject["id"]].append({"id": i, "name": f"教師{i}"})
+
+    lessons = []
+    for lesson_id in range(1, lesson_count + 1):
+        group = groups[(lesson_id - 1) // LESSONS_PER_GROUP]
+        subject = rng.choice(subjects)
+        teacher = rng.choice(teachers_by_subject[subject["id"]])
+        lessons.append({
+            "id": lesson_id,
+            "subject": subject,
+            "teacher": teacher,
+            "student_group": group,
+            "timeslot": None,
+            "room": None
+        })
+
+    return {"timeslots": timeslots, "rooms": rooms, "lessons": lessons}
+
+
+def build_solution_json(lesson_count: int, seed: int = 0) -> Dict[str, Any]:
+    """build_problem_json の授業に時間帯・教室を割り当てた解（/api/optimize の応答・ウォームスタートと同じ形式）
+
+    変換の計測用のため、制約は満たしていなくてよい。
+    """
+    data = build_problem_json(lesson_count, seed)
+    rng = random.Random(seed * 1000003 + lesson_count + 1)
+    for lesson in data["lessons"]:
+        lesson["timeslot"] = dict(rng.choice(data["timeslots"]))
+        room = rng.choice(data["rooms"])
+        lesson["room"] = {"id": room["id"], "name": room["name"]}
+    return data
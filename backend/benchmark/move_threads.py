@@ -0,0 +1,62 @@
+"""move_thread_count 別のスコア計算速度ベンチマーク"""
+import time
+from typing import Callable, Dict, Any, List, Sequence
+
+from timefold.solver.config import SolverConfigOverride, TerminationConfig, Duration
+
+from backend.models.timefold_models import TimeTable
+from backend.services.solver_registry import get_solver_registry
+
+DEFAULT_THREAD_COUNTS = (1, 2, 4, 8)
+
+
+def run_move_thread_benchmark(problem_factory: Callable[[], TimeTable],
+                              thread_counts: Sequence[int] = DEFAULT_THREAD_COUNTS,
+                              seconds: float = 10.0) -> List[Dict[str, Any]]:
+    """同じデータセットを各スレッド数で同じ時間だけ解き、速度と最終スコアを記録
+    
+    problem_factory は毎回新しい未割り当ての問題を返すこと（解は in-place で書き換わらないが、
+    ウォームスタートの影響を避けるため）。
+    """
+    registry = get_solver_registry()
+    single_thread_factory = registry.get_solver_factory()
+    results = []
+
+    for thread_count in thread_counts:
+        move_thread_count = thread_count if thread_count > 1 else None
+        factory = registry.get_solver_factory(move_thread_count=move_thread_count)
+        if move_thread_count and factory is single_thread_factory:
+            print(f"⚠️ move threads {thread_count}: マルチスレッド探索が利用できないためスキップ")
+            results.append({
+                "move_thread_count": thread_count,
+                "skipped": True,
+                "reason": registry.multithreading_error
+            })
+            continue
+
+        solver = factory.build_solver(SolverConfigOverride(
+            termination_config=TerminationConfig(spent_limit=Duration(milliseconds=int(seconds * 1000)))
+        ))
+        problem = problem_factory()
+
+        start = time.perf_counter()
+        solution = solver.solve(problem)
+        wall_seconds = time.perf_counter() - start
+
+        java_solver = solver._delegate
+        result = {
+            "move_thread_count": thread_count,
+            "skipped": False,
+            "lessons": len(problem.lessons),
+            "wall_seconds": round(wall_seconds, 3),
+            "time_spent_ms": java_solver.getTimeMillisSpent(),
+            "score_calculation_count": java_solver.getScoreCalculationCount(),
+            "score_calculation_speed": java_solver.getScoreCalculationSpeed(),
+            "move_evaluation_speed": java_solver.getMoveEvaluationSpeed(),
+            "final_score": str(solution.score)
+        }
+        print(f"📈 move threads {thread_count}: {result['score_calculation_speed']}/秒, "
+              f"スコア {result['final_score']}")
+        results.append(result)
+
+    return results
@@ -0,0 +1,119 @@
+"""問題サイズ別のソルバーベンチマーク（速度・初回実行可能解・スコア・メモリ・変換時間）"""
+import resource
+import time
+import tracemalloc
+from typing import Dict, Any, List, Sequence
+
+from timefold.solver import SolverFactory
+from timefold.solver.config import SolverConfigOverride, TerminationConfig, Duration
+
+from backend.benchmark.datasets import DEFAULT_SIZES, build_problem_json
+from backend.services.optimization_service import OptimizationService
+from backend.services.solver_registry import get_solver_registry
+
+
+def _feasible_listener():
+    """最初に 0hard に到達した時刻を記録する Java 側リスナー
+    
+    Python の add_event_listener は毎回解全体を Python に変換するため、大規模問題の計測を歪める。
+    """
+    from jpype import JImplements, JOverride
+
+    @JImplements("ai.timefold.solver.core.api.solver.event.SolverEventListener")
+    class FirstFeasibleListener:
+        def __init__(self):
+            self.first_feasible_ms = None
+            self.first_initialized_ms = None
+
+        @JOverride
+        def bestSolutionChanged(self, event):
+            if self.first_initialized_ms is None and event.isNewBestSolutionInitialized():
+                self.first_initialized_ms = int(event.getTimeMillisSpent())
+            if (self.first_feasible_ms is None and event.isNewBestSolutionInitialized()
+                    and event.getNewBestScore().isFeasible()):
+                self.first_feasible_ms = int(event.getTimeMillisSpent())
+
+    return FirstFeasibleListener()
+
+
+def _reset_jvm_peak_memory():
+    from jpype import JClass
+    for pool in JClass("java.lang.management.ManagementFactory").getMemoryPoolMXBeans():
+        pool.resetPeakUsage()
+
+
+def _jvm_peak_heap_bytes() -> int:
+    from jpype import JClass
+    management = JClass("java.lang.management.ManagementFactory")
+    heap = JClass("java.lang.management.MemoryType").HEAP
+    return sum(int(pool.getPeakUsage().getUsed())
+               for pool in management.getMemoryPoolMXBeans() if pool.getType() == heap)
+
+
+def run_solver_benchmark(sizes: Sequence[int] = DEFAULT_SIZES, seconds: float = 30.0,
+                         seed: int = 0) -> List[Dict[str, Any]]:
+    """各サイズのデータセットを固定シードで解き、指標を記録"""
+    service = OptimizationService()
+    solver_config = get_solver_registry().build_solver_config()
+    solver_config.random_seed = seed
+    # 制約コンパイルは計測対象外（1回だけ構築）
+    factory = SolverFactory.create(solver_config)
+    override = SolverConfigOverride(
+        termination_config=TerminationConfig(spent_limit=Duration(milliseconds=int(seconds * 1000)))
+    )
+
+    results = []
+    for size in sizes:
+        data = build_problem_json(size, seed)
+        print(f"📏 ベンチマーク: {size}授業 ({seconds}秒)")
+
+        start = time.perf_counter()
+        problem = service.convert_from_json(data)
+        convert_from_json_seconds = time.perf_counter() - start
+
+        solver = factory.build_solver(override)
+        listener = _feasible_listener()
+        solver._delegate.addEventListener(listener)
+        _reset_jvm_peak_memory()
+        # tracemalloc は割り当てを遅くするため、変換時間の計測とは分けてソルブ中のみ有効にする
+        tracemalloc.start()
+
+        start = time.perf_counter()
+        solution = solver.solve(problem)
+        solve_seconds = time.perf_counter() - start
+        _, python_peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        start = time.perf_counter()
+        service.convert_to_json(solution)
+        convert_to_json_seconds = time.perf_counter() - start
+
+        java_solver = solver._delegate
+        result = {
+            "lessons": size,
+            "timeslots": len(problem.timeslots),
+            "rooms": len(problem.rooms),
+            "seed": seed,
+            "solve_seconds": round(solve_seconds, 3),
+            "score_calculation_count": int(java_solver.getScoreCalculationCount()),
+            "score_calculation_speed": int(java_solver.getScoreCalculationSpeed()),
+            "first_initialized_seconds": (
+                listener.first_initialized_ms / 1000 if listener.first_initialized_ms is not None else None
+            ),
+            "first_feasible_seconds": (
+                listener.first_feasible_ms / 1000 if listener.first_feasible_ms is not None else None
+            ),
+            "final_score": str(solution.score),
+            "assigned_lessons": sum(1 for l in solution.lessons if l.timeslot and l.room),
+            "convert_from_json_seconds": round(convert_from_json_seconds, 4),
+            "convert_to_json_seconds": round(convert_to_json_seconds, 4),
+            "python_peak_memory_bytes": python_peak,
+            "jvm_peak_heap_bytes": _jvm_peak_heap_bytes(),
+            # Linux では KB 単位（JVM を含むプロセス全体）
+            "process_max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        }
+        print(f"📈 {size}授業: {result['score_calculation_speed']}/秒, スコア {result['final_score']}, "
+              f"初回実行可能解 {result['first_feasible_seconds']}秒")
+        results.append(result)
+
+    return results
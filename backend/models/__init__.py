@@ -1,8 +1,9 @@
 """TimefoldAI models module"""
 from .data_models import Subject, Teacher, TimeSlot, StudentGroup, Lesson
-from .database import DataRepository, JSONDataRepository
+from .database import DataRepository, JSONDataRepository, create_data_repository
+from .sqlite_repository import SQLiteDataRepository
 
 __all__ = [
     'Subject', 'Teacher', 'TimeSlot', 'StudentGroup', 'Lesson',
-    'DataRepository', 'JSONDataRepository'
+    'DataRepository', 'JSONDataRepository', 'SQLiteDataRepository', 'create_data_repository'
 ]
@@ -3,6 +3,7 @@ from dataclasses import dataclass, field
 from typing import Dict, List, Any
 import json
 import os
+from .database import atomic_write_json
 
 @dataclass
 class SystemConfig:
@@ -20,6 +21,9 @@ class SystemConfig:
     max_consecutive_lessons: int = 3
     min_break_between_lessons: int = 10
     
+    # ソルバー設定（NONE: 単一スレッド, AUTO: コア数から自動決定, 数値: スレッド数）
+    move_thread_count: str = "NONE"
+    
     # 科目設定
     preferred_morning_subjects: List[str] = field(default_factory=lambda: ["数学", "国語", "英語"])
     preferred_afternoon_subjects: List[str] = field(default_factory=lambda: ["体育", "音楽", "美術"])
@@ -40,6 +44,7 @@ class SystemConfig:
             "max_daily_lessons_per_teacher": self.max_daily_lessons_per_teacher,
             "max_consecutive_lessons": self.max_consecutive_lessons,
             "min_break_between_lessons": self.min_break_between_lessons,
+            "move_thread_count": self.move_thread_count,
             "preferred_morning_subjects": self.preferred_morning_subjects,
             "preferred_afternoon_subjects": self.preferred_afternoon_subjects,
             "school_name": self.school_name,
@@ -54,8 +59,7 @@ class SystemConfig:
     def save(self, file_path: str):
         """設定をファイルに保存"""
         os.makedirs(os.path.dirname(file_path), exist_ok=True)
-        with open(file_path, 'w', encoding='utf-8') as f:
-            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+        atomic_write_json(file_path, self.to_dict())
     
     @classmethod
     def load(cls, file_path: str) -> 'SystemConfig':
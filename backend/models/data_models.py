@@ -126,6 +126,30 @@ class StudentGroup:
             "created_at": self.created_at
         }
 
+@dataclass
+class Room:
+    """教室データクラス"""
+    id: int
+    name: str
+    capacity: int = 40
+    equipment: List[str] = field(default_factory=list)
+    room_type: str = "classroom"  # classroom, special
+    created_at: str = ""
+    
+    def __post_init__(self):
+        if not self.created_at:
+            self.created_at = datetime.now().isoformat()
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "name": self.name,
+            "capacity": self.capacity,
+            "equipment": self.equipment,
+            "room_type": self.room_type,
+            "created_at": self.created_at
+        }
+
 @dataclass
 class Lesson:
     """授業データクラス - TimefoldAI用"""
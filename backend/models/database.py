@@ -1,9 +1,233 @@
 """データベース抽象化レイヤー"""
 from abc import ABC, abstractmethod
-from typing import List, Optional, Dict, Any
+from contextlib import contextmanager
+from typing import Callable, List, Optional, Dict, Any, Tuple
 import json
 import os
-from .data_models import Subject, Teacher, TimeSlot, StudentGroup, Lesson
+import tempfile
+import threading
+from .data_models import Subject, Teacher, TimeSlot, StudentGroup, Room, Lesson
+
+# 同一プロセス内でのデータファイルの書き込み回数（絶対パス -> 回数）。
+# mtime の粒度内に同じ大きさで書き換えられても、他のリポジトリが変更に気付けるようにする
+_write_generations: Dict[str, int] = {}
+_write_generations_lock = threading.Lock()
+
+try:
+    import fcntl
+except ImportError:  # Windows ではプロセス間ロックなし（プロセス内のロックのみ）
+    fcntl = None
+
+# データディレクトリ内のプロセス間ロックファイル（interprocess_lock に渡す）
+LOCK_FILE_NAME = ".data.lock"
+
+
+def note_data_file_written(file_path: str) -> None:
+    """データファイルへの書き込みを記録（リポジトリ以外から書き込んだときも呼ぶ）"""
+    key = os.path.abspath(file_path)
+    with _write_generations_lock:
+        _write_generations[key] = _write_generations.get(key, 0) + 1
+
+
+def _file_stamp(file_path: str) -> Optional[Tuple[int, int, int, int]]:
+    """(inode, mtime_ns, サイズ, プロセス内の書き込み回数)。ファイルがなければ None
+
+    atomic_write_json は新しいファイルで置き換えるため、他プロセスの書き込みも inode で検出できる。
+    """
+    try:
+        stat = os.stat(file_path)
+    except OSError:
+        return None
+    return (stat.st_ino, stat.st_mtime_ns, stat.st_size, _write_generations.get(file_path, 0))
+
+
+def atomic_write_json(file_path: str, data: Any) -> None:
+    """同じディレクトリの一時ファイルに書き出し、os.replace で置き換える
+
+    読み手は置き換え前か後のどちらかの完全なファイルだけを見る（書きかけ・切り詰め中を読まない）。
+    """
+    directory = os.path.dirname(os.path.abspath(file_path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(file_path)}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        # mkstemp は 0600 で作るため、元のファイル（なければ通常の 0644）の権限に揃える
+        try:
+            mode = os.stat(file_path).st_mode & 0o777
+        except OSError:
+            mode = 0o644
+        os.chmod(tmp_path, mode)
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+    note_data_file_written(file_path)
+
+
+@contextmanager
+def interprocess_lock(lock_path: str):
+    """ロックファイルの flock で、同じデータディレクトリを使う他プロセス（gunicorn ワーカー）と排他"""
+    with open(lock_path, 'a') as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+class ReadWriteLock:
+    """プロセス内の読み書きロック（読み込みは並行、書き込みは排他。待っている書き込みを優先）
+
+    再入できないため、ロック中に同じロックを取る処理を呼ばないこと。
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writer = False
+        self._writers_waiting = 0
+
+    @contextmanager
+    def read(self):
+        with self._cond:
+            while self._writer or self._writers_waiting:
+                self._cond.wait()
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._readers -= 1
+                if self._readers == 0:
+                    self._cond.notify_all()
+
+    @contextmanager
+    def write(self):
+        with self._cond:
+            self._writers_waiting += 1
+            while self._writer or self._readers:
+                self._cond.wait()
+            self._writers_waiting -= 1
+            self._writer = True
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._writer = False
+                self._cond.notify_all()
+
+
+DEFAULT_SYSTEM_CONFIG = {
+    "start_hour": 9,
+    "end_hour": 16,
+    "lesson_duration": 50,
+    "break_duration": 10,
+    "school_name": "サンプル学校"
+}
+
+
+def load_system_config(config_file: str) -> Dict[str, Any]:
+    """システム設定の読み込み（ファイルがなければデフォルト設定で作成）"""
+    default_config = dict(DEFAULT_SYSTEM_CONFIG)
+    
+    if not os.path.exists(config_file):
+        # デフォルト設定ファイルを作成
+        atomic_write_json(config_file, default_config)
+        print("📝 デフォルトのシステム設定ファイルを作成しました")
+        return default_config
+    
+    try:
+        with open(config_file, 'r', encoding='utf-8') as f:
+            config = json.load(f)
+            print(f"📋 システム設定読み込み: {config}")
+            return config
+    except Exception as e:
+        print(f"⚠️ 設定ファイル読み込みエラー: {e}")
+        return default_config
+
+
+def build_timeslots(config: Dict[str, Any]) -> List[TimeSlot]:
+    """システム設定から時間枠を生成（昼休みは除く）"""
+    # デフォルト設定
+    start_hour = config.get('start_hour', 9)
+    end_hour = config.get('end_hour', 16)
+    lesson_duration = config.get('lesson_duration', 50)
+    break_duration = config.get('break_duration', 10)
+    
+    # 昼休み設定
+    lunch_start_hour = 12
+    lunch_end_hour = 13
+    
+    print(f"⏰ 時間枠生成設定:")
+    print(f"   開始時刻: {start_hour}時")
+    print(f"   終了時刻: {end_hour}時")
+    print(f"   授業時間: {lesson_duration}分")
+    print(f"   休憩時間: {break_duration}分")
+    
+    timeslots = []
+    days = ["MONDAY", "TUESDAY", "WEDNESDAY", "THURSDAY", "FRIDAY"]
+    day_names = ["月曜日", "火曜日", "水曜日", "木曜日", "金曜日"]
+    
+    slot_id = 1
+    
+    for day_index, day in enumerate(days):
+        current_hour = start_hour
+        current_minute = 0
+        period_num = 1
+        
+        while current_hour < end_hour:
+            # 昼休み時間帯をスキップ
+            if current_hour >= lunch_start_hour and current_hour < lunch_end_hour:
+                current_hour = lunch_end_hour
+                current_minute = 0
+                continue
+            
+            # 授業終了時刻を計算
+            end_minute = current_minute + lesson_duration
+            end_hour_calc = current_hour
+            
+            if end_minute >= 60:
+                end_hour_calc += end_minute // 60
+                end_minute = end_minute % 60
+            
+            # 終了時刻が設定範囲を超える場合は終了
+            if end_hour_calc > end_hour or (end_hour_calc == end_hour and end_minute > 0):
+                break
+            
+            # 時間枠を作成
+            start_time = f"{current_hour:02d}:{current_minute:02d}"
+            end_time = f"{end_hour_calc:02d}:{end_minute:02d}"
+            
+            timeslot = TimeSlot(
+                id=slot_id,
+                day_of_week=day,
+                start_time=start_time,
+                end_time=end_time,
+                period_name=f"{period_num}限",
+                duration_minutes=lesson_duration
+            )
+            timeslots.append(timeslot)
+            
+            print(f"   🕒 {day_names[day_index]} {period_num}限: {start_time}-{end_time}")
+            
+            # 次の時間帯を計算（授業時間 + 休憩時間）
+            next_minute = current_minute + lesson_duration + break_duration
+            current_hour += next_minute // 60
+            current_minute = next_minute % 60
+            
+            slot_id += 1
+            period_num += 1
+    
+    print(f"📊 生成された時間枠数: {len(timeslots)}")
+    return timeslots
+
 
 class DataRepository(ABC):
     """データリポジトリの抽象基底クラス"""
@@ -24,6 +248,10 @@ class DataRepository(ABC):
     def get_student_groups(self) -> List[StudentGroup]:
         pass
     
+    @abstractmethod
+    def get_rooms(self) -> List[Room]:
+        pass
+    
     @abstractmethod
     def save_subject(self, subject: Subject) -> Subject:
         pass
@@ -31,9 +259,82 @@ class DataRepository(ABC):
     @abstractmethod
     def save_teacher(self, teacher: Teacher) -> Teacher:
         pass
+    
+    @abstractmethod
+    def add_subject(self, subject: Subject) -> Subject:
+        """IDを採番して科目を追加（subject.id は上書きする）"""
+        pass
+    
+    @abstractmethod
+    def add_teacher(self, teacher: Teacher) -> Teacher:
+        """IDを採番して教師を追加（teacher.id は上書きする）"""
+        pass
+    
+    @abstractmethod
+    def update_system_config(self, update: Callable[[Dict[str, Any]], Dict[str, Any]]) -> Dict[str, Any]:
+        """保存済みのシステム設定を読み直して update を適用し、保存した設定を返す
+        
+        読み込みから書き込みまで他スレッド・他プロセスの更新と排他する（同時更新で変更を失わない）。
+        """
+        pass
+    
+    def refresh(self) -> bool:
+        """変更を読み直す（読み直したら True）。毎回ストアから読むリポジトリでは何もしない"""
+        return False
+    
+    def generate_lessons(self) -> List[Lesson]:
+        """授業リストの生成（週時間数を考慮）"""
+        lessons = []
+        lesson_id = 1
+        
+        subjects = self.get_subjects()
+        teachers = self.get_teachers()
+        student_groups = self.get_student_groups()
+        
+        for student_group in student_groups:
+            for subject in subjects:
+                teacher = self._find_teacher_for_subject(teachers, subject.name)
+                if teacher:
+                    # 週時間数分だけ授業を生成
+                    weekly_hours = getattr(subject, 'weekly_hours', 1)
+                    for hour in range(weekly_hours):
+                        lesson = Lesson(
+                            id=lesson_id,
+                            subject=subject,
+                            teacher=teacher,
+                            student_group=student_group,
+                            lesson_type="regular"
+                        )
+                        lessons.append(lesson)
+                        lesson_id += 1
+        
+        return lessons
+    
+    def _find_teacher_for_subject(self, teachers: List[Teacher], subject_name: str) -> Optional[Teacher]:
+        """科目に対応する教師を検索"""
+        for teacher in teachers:
+            if subject_name in teacher.subjects:
+                return teacher
+        return None
 
 class JSONDataRepository(DataRepository):
-    """JSONベースのデータリポジトリ"""
+    """JSONベースのデータリポジトリ
+
+    ファイルごとに読み込み時の (mtime, サイズ, 書き込み回数) を覚えておき、refresh() では
+    変わったファイルだけを読み直す（時間枠は system_config.json が変わったときだけ再生成）。
+    読み直し・書き込みのたびに data_version が増える。
+
+    書き込みはプロセス内の書き込みロックとデータディレクトリのファイルロックを取り、
+    他プロセスの変更を読み直してから変更・保存する（保存は一時ファイル経由の置き換え）。
+    """
+    
+    # データの種類 -> ファイル名（timeslots は system_config.json から生成）
+    DATA_FILES = {
+        "subjects": "subjects.json",
+        "teachers": "teachers.json",
+        "timeslots": "system_config.json",
+        "rooms": "rooms.json",
+    }
     
     def __init__(self, data_dir: str = "backend/data"):
         self.data_dir = data_dir
@@ -42,18 +343,87 @@ class JSONDataRepository(DataRepository):
         self._teachers = []
         self._timeslots = []
         self._student_groups = []
+        self._rooms = []
+        self._paths = {kind: os.path.abspath(os.path.join(data_dir, name))
+                       for kind, name in self.DATA_FILES.items()}
+        self._stamps: Dict[str, Optional[Tuple[int, int, int, int]]] = {}
+        self._data_version = 0
+        self._rwlock = ReadWriteLock()
+        self._lock_path = os.path.join(data_dir, LOCK_FILE_NAME)
         self.load_all_data()
     
     def ensure_data_dir(self):
         """データディレクトリの確保"""
         os.makedirs(self.data_dir, exist_ok=True)
     
+    @property
+    def data_version(self) -> int:
+        """データの版数（読み直し・書き込みのたびに増える）"""
+        return self._data_version
+    
+    def _loaders(self):
+        return {
+            "subjects": self._load_subjects,
+            "teachers": self._load_teachers,
+            "timeslots": self._load_timeslots,
+            "rooms": self._load_rooms,
+        }
+    
+    def _reload(self, kind: str):
+        """1種類のデータを読み直す（読み込み中の書き換えは次の refresh で拾えるよう、先に stamp を取る）"""
+        stamp = _file_stamp(self._paths[kind])
+        setattr(self, f"_{kind}", self._loaders()[kind]())
+        if stamp is None:
+            # 読み込みでデフォルトのファイルが作られた場合
+            stamp = _file_stamp(self._paths[kind])
+        self._stamps[kind] = stamp
+    
     def load_all_data(self):
-        """全データの読み込み"""
-        self._subjects = self._load_subjects()
-        self._teachers = self._load_teachers()
-        self._timeslots = self._load_timeslots()
-        self._student_groups = self._load_student_groups()
+        """全データの読み込み（変更の有無にかかわらず読み直す）"""
+        with self._rwlock.write():
+            for kind in self.DATA_FILES:
+                self._reload(kind)
+            self._student_groups = self._load_student_groups()
+            self._data_version += 1
+    
+    def _changed_kinds(self) -> List[str]:
+        return [kind for kind, path in self._paths.items() if _file_stamp(path) != self._stamps.get(kind)]
+    
+    def _reload_changed(self) -> bool:
+        """変更のあったファイルを読み直す（書き込みロック中に呼ぶ）"""
+        changed = self._changed_kinds()
+        for kind in changed:
+            self._reload(kind)
+        if changed:
+            self._data_version += 1
+        return bool(changed)
+    
+    def refresh(self) -> bool:
+        """変更のあったファイルだけ読み直す。変更がなければ stat のみ（ロックも取らない）。読み直したら True"""
+        if not self._changed_kinds():
+            return False
+        with self._rwlock.write():
+            return self._reload_changed()
+    
+    @contextmanager
+    def _modifying(self):
+        """読み込み→変更→保存を他スレッド・他プロセスと排他して行う
+
+        開始時に他プロセスが保存した変更を読み直すため、更新が失われない。
+        失敗したときはメモリとファイルがずれないよう、次の refresh で全ファイルを読み直させる。
+        """
+        with self._rwlock.write(), interprocess_lock(self._lock_path):
+            self._reload_changed()
+            try:
+                yield
+            except BaseException:
+                self._stamps.clear()
+                raise
+    
+    def _written(self, kind: str):
+        """リポジトリ経由で書き込んだファイルを記録（メモリ上は最新なので読み直さない）"""
+        self._stamps[kind] = _file_stamp(self._paths[kind])
+        self._data_version += 1
     
     def _load_subjects(self) -> List[Subject]:
         """科目データの読み込み"""
@@ -85,110 +455,11 @@ class JSONDataRepository(DataRepository):
     
     def _load_timeslots(self) -> List[TimeSlot]:
         """時間枠データの読み込み（カスタマイズ設定から動的生成）"""
-        # システム設定を読み込み
-        config = self._load_system_config()
-        
-        # デフォルト設定
-        start_hour = config.get('start_hour', 9)
-        end_hour = config.get('end_hour', 16)
-        lesson_duration = config.get('lesson_duration', 50)
-        break_duration = config.get('break_duration', 10)
-        
-        # 昼休み設定
-        lunch_start_hour = 12
-        lunch_end_hour = 13
-        
-        print(f"⏰ 時間枠生成設定:")
-        print(f"   開始時刻: {start_hour}時")
-        print(f"   終了時刻: {end_hour}時")
-        print(f"   授業時間: {lesson_duration}分")
-        print(f"   休憩時間: {break_duration}分")
-        
-        timeslots = []
-        days = ["MONDAY", "TUESDAY", "WEDNESDAY", "THURSDAY", "FRIDAY"]
-        day_names = ["月曜日", "火曜日", "水曜日", "木曜日", "金曜日"]
-        
-        slot_id = 1
-        
-        for day_index, day in enumerate(days):
-            current_hour = start_hour
-            current_minute = 0
-            period_num = 1
-            
-            while current_hour < end_hour:
-                # 昼休み時間帯をスキップ
-                if current_hour >= lunch_start_hour and current_hour < lunch_end_hour:
-                    current_hour = lunch_end_hour
-                    current_minute = 0
-                    continue
-                
-                # 授業終了時刻を計算
-                end_minute = current_minute + lesson_duration
-                end_hour_calc = current_hour
-                
-                if end_minute >= 60:
-                    end_hour_calc += end_minute // 60
-                    end_minute = end_minute % 60
-                
-                # 終了時刻が設定範囲を超える場合は終了
-                if end_hour_calc > end_hour or (end_hour_calc == end_hour and end_minute > 0):
-                    break
-                
-                # 時間枠を作成
-                start_time = f"{current_hour:02d}:{current_minute:02d}"
-                end_time = f"{end_hour_calc:02d}:{end_minute:02d}"
-                
-                timeslot = TimeSlot(
-                    id=slot_id,
-                    day_of_week=day,
-                    start_time=start_time,
-                    end_time=end_time,
-                    period_name=f"{period_num}限",
-                    duration_minutes=lesson_duration
-                )
-                timeslots.append(timeslot)
-                
-                print(f"   🕒 {day_names[day_index]} {period_num}限: {start_time}-{end_time}")
-                
-                # 次の時間帯を計算（授業時間 + 休憩時間）
-                next_minute = current_minute + lesson_duration + break_duration
-                current_hour += next_minute // 60
-                current_minute = next_minute % 60
-                
-                slot_id += 1
-                period_num += 1
-        
-        print(f"📊 生成された時間枠数: {len(timeslots)}")
-        return timeslots
+        return build_timeslots(self._load_system_config())
     
     def _load_system_config(self) -> Dict[str, Any]:
         """システム設定の読み込み"""
-        config_file = os.path.join(self.data_dir, "system_config.json")
-        
-        # デフォルト設定
-        default_config = {
-            "start_hour": 9,
-            "end_hour": 16,
-            "lesson_duration": 50,
-            "break_duration": 10,
-            "school_name": "サンプル学校"
-        }
-        
-        if not os.path.exists(config_file):
-            # デフォルト設定ファイルを作成
-            with open(config_file, 'w', encoding='utf-8') as f:
-                json.dump(default_config, f, ensure_ascii=False, indent=2)
-            print("📝 デフォルトのシステム設定ファイルを作成しました")
-            return default_config
-        
-        try:
-            with open(config_file, 'r', encoding='utf-8') as f:
-                config = json.load(f)
-                print(f"📋 システム設定読み込み: {config}")
-                return config
-        except Exception as e:
-            print(f"⚠️ 設定ファイル読み込みエラー: {e}")
-            return default_config
+        return load_system_config(os.path.join(self.data_dir, "system_config.json"))
     
     def _load_student_groups(self) -> List[StudentGroup]:
         """学生グループの読み込み（デモ用：1クラスのみ）"""
@@ -203,134 +474,187 @@ class JSONDataRepository(DataRepository):
             )
         ]
     
+    def _load_rooms(self) -> List[Room]:
+        """教室データの読み込み（ファイルがなければ標準の2教室）"""
+        file_path = os.path.join(self.data_dir, "rooms.json")
+        if not os.path.exists(file_path):
+            return [
+                Room(id=1, name="教室A"),
+                Room(id=2, name="教室B"),
+            ]
+        
+        try:
+            with open(file_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+                return [Room(**item) for item in data]
+        except Exception as e:
+            print(f"教室データ読み込みエラー: {e}")
+            return []
+    
     def _save_subjects(self, subjects: List[Subject]):
         """科目データの保存"""
         file_path = os.path.join(self.data_dir, "subjects.json")
-        with open(file_path, 'w', encoding='utf-8') as f:
-            json.dump([s.to_dict() for s in subjects], f, ensure_ascii=False, indent=2)
+        atomic_write_json(file_path, [s.to_dict() for s in subjects])
+        self._written("subjects")
         print(f"📚 科目データ保存完了: {len(subjects)}件")
     
     def _save_teachers(self, teachers: List[Teacher]):
         """教師データの保存"""
         file_path = os.path.join(self.data_dir, "teachers.json")
-        with open(file_path, 'w', encoding='utf-8') as f:
-            json.dump([t.to_dict() for t in teachers], f, ensure_ascii=False, indent=2)
+        atomic_write_json(file_path, [t.to_dict() for t in teachers])
+        self._written("teachers")
         print(f"👨‍🏫 教師データ保存完了: {len(teachers)}件")
     
+    def _save_rooms(self, rooms: List[Room]):
+        """教室データの保存"""
+        file_path = os.path.join(self.data_dir, "rooms.json")
+        atomic_write_json(file_path, [r.to_dict() for r in rooms])
+        self._written("rooms")
+        print(f"🏫 教室データ保存完了: {len(rooms)}件")
+    
     def save_system_config(self, config: Dict[str, Any]) -> bool:
         """システム設定の保存"""
         try:
-            config_file = os.path.join(self.data_dir, "system_config.json")
-            with open(config_file, 'w', encoding='utf-8') as f:
-                json.dump(config, f, ensure_ascii=False, indent=2)
-            print(f"💾 システム設定保存完了: {config}")
-            # 設定変更後に時間枠を再生成
-            self._timeslots = self._load_timeslots()
+            with self._modifying():
+                atomic_write_json(self._paths["timeslots"], config)
+                print(f"💾 システム設定保存完了: {config}")
+                # 設定変更後に時間枠を再生成
+                self._reload("timeslots")
+                self._data_version += 1
             return True
         except Exception as e:
             print(f"❌ 設定保存エラー: {e}")
             return False
     
+    def update_system_config(self, update: Callable[[Dict[str, Any]], Dict[str, Any]]) -> Dict[str, Any]:
+        """システム設定の読み直し・更新・保存を書き込みロック中に行う"""
+        with self._modifying():
+            config = update(load_system_config(self._paths["timeslots"]))
+            atomic_write_json(self._paths["timeslots"], config)
+            print(f"💾 システム設定保存完了: {config}")
+            self._reload("timeslots")
+            self._data_version += 1
+        return config
+    
     # 抽象メソッドの実装
     def get_subjects(self) -> List[Subject]:
-        return self._subjects.copy()
+        with self._rwlock.read():
+            return self._subjects.copy()
     
     def get_teachers(self) -> List[Teacher]:
-        return self._teachers.copy()
+        with self._rwlock.read():
+            return self._teachers.copy()
     
     def get_timeslots(self) -> List[TimeSlot]:
-        return self._timeslots.copy()
+        with self._rwlock.read():
+            return self._timeslots.copy()
     
     def get_student_groups(self) -> List[StudentGroup]:
-        return self._student_groups.copy()
+        with self._rwlock.read():
+            return self._student_groups.copy()
+    
+    def get_rooms(self) -> List[Room]:
+        with self._rwlock.read():
+            return self._rooms.copy()
+    
+    @staticmethod
+    def _upsert(items: List[Any], item: Any):
+        """同じIDがあれば置き換え、なければ末尾に追加"""
+        for i, existing in enumerate(items):
+            if existing.id == item.id:
+                items[i] = item
+                return
+        items.append(item)
+    
+    @staticmethod
+    def _next_id(items: List[Any]) -> int:
+        return max((item.id for item in items), default=0) + 1
     
     def save_subject(self, subject: Subject) -> Subject:
-        # 既存の科目を更新または新規追加
-        found = False
-        for i, s in enumerate(self._subjects):
-            if s.id == subject.id:
-                self._subjects[i] = subject
-                found = True
-                break
-        
-        if not found:
-            self._subjects.append(subject)
-        
-        # ファイルに保存
-        self._save_subjects(self._subjects)
+        # 既存の科目を更新または新規追加してファイルに保存
+        with self._modifying():
+            self._upsert(self._subjects, subject)
+            self._save_subjects(self._subjects)
         print(f"✅ 科目保存: {subject.name} (ID: {subject.id})")
         return subject
     
     def save_teacher(self, teacher: Teacher) -> Teacher:
-        # 既存の教師を更新または新規追加
-        found = False
-        for i, t in enumerate(self._teachers):
-            if t.id == teacher.id:
-                self._teachers[i] = teacher
-                found = True
-                break
-        
-        if not found:
-            self._teachers.append(teacher)
-        
-        # ファイルに保存
-        self._save_teachers(self._teachers)
+        # 既存の教師を更新または新規追加してファイルに保存
+        with self._modifying():
+            self._upsert(self._teachers, teacher)
+            self._save_teachers(self._teachers)
         print(f"✅ 教師保存: {teacher.name} (ID: {teacher.id})")
         return teacher
     
+    def save_room(self, room: Room) -> Room:
+        # 既存の教室を更新または新規追加してファイルに保存
+        with self._modifying():
+            self._upsert(self._rooms, room)
+            self._save_rooms(self._rooms)
+        print(f"✅ 教室保存: {room.name} (ID: {room.id})")
+        return room
+    
+    def add_subject(self, subject: Subject) -> Subject:
+        """IDを採番して科目を追加（採番から保存までロックを保持するため、同時に追加してもIDが重ならない）"""
+        with self._modifying():
+            subject.id = self._next_id(self._subjects)
+            self._subjects.append(subject)
+            self._save_subjects(self._subjects)
+        print(f"✅ 科目追加: {subject.name} (ID: {subject.id})")
+        return subject
+    
+    def add_teacher(self, teacher: Teacher) -> Teacher:
+        """IDを採番して教師を追加（採番から保存までロックを保持するため、同時に追加してもIDが重ならない）"""
+        with self._modifying():
+            teacher.id = self._next_id(self._teachers)
+            self._teachers.append(teacher)
+            self._save_teachers(self._teachers)
+        print(f"✅ 教師追加: {teacher.name} (ID: {teacher.id})")
+        return teacher
+    
     def delete_subject(self, subject_id: int) -> bool:
         """科目を削除"""
-        original_count = len(self._subjects)
-        self._subjects = [s for s in self._subjects if s.id != subject_id]
-        
-        if len(self._subjects) < original_count:
+        with self._modifying():
+            remaining = [s for s in self._subjects if s.id != subject_id]
+            if len(remaining) == len(self._subjects):
+                return False
+            self._subjects = remaining
             self._save_subjects(self._subjects)
-            print(f"🗑️ 科目削除: ID {subject_id}")
-            return True
-        return False
+        print(f"🗑️ 科目削除: ID {subject_id}")
+        return True
     
     def delete_teacher(self, teacher_id: int) -> bool:
         """教師を削除"""
-        original_count = len(self._teachers)
-        self._teachers = [t for t in self._teachers if t.id != teacher_id]
-        
-        if len(self._teachers) < original_count:
+        with self._modifying():
+            remaining = [t for t in self._teachers if t.id != teacher_id]
+            if len(remaining) == len(self._teachers):
+                return False
+            self._teachers = remaining
             self._save_teachers(self._teachers)
-            print(f"🗑️ 教師削除: ID {teacher_id}")
-            return True
-        return False
-    
-    def generate_lessons(self) -> List[Lesson]:
-        """授業リストの生成（週時間数を考慮）"""
-        lessons = []
-        lesson_id = 1
-        
-        subjects = self.get_subjects()
-        teachers = self.get_teachers()
-        student_groups = self.get_student_groups()
-        
-        for student_group in student_groups:
-            for subject in subjects:
-                teacher = self._find_teacher_for_subject(teachers, subject.name)
-                if teacher:
-                    # 週時間数分だけ授業を生成
-                    weekly_hours = getattr(subject, 'weekly_hours', 1)
-                    for hour in range(weekly_hours):
-                        lesson = Lesson(
-                            id=lesson_id,
-                            subject=subject,
-                            teacher=teacher,
-                            student_group=student_group,
-                            lesson_type="regular"
-                        )
-                        lessons.append(lesson)
-                        lesson_id += 1
-        
-        return lessons
+        print(f"🗑️ 教師削除: ID {teacher_id}")
+        return True
     
-    def _find_teacher_for_subject(self, teachers: List[Teacher], subject_name: str) -> Optional[Teacher]:
-        """科目に対応する教師を検索"""
-        for teacher in teachers:
-            if subject_name in teacher.subjects:
-                return teacher
-        return None
\ No newline at end of file
+    def delete_room(self, room_id: int) -> bool:
+        """教室を削除"""
+        with self._modifying():
+            remaining = [r for r in self._rooms if r.id != room_id]
+            if len(remaining) == len(self._rooms):
+                return False
+            self._rooms = remaining
+            self._save_rooms(self._rooms)
+        print(f"🗑️ 教室削除: ID {room_id}")
+        return True
+
+# DATA_BACKEND=sqlite なら SQLite、それ以外は JSON ファイル
+DEFAULT_DATA_BACKEND = os.environ.get("DATA_BACKEND", "json")
+
+
+def create_data_repository(data_dir: str = "backend/data", backend: Optional[str] = None) -> DataRepository:
+    """設定（DATA_BACKEND・DATA_DB_PATH）に応じたデータリポジトリを生成"""
+    backend = (backend or DEFAULT_DATA_BACKEND).lower()
+    if backend == "sqlite":
+        from .sqlite_repository import open_sqlite_repository
+        return open_sqlite_repository(data_dir)
+    if backend != "json":
+        raise ValueError(f"不明なデータバックエンドです: {backend}")
+    return JSONDataRepository(data_dir)
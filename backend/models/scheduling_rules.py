@@ -0,0 +1,77 @@
+"""時間割の値域条件（曜日・コマの前後関係・教師の勤務条件・教室条件）
+
+Timefold のドメインクラスに依存しないため、JVM を起動せずに使える（NumPy エンジンなど）。
+引数は Timefold の Timeslot / Teacher / Room などと同じ属性を持つオブジェクトであればよい。
+"""
+from datetime import time
+from typing import List
+
+
+# 曜日名 -> 曜日番号
+# 曜日の一致判定（結合・集計のキー）は文字列のまま使う。Timefold の Python 整数は任意精度整数として
+# 扱われ、キーにすると文字列よりハッシュ・比較が遅いため、整数表現はコマの前後関係の計算に使う。
+DAY_INDEX = {
+    "MONDAY": 0, "TUESDAY": 1, "WEDNESDAY": 2, "THURSDAY": 3, "FRIDAY": 4, "SATURDAY": 5, "SUNDAY": 6,
+    "月曜日": 0, "火曜日": 1, "水曜日": 2, "木曜日": 3, "金曜日": 4, "土曜日": 5, "日曜日": 6,
+}
+
+# この分数以下の休み時間を挟む2コマは連続授業とみなす（昼休みを挟むコマは連続ではない）
+MAX_CONSECUTIVE_BREAK_MINUTES = 20
+
+
+def parse_time_range(value: str):
+    """"HH:MM-HH:MM" を (開始, 終了) の time に変換"""
+    start, end = value.split("-")
+    return time.fromisoformat(start.strip()), time.fromisoformat(end.strip())
+
+
+def teacher_allowed_timeslots(teacher, timeslots: List) -> List:
+    """教師の勤務曜日・勤務時間・不在時間から配置可能な時間帯を求める"""
+    available_hours = [parse_time_range(r) for r in teacher.available_hours]
+    unavailable_times = [parse_time_range(r) for r in teacher.unavailable_times]
+    
+    allowed = []
+    for timeslot in timeslots:
+        if teacher.available_days and timeslot.day_of_week not in teacher.available_days:
+            continue
+        if available_hours and not any(start <= timeslot.start_time and timeslot.end_time <= end
+                                       for start, end in available_hours):
+            continue
+        if any(timeslot.start_time < end and start < timeslot.end_time for start, end in unavailable_times):
+            continue
+        allowed.append(timeslot)
+    
+    if not allowed:
+        # 値域が空だと配置できないため、勤務条件を無視して全時間帯を許可する
+        print(f"⚠️ {teacher.name}の勤務可能な時間帯がありません。全時間帯を許可します")
+        return list(timeslots)
+    return allowed
+
+
+class EmptyValueRangeError(ValueError):
+    """時間帯・教室が1つもなく、授業を配置する先がない問題（API では 400 で返す）"""
+
+
+def require_value_ranges(timeslots: List, rooms: List) -> None:
+    """時間帯・教室が1つ以上あることを確認する（値域が空のままでは配置処理が失敗する）"""
+    if not timeslots:
+        raise EmptyValueRangeError("時間帯が登録されていません（時間帯の設定を確認してください）")
+    if not rooms:
+        raise EmptyValueRangeError("教室が登録されていません（教室を1つ以上追加してください）")
+
+
+def room_satisfies(room, subject, student_group) -> bool:
+    """教室がクラスの人数と科目の必要設備を満たすか"""
+    if room.capacity and student_group.student_count > room.capacity:
+        return False
+    return all(equipment in room.equipment for equipment in subject.required_equipment)
+
+
+def lesson_allowed_rooms(subject, student_group, rooms: List) -> List:
+    """人数・設備の条件を満たす教室を求める"""
+    allowed = [room for room in rooms if room_satisfies(room, subject, student_group)]
+    if not allowed:
+        # 値域が空だと配置できないため、条件を無視して全教室を許可する
+        print(f"⚠️ {student_group.name}の{subject.name}に使える教室がありません。全教室を許可します")
+        return list(rooms)
+    return allowed
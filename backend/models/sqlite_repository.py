@@ -0,0 +1,423 @@
+"""SQLiteベースのデータリポジトリ（WAL モード、1件単位の書き込み）
+
+科目・教師・教室・クラスを1行ずつのテーブルに持ち、保存・削除は対象の行だけを書き換える。
+教師の担当科目は teacher_subjects（科目名で索引）に分けて持つ。
+WAL モードのため、書き込み中も他のスレッド・ワーカープロセスの読み込みは待たされない。
+時間枠は JSONDataRepository と同じく system_config.json から生成する。
+"""
+import json
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from dataclasses import fields
+from typing import Callable, List, Optional, Dict, Any, Iterable
+
+from .data_models import Subject, Teacher, TimeSlot, StudentGroup, Room
+from .database import (
+    DataRepository, JSONDataRepository, build_timeslots, load_system_config,
+    atomic_write_json, interprocess_lock, LOCK_FILE_NAME, _file_stamp
+)
+
+DB_FILE_NAME = "timetable.db"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS subjects (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    code TEXT NOT NULL DEFAULT '',
+    description TEXT NOT NULL DEFAULT '',
+    required_equipment TEXT NOT NULL DEFAULT '[]',
+    difficulty_level TEXT NOT NULL DEFAULT 'medium',
+    category TEXT NOT NULL DEFAULT 'general',
+    weekly_hours INTEGER NOT NULL DEFAULT 1,
+    created_at TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS idx_subjects_name ON subjects (name);
+
+CREATE TABLE IF NOT EXISTS teachers (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    email TEXT NOT NULL DEFAULT '',
+    max_daily_lessons INTEGER NOT NULL DEFAULT 6,
+    max_weekly_hours INTEGER NOT NULL DEFAULT 30,
+    available_days TEXT NOT NULL DEFAULT '[]',
+    available_hours TEXT NOT NULL DEFAULT '[]',
+    preferred_times TEXT NOT NULL DEFAULT '[]',
+    unavailable_times TEXT NOT NULL DEFAULT '[]',
+    employment_type TEXT NOT NULL DEFAULT 'full_time',
+    created_at TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS idx_teachers_name ON teachers (name);
+
+-- 教師が担当できる科目（Teacher.subjects の科目名を並び順つきで保持）
+CREATE TABLE IF NOT EXISTS teacher_subjects (
+    teacher_id INTEGER NOT NULL REFERENCES teachers (id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    subject_name TEXT NOT NULL,
+    PRIMARY KEY (teacher_id, position)
+);
+CREATE INDEX IF NOT EXISTS idx_teacher_subjects_subject ON teacher_subjects (subject_name, teacher_id);
+
+CREATE TABLE IF NOT EXISTS rooms (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    capacity INTEGER NOT NULL DEFAULT 40,
+    equipment TEXT NOT NULL DEFAULT '[]',
+    room_type TEXT NOT NULL DEFAULT 'classroom',
+    created_at TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS idx_rooms_name ON rooms (name);
+
+CREATE TABLE IF NOT EXISTS student_groups (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    grade INTEGER NOT NULL,
+    class_letter TEXT NOT NULL DEFAULT 'A',
+    student_count INTEGER NOT NULL DEFAULT 30,
+    curriculum TEXT NOT NULL DEFAULT '[]',
+    special_needs TEXT NOT NULL DEFAULT '[]',
+    created_at TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS idx_student_groups_name ON student_groups (name);
+
+CREATE TABLE IF NOT EXISTS solutions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL DEFAULT '',
+    score TEXT,
+    solution TEXT NOT NULL,
+    created_at TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%S', 'now', 'localtime'))
+);
+CREATE INDEX IF NOT EXISTS idx_solutions_created_at ON solutions (created_at);
+"""
+
+
+class _Table:
+    """データクラス ⇔ 行の対応（リストの属性は JSON 配列の文字列で保存）"""
+
+    def __init__(self, name: str, cls, json_columns: Iterable[str], exclude: Iterable[str] = ()):
+        self.name = name
+        self.cls = cls
+        self.columns = [f.name for f in fields(cls) if f.name not in set(exclude)]
+        self.json_columns = set(json_columns)
+        updates = ", ".join(f"{c} = excluded.{c}" for c in self.columns if c != "id")
+        self.upsert_sql = (
+            f"INSERT INTO {name} ({', '.join(self.columns)}) VALUES ({', '.join('?' * len(self.columns))}) "
+            f"ON CONFLICT (id) DO UPDATE SET {updates}"
+        )
+        self.select_sql = f"SELECT {', '.join(self.columns)} FROM {name}"
+
+    def params(self, obj) -> List[Any]:
+        values = obj.to_dict()
+        return [json.dumps(values[c], ensure_ascii=False) if c in self.json_columns else values[c]
+                for c in self.columns]
+
+    def from_row(self, row: sqlite3.Row, **extra):
+        values = {c: json.loads(row[c]) if c in self.json_columns else row[c] for c in self.columns}
+        return self.cls(**values, **extra)
+
+
+_SUBJECTS = _Table("subjects", Subject, ["required_equipment"])
+_TEACHERS = _Table("teachers", Teacher,
+                   ["available_days", "available_hours", "preferred_times", "unavailable_times"],
+                   exclude=["subjects"])
+_ROOMS = _Table("rooms", Room, ["equipment"])
+_STUDENT_GROUPS = _Table("student_groups", StudentGroup, ["curriculum", "special_needs"])
+
+
+class SQLiteDataRepository(DataRepository):
+    """SQLiteベースのデータリポジトリ
+
+    接続はスレッドごとに1本持つ。書き込みは BEGIN IMMEDIATE のトランザクションで行い、
+    save_subjects などの一括保存も1トランザクションにまとめる。
+    """
+
+    def __init__(self, db_path: Optional[str] = None, data_dir: str = "backend/data"):
+        self.data_dir = data_dir
+        self.db_path = db_path or os.path.join(data_dir, DB_FILE_NAME)
+        os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+        os.makedirs(data_dir, exist_ok=True)
+        self._config_file = os.path.abspath(os.path.join(data_dir, "system_config.json"))
+        # system_config.json は JSONDataRepository・SystemConfig と同じロックファイルで排他する
+        self._lock_path = os.path.join(data_dir, LOCK_FILE_NAME)
+        self._config_lock = threading.Lock()
+        self._local = threading.local()
+        self._timeslots: List[TimeSlot] = []
+        self._timeslots_stamp = None
+        self._timeslots_lock = threading.Lock()
+        self._conn().executescript(_SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        """このスレッドの接続（初回のみ開いて WAL などを設定）"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30.0, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        """書き込みロックを先に取り、ブロック全体を1トランザクションにする"""
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def close(self):
+        """このスレッドの接続を閉じる"""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    # 読み込み
+    def _select(self, table: _Table, where: str = "", params: Iterable[Any] = ()) -> List[Any]:
+        rows = self._conn().execute(f"{table.select_sql} {where} ORDER BY id", tuple(params)).fetchall()
+        return [table.from_row(row) for row in rows]
+
+    def get_subjects(self) -> List[Subject]:
+        return self._select(_SUBJECTS)
+
+    def get_subject(self, subject_id: int) -> Optional[Subject]:
+        found = self._select(_SUBJECTS, "WHERE id = ?", (subject_id,))
+        return found[0] if found else None
+
+    def get_teachers(self) -> List[Teacher]:
+        return self._select_teachers()
+
+    def get_teacher(self, teacher_id: int) -> Optional[Teacher]:
+        found = self._select_teachers("WHERE id = ?", (teacher_id,))
+        return found[0] if found else None
+
+    def find_teachers_for_subject(self, subject_name: str) -> List[Teacher]:
+        """科目を担当できる教師（teacher_subjects の索引で検索）"""
+        return self._select_teachers(
+            "WHERE id IN (SELECT teacher_id FROM teacher_subjects WHERE subject_name = ?)", (subject_name,)
+        )
+
+    def _select_teachers(self, where: str = "", params: Iterable[Any] = ()) -> List[Teacher]:
+        conn = self._conn()
+        rows = conn.execute(f"{_TEACHERS.select_sql} {where} ORDER BY id", tuple(params)).fetchall()
+        if not rows:
+            return []
+        subjects: Dict[int, List[str]] = {row["id"]: [] for row in rows}
+        qualifications = conn.execute(
+            "SELECT teacher_id, subject_name FROM teacher_subjects "
+            f"WHERE teacher_id IN (SELECT id FROM teachers {where}) ORDER BY teacher_id, position",
+            tuple(params)
+        )
+        for teacher_id, subject_name in qualifications:
+            subjects[teacher_id].append(subject_name)
+        return [_TEACHERS.from_row(row, subjects=subjects[row["id"]]) for row in rows]
+
+    def get_rooms(self) -> List[Room]:
+        return self._select(_ROOMS)
+
+    def get_room(self, room_id: int) -> Optional[Room]:
+        found = self._select(_ROOMS, "WHERE id = ?", (room_id,))
+        return found[0] if found else None
+
+    def get_student_groups(self) -> List[StudentGroup]:
+        return self._select(_STUDENT_GROUPS)
+
+    def get_timeslots(self) -> List[TimeSlot]:
+        """時間枠（system_config.json が変わったときだけ再生成）"""
+        with self._timeslots_lock:
+            stamp = _file_stamp(self._config_file)
+            if stamp is None or stamp != self._timeslots_stamp:
+                self._timeslots = build_timeslots(load_system_config(self._config_file))
+                self._timeslots_stamp = _file_stamp(self._config_file)
+            return self._timeslots.copy()
+
+    # 書き込み（1件）
+    def save_subject(self, subject: Subject) -> Subject:
+        with self._transaction() as conn:
+            conn.execute(_SUBJECTS.upsert_sql, _SUBJECTS.params(subject))
+        print(f"✅ 科目保存: {subject.name} (ID: {subject.id})")
+        return subject
+
+    def save_teacher(self, teacher: Teacher) -> Teacher:
+        with self._transaction() as conn:
+            self._upsert_teacher(conn, teacher)
+        print(f"✅ 教師保存: {teacher.name} (ID: {teacher.id})")
+        return teacher
+
+    def save_room(self, room: Room) -> Room:
+        with self._transaction() as conn:
+            conn.execute(_ROOMS.upsert_sql, _ROOMS.params(room))
+        print(f"✅ 教室保存: {room.name} (ID: {room.id})")
+        return room
+
+    def save_student_group(self, student_group: StudentGroup) -> StudentGroup:
+        with self._transaction() as conn:
+            conn.execute(_STUDENT_GROUPS.upsert_sql, _STUDENT_GROUPS.params(student_group))
+        print(f"✅ クラス保存: {student_group.name} (ID: {student_group.id})")
+        return student_group
+
+    def add_subject(self, subject: Subject) -> Subject:
+        """IDを採番して科目を追加（採番と挿入を同じ書き込みトランザクションで行う）"""
+        with self._transaction() as conn:
+            subject.id = conn.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM subjects").fetchone()[0]
+            conn.execute(_SUBJECTS.upsert_sql, _SUBJECTS.params(subject))
+        print(f"✅ 科目追加: {subject.name} (ID: {subject.id})")
+        return subject
+
+    def add_teacher(self, teacher: Teacher) -> Teacher:
+        """IDを採番して教師を追加（採番と挿入を同じ書き込みトランザクションで行う）"""
+        with self._transaction() as conn:
+            teacher.id = conn.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM teachers").fetchone()[0]
+            self._upsert_teacher(conn, teacher)
+        print(f"✅ 教師追加: {teacher.name} (ID: {teacher.id})")
+        return teacher
+
+    def _upsert_teacher(self, conn: sqlite3.Connection, teacher: Teacher):
+        conn.execute(_TEACHERS.upsert_sql, _TEACHERS.params(teacher))
+        conn.execute("DELETE FROM teacher_subjects WHERE teacher_id = ?", (teacher.id,))
+        conn.executemany(
+            "INSERT INTO teacher_subjects (teacher_id, position, subject_name) VALUES (?, ?, ?)",
+            [(teacher.id, position, name) for position, name in enumerate(teacher.subjects)]
+        )
+
+    def delete_subject(self, subject_id: int) -> bool:
+        """科目を削除"""
+        return self._delete(_SUBJECTS, subject_id, "科目")
+
+    def delete_teacher(self, teacher_id: int) -> bool:
+        """教師を削除（担当科目は ON DELETE CASCADE で削除）"""
+        return self._delete(_TEACHERS, teacher_id, "教師")
+
+    def delete_room(self, room_id: int) -> bool:
+        """教室を削除"""
+        return self._delete(_ROOMS, room_id, "教室")
+
+    def _delete(self, table: _Table, item_id: int, label: str) -> bool:
+        with self._transaction() as conn:
+            deleted = conn.execute(f"DELETE FROM {table.name} WHERE id = ?", (item_id,)).rowcount == 1
+        if deleted:
+            print(f"🗑️ {label}削除: ID {item_id}")
+        return deleted
+
+    # 書き込み（一括、1トランザクション）
+    def save_subjects(self, subjects: List[Subject]) -> int:
+        with self._transaction() as conn:
+            conn.executemany(_SUBJECTS.upsert_sql, [_SUBJECTS.params(s) for s in subjects])
+        print(f"📚 科目データ保存完了: {len(subjects)}件")
+        return len(subjects)
+
+    def save_teachers(self, teachers: List[Teacher]) -> int:
+        with self._transaction() as conn:
+            for teacher in teachers:
+                self._upsert_teacher(conn, teacher)
+        print(f"👨‍🏫 教師データ保存完了: {len(teachers)}件")
+        return len(teachers)
+
+    def save_rooms(self, rooms: List[Room]) -> int:
+        with self._transaction() as conn:
+            conn.executemany(_ROOMS.upsert_sql, [_ROOMS.params(r) for r in rooms])
+        print(f"🏫 教室データ保存完了: {len(rooms)}件")
+        return len(rooms)
+
+    def save_student_groups(self, student_groups: List[StudentGroup]) -> int:
+        with self._transaction() as conn:
+            conn.executemany(_STUDENT_GROUPS.upsert_sql, [_STUDENT_GROUPS.params(sg) for sg in student_groups])
+        print(f"👥 クラスデータ保存完了: {len(student_groups)}件")
+        return len(student_groups)
+
+    def import_from(self, source: DataRepository, replace: bool = False) -> Dict[str, int]:
+        """別のリポジトリの全データを1トランザクションで取り込む（replace なら既存データを消してから）"""
+        subjects = source.get_subjects()
+        teachers = source.get_teachers()
+        rooms = source.get_rooms()
+        student_groups = source.get_student_groups()
+        with self._transaction() as conn:
+            if replace:
+                for table in ("teacher_subjects", "teachers", "subjects", "rooms", "student_groups"):
+                    conn.execute(f"DELETE FROM {table}")
+            conn.executemany(_SUBJECTS.upsert_sql, [_SUBJECTS.params(s) for s in subjects])
+            for teacher in teachers:
+                self._upsert_teacher(conn, teacher)
+            conn.executemany(_ROOMS.upsert_sql, [_ROOMS.params(r) for r in rooms])
+            conn.executemany(_STUDENT_GROUPS.upsert_sql, [_STUDENT_GROUPS.params(sg) for sg in student_groups])
+        counts = {"subjects": len(subjects), "teachers": len(teachers), "rooms": len(rooms),
+                  "student_groups": len(student_groups)}
+        print(f"📥 データ取り込み完了: {counts}")
+        return counts
+
+    def save_system_config(self, config: Dict[str, Any]) -> bool:
+        """システム設定の保存（時間枠は次の get_timeslots で再生成）"""
+        try:
+            with self._config_lock, interprocess_lock(self._lock_path):
+                atomic_write_json(self._config_file, config)
+            print(f"💾 システム設定保存完了: {config}")
+            return True
+        except Exception as e:
+            print(f"❌ 設定保存エラー: {e}")
+            return False
+
+    def update_system_config(self, update: Callable[[Dict[str, Any]], Dict[str, Any]]) -> Dict[str, Any]:
+        """システム設定の読み直し・更新・保存をロック中に行う（時間枠は次の get_timeslots で再生成）"""
+        with self._config_lock, interprocess_lock(self._lock_path):
+            config = update(load_system_config(self._config_file))
+            atomic_write_json(self._config_file, config)
+        print(f"💾 システム設定保存完了: {config}")
+        return config
+
+    # 最適化結果
+    def save_solution(self, solution: Dict[str, Any], name: str = "") -> int:
+        """時間割（/api/optimize 形式のJSON）を保存してIDを返す"""
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "INSERT INTO solutions (name, score, solution) VALUES (?, ?, ?)",
+                (name, solution.get("score"), json.dumps(solution, ensure_ascii=False, separators=(",", ":")))
+            )
+        return cursor.lastrowid
+
+    def get_solution(self, solution_id: int) -> Optional[Dict[str, Any]]:
+        """保存済みの時間割1件（本体を含む）"""
+        row = self._conn().execute("SELECT * FROM solutions WHERE id = ?", (solution_id,)).fetchone()
+        if row is None:
+            return None
+        entry = dict(row)
+        entry["solution"] = json.loads(entry["solution"])
+        return entry
+
+    def list_solutions(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """保存済みの時間割の一覧（新しい順、本体は含まない）"""
+        rows = self._conn().execute(
+            "SELECT id, name, score, created_at FROM solutions ORDER BY created_at DESC, id DESC LIMIT ?",
+            (limit,)
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def delete_solution(self, solution_id: int) -> bool:
+        with self._transaction() as conn:
+            return conn.execute("DELETE FROM solutions WHERE id = ?", (solution_id,)).rowcount == 1
+
+
+def import_json_data(data_dir: str = "backend/data", db_path: Optional[str] = None,
+                     replace: bool = False) -> Dict[str, int]:
+    """既存の JSON データ（subjects.json など）を SQLite に取り込む"""
+    repository = SQLiteDataRepository(db_path, data_dir)
+    try:
+        return repository.import_from(JSONDataRepository(data_dir), replace=replace)
+    finally:
+        repository.close()
+
+
+def open_sqlite_repository(data_dir: str = "backend/data") -> SQLiteDataRepository:
+    """DATA_DB_PATH（既定は data_dir/timetable.db）を開く。新規作成時は JSON データを取り込む"""
+    db_path = os.environ.get("DATA_DB_PATH") or os.path.join(data_dir, DB_FILE_NAME)
+    created = not os.path.exists(db_path)
+    repository = SQLiteDataRepository(db_path, data_dir)
+    if created:
+        print(f"🗄️ SQLite データベースを作成: {db_path}")
+        repository.import_from(JSONDataRepository(data_dir))
+    return repository
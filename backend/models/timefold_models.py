@@ -4,11 +4,15 @@ from typing import List, Optional, Annotated
 
 # 🎯 正しいTimefold API実装 - 公式ドキュメント準拠
 from timefold.solver.domain import (
-    planning_solution, planning_entity, PlanningVariable, PlanningId, ValueRangeProvider,
+    planning_solution, planning_entity, PlanningVariable, PlanningId, PlanningPin, ValueRangeProvider,
     ProblemFactCollectionProperty, PlanningEntityCollectionProperty, PlanningScore
 )
 from timefold.solver.score import (
-    HardSoftScore, constraint_provider, Joiners, ConstraintFactory, Constraint
+    HardSoftScore, constraint_provider, Joiners, ConstraintFactory, Constraint, ConstraintCollectors
+)
+
+from backend.models.scheduling_rules import (
+    DAY_INDEX, MAX_CONSECUTIVE_BREAK_MINUTES, teacher_allowed_timeslots, lesson_allowed_rooms
 )
 
 # ドメインクラス定義 - Problem Facts
@@ -18,6 +22,22 @@ class Timeslot:
     day_of_week: str
     start_time: time
     end_time: time
+    # 以下はコマの前後関係を計算するための整数表現（生成時に設定、period_index は TimeTable 生成時に設定）
+    day_index: int = field(default=0)
+    # その日の何コマ目か（0始まり、開始時刻順）
+    period_index: int = field(default=0)
+    # 週の始まりからの開始・終了時刻（分）
+    minute_of_week: int = field(default=0)
+    end_minute_of_week: int = field(default=0)
+    
+    def __post_init__(self):
+        day_index = DAY_INDEX.get(self.day_of_week.upper(), DAY_INDEX.get(self.day_of_week))
+        if day_index is None:
+            raise ValueError(f"不明な曜日です: {self.day_of_week}")
+        self.day_index = day_index
+        day_start = self.day_index * 24 * 60
+        self.minute_of_week = day_start + self.start_time.hour * 60 + self.start_time.minute
+        self.end_minute_of_week = day_start + self.end_time.hour * 60 + self.end_time.minute
     
     def __str__(self):
         return f"{self.day_of_week} {self.start_time.strftime('%H:%M')}-{self.end_time.strftime('%H:%M')}"
@@ -26,6 +46,10 @@ class Timeslot:
 class Room:
     id: int
     name: str
+    # 収容人数（0なら制限なし）
+    capacity: int = 0
+    # 設置されている設備
+    equipment: List[str] = field(default_factory=list)
     
     def __str__(self):
         return self.name
@@ -34,6 +58,8 @@ class Room:
 class Subject:
     id: int
     name: str
+    # 授業に必要な設備（教室の設備にすべて含まれている必要がある）
+    required_equipment: List[str] = field(default_factory=list)
     
     def __str__(self):
         return self.name
@@ -42,6 +68,14 @@ class Subject:
 class Teacher:
     id: int
     name: str
+    # 勤務可能な曜日（空なら全曜日）
+    available_days: List[str] = field(default_factory=list)
+    # 勤務可能な時間帯 "HH:MM-HH:MM"（空なら終日）
+    available_hours: List[str] = field(default_factory=list)
+    # 不在の時間帯 "HH:MM-HH:MM"
+    unavailable_times: List[str] = field(default_factory=list)
+    # 1日の担当授業数の上限（0なら上限なし）
+    max_daily_lessons: int = 0
     
     def __str__(self):
         return self.name
@@ -50,6 +84,8 @@ class Teacher:
 class StudentGroup:
     id: int
     name: str
+    # 生徒数（0なら教室の収容人数を問わない）
+    student_count: int = 0
     
     def __str__(self):
         return self.name
@@ -64,8 +100,20 @@ class Lesson:
     student_group: StudentGroup
     
     # 🚀 正しいPlanningVariable構文（公式ドキュメントより）
-    timeslot: Annotated[Timeslot | None, PlanningVariable] = field(default=None)
-    room: Annotated[Room | None, PlanningVariable] = field(default=None)
+    # 時間帯は教師の勤務可能枠だけを値域にする（勤務外への移動はそもそも生成されない）
+    timeslot: Annotated[Timeslot | None,
+                        PlanningVariable(value_range_provider_refs=["allowedTimeslots"])] = field(default=None)
+    # 教室はクラスの人数と科目の必要設備を満たす教室だけを値域にする
+    room: Annotated[Room | None,
+                    PlanningVariable(value_range_provider_refs=["allowedRooms"])] = field(default=None)
+    
+    # ウォームスタート時に変更のない授業を固定（ソルバーは移動しない）
+    pinned: Annotated[bool, PlanningPin] = field(default=False)
+    
+    # この授業を配置できる時間帯（TimeTable 生成時に教師の勤務条件から設定）
+    allowed_timeslots: Annotated[list[Timeslot], ValueRangeProvider(id="allowedTimeslots")] = field(default=None)
+    # この授業で使える教室（TimeTable 生成時に人数・設備から設定）
+    allowed_rooms: Annotated[list[Room], ValueRangeProvider(id="allowedRooms")] = field(default=None)
     
     def __str__(self):
         return f"{self.subject} - {self.teacher} - {self.student_group}"
@@ -78,6 +126,7 @@ def define_constraints(constraint_factory: ConstraintFactory):
         room_conflict(constraint_factory),
         teacher_conflict(constraint_factory),
         student_group_conflict(constraint_factory),
+        teacher_max_daily_lessons(constraint_factory),
         
         # Soft constraints (最適化条件) - 強化版
         subject_distribution_across_days(constraint_factory),  # 最優先・強化
@@ -92,8 +141,8 @@ def room_conflict(constraint_factory: ConstraintFactory) -> Constraint:
     """Hard: 同じ時間帯に同じ教室で複数の授業は不可"""
     return (constraint_factory
             .for_each_unique_pair(Lesson,
-                Joiners.equal(lambda lesson: lesson.timeslot),
-                Joiners.equal(lambda lesson: lesson.room))
+                Joiners.equal(lambda lesson: lesson.timeslot.id),
+                Joiners.equal(lambda lesson: lesson.room.id))
             .filter(lambda lesson1, lesson2: 
                 lesson1.timeslot is not None and lesson2.timeslot is not None and 
                 lesson1.room is not None and lesson2.room is not None)
@@ -104,8 +153,8 @@ def teacher_conflict(constraint_factory: ConstraintFactory) -> Constraint:
     """Hard: 同じ時間帯に同じ先生が複数の授業は不可"""
     return (constraint_factory
             .for_each_unique_pair(Lesson,
-                Joiners.equal(lambda lesson: lesson.timeslot),
-                Joiners.equal(lambda lesson: lesson.teacher))
+                Joiners.equal(lambda lesson: lesson.timeslot.id),
+                Joiners.equal(lambda lesson: lesson.teacher.id))
             .filter(lambda lesson1, lesson2: lesson1.timeslot is not None and lesson2.timeslot is not None)
             .penalize(HardSoftScore.ONE_HARD)
             .as_constraint("Teacher conflict"))
@@ -114,12 +163,26 @@ def student_group_conflict(constraint_factory: ConstraintFactory) -> Constraint:
     """Hard: 同じ時間帯に同じクラスが複数の授業は不可"""
     return (constraint_factory
             .for_each_unique_pair(Lesson,
-                Joiners.equal(lambda lesson: lesson.timeslot),
-                Joiners.equal(lambda lesson: lesson.student_group))
+                Joiners.equal(lambda lesson: lesson.timeslot.id),
+                Joiners.equal(lambda lesson: lesson.student_group.id))
             .filter(lambda lesson1, lesson2: lesson1.timeslot is not None and lesson2.timeslot is not None)
             .penalize(HardSoftScore.ONE_HARD)
             .as_constraint("Student group conflict"))
 
+def teacher_max_daily_lessons(constraint_factory: ConstraintFactory) -> Constraint:
+    """Hard: 教師の1日の担当授業数は上限まで（超過分だけペナルティ）"""
+    return (constraint_factory
+            .for_each(Lesson)
+            .filter(lambda lesson: lesson.teacher.max_daily_lessons > 0)
+            .group_by(lambda lesson: lesson.teacher.id,
+                      lambda lesson: lesson.timeslot.day_of_week,
+                      ConstraintCollectors.max(lambda lesson: lesson.teacher.max_daily_lessons),
+                      ConstraintCollectors.count())
+            .filter(lambda teacher_id, day, limit, count: count > limit)
+            .penalize(HardSoftScore.ONE_HARD,
+                      lambda teacher_id, day, limit, count: count - limit)
+            .as_constraint("Teacher max daily lessons"))
+
 def subject_distribution_across_days(constraint_factory: ConstraintFactory) -> Constraint:
     """Soft: 同じ科目の授業は異なる曜日に分散させる（強化版）"""
     return (constraint_factory
@@ -127,22 +190,21 @@ def subject_distribution_across_days(constraint_factory: ConstraintFactory) -> C
                 Joiners.equal(lambda lesson: lesson.subject.id),  # IDで比較に変更
                 Joiners.equal(lambda lesson: lesson.student_group.id))  # IDで比較に変更
             .filter(lambda lesson1, lesson2:
-                lesson1.timeslot is not None and lesson2.timeslot is not None and
-                lesson1.timeslot.day_of_week == lesson2.timeslot.day_of_week and
-                lesson1.id != lesson2.id)  # 同一授業除外
+                lesson1.timeslot.day_of_week == lesson2.timeslot.day_of_week)
             .penalize(HardSoftScore.of(0, 10))  # ペナルティを10倍に強化
             .as_constraint("Subject distribution across days"))
 
 def daily_lesson_limit(constraint_factory: ConstraintFactory) -> Constraint:
-    """Soft: 1日の授業数制限（新規追加）"""
+    """Soft: 1日の授業数制限（クラス×曜日で集計し、同日授業の組数だけペナルティ）"""
     return (constraint_factory
-            .for_each_unique_pair(Lesson)
-            .filter(lambda lesson1, lesson2:
-                lesson1.timeslot is not None and lesson2.timeslot is not None and
-                lesson1.student_group.id == lesson2.student_group.id and
-                lesson1.timeslot.day_of_week == lesson2.timeslot.day_of_week and
-                lesson1.id != lesson2.id)
-            .penalize(HardSoftScore.of(0, 5))  # 1日複数授業にペナルティ
+            .for_each(Lesson)
+            .filter(lambda lesson: lesson.timeslot is not None)
+            .group_by(lambda lesson: lesson.student_group.id,
+                      lambda lesson: lesson.timeslot.day_of_week,
+                      ConstraintCollectors.count())
+            .filter(lambda group_id, day, count: count > 1)
+            .penalize(HardSoftScore.of(0, 5),  # 1日複数授業にペナルティ（組数 = n(n-1)/2）
+                      lambda group_id, day, count: count * (count - 1) // 2)
             .as_constraint("Daily lesson limit"))
 
 def encourage_subject_spread(constraint_factory: ConstraintFactory) -> Constraint:
@@ -153,45 +215,58 @@ def encourage_subject_spread(constraint_factory: ConstraintFactory) -> Constrain
                 Joiners.equal(lambda lesson: lesson.student_group.id))
             .filter(lambda lesson1, lesson2:
                 lesson1.timeslot is not None and lesson2.timeslot is not None and
-                lesson1.timeslot.day_of_week != lesson2.timeslot.day_of_week and
-                lesson1.id != lesson2.id)
+                lesson1.timeslot.day_of_week != lesson2.timeslot.day_of_week)
             .reward(HardSoftScore.of(0, 8))  # 異なる日配置に大きな報酬
             .as_constraint("Encourage subject spread"))
 
 def avoid_consecutive_same_subject(constraint_factory: ConstraintFactory) -> Constraint:
-    """Soft: 同じ科目の連続授業を避ける（疲労軽減）"""
+    """Soft: 同じ科目の連続授業を避ける（疲労軽減）
+    
+    同じ日の隣り合うコマでも、昼休みなど長い休憩を挟む場合は連続とみなさない。
+    """
     return (constraint_factory
             .for_each_unique_pair(Lesson,
                 Joiners.equal(lambda lesson: lesson.subject.id),  # IDで比較に変更
                 Joiners.equal(lambda lesson: lesson.student_group.id))  # IDで比較に変更
+            # 科目×クラスで組は数件に絞られるため、曜日は結合キーにせず絞り込みで判定する方が速い
             .filter(lambda lesson1, lesson2:
-                lesson1.timeslot is not None and lesson2.timeslot is not None and
                 lesson1.timeslot.day_of_week == lesson2.timeslot.day_of_week and
-                abs(lesson1.timeslot.id - lesson2.timeslot.id) == 1 and  # 連続する時間帯
-                lesson1.id != lesson2.id)  # 同一授業除外
+                abs(lesson1.timeslot.period_index - lesson2.timeslot.period_index) == 1 and  # 隣り合うコマ
+                max(lesson1.timeslot.minute_of_week, lesson2.timeslot.minute_of_week) -
+                min(lesson1.timeslot.end_minute_of_week, lesson2.timeslot.end_minute_of_week)
+                <= MAX_CONSECUTIVE_BREAK_MINUTES)
             .penalize(HardSoftScore.of(0, 3))
             .as_constraint("Avoid consecutive same subject"))
 
 def teacher_room_stability(constraint_factory: ConstraintFactory) -> Constraint:
-    """Soft: 同じ先生はできるだけ同じ教室を使う（効率性向上）"""
+    """Soft: 同じ先生はできるだけ同じ教室を使う（効率性向上）
+    
+    異なる教室の授業の組数 = 全組数 n(n-1)/2 - 教室ごとの同室組数の合計
+    """
     return (constraint_factory
-            .for_each_unique_pair(Lesson,
-                Joiners.equal(lambda lesson: lesson.teacher))
-            .filter(lambda lesson1, lesson2: 
-                lesson1.room is not None and lesson2.room is not None and 
-                lesson1.room.id != lesson2.room.id)
-            .penalize(HardSoftScore.ONE_SOFT)
+            .for_each(Lesson)
+            .filter(lambda lesson: lesson.room is not None)
+            .group_by(lambda lesson: lesson.teacher.id,
+                      lambda lesson: lesson.room.id,
+                      ConstraintCollectors.count())
+            .group_by(lambda teacher_id, room_id, count: teacher_id,
+                      ConstraintCollectors.sum(lambda teacher_id, room_id, count: count),
+                      ConstraintCollectors.sum(lambda teacher_id, room_id, count: count * (count - 1) // 2))
+            .filter(lambda teacher_id, total, same_room_pairs:
+                total * (total - 1) // 2 > same_room_pairs)
+            .penalize(HardSoftScore.ONE_SOFT,
+                      lambda teacher_id, total, same_room_pairs:
+                          total * (total - 1) // 2 - same_room_pairs)
             .as_constraint("Teacher room stability"))
 
 def teacher_time_efficiency(constraint_factory: ConstraintFactory) -> Constraint:
     """Soft: 同じ先生の授業は連続する時間帯が理想的（移動効率）"""
     return (constraint_factory
             .for_each_unique_pair(Lesson,
-                Joiners.equal(lambda lesson: lesson.teacher))
+                Joiners.equal(lambda lesson: lesson.teacher.id),
+                Joiners.equal(lambda lesson: lesson.timeslot.day_of_week))
             .filter(lambda lesson1, lesson2:
-                lesson1.timeslot is not None and lesson2.timeslot is not None and
-                lesson1.timeslot.day_of_week == lesson2.timeslot.day_of_week and
-                abs(lesson1.timeslot.id - lesson2.timeslot.id) > 1)
+                abs(lesson1.timeslot.period_index - lesson2.timeslot.period_index) > 1)
             .penalize(HardSoftScore.ONE_SOFT)
             .as_constraint("Teacher time efficiency"))
 
@@ -199,7 +274,47 @@ def teacher_time_efficiency(constraint_factory: ConstraintFactory) -> Constraint
 @planning_solution
 @dataclass  
 class TimeTable:
-    timeslots: Annotated[List[Timeslot], ProblemFactCollectionProperty, ValueRangeProvider] = field(default_factory=list)
-    rooms: Annotated[List[Room], ProblemFactCollectionProperty, ValueRangeProvider] = field(default_factory=list)
+    timeslots: Annotated[List[Timeslot], ProblemFactCollectionProperty] = field(default_factory=list)
+    rooms: Annotated[List[Room], ProblemFactCollectionProperty] = field(default_factory=list)
     lessons: Annotated[List[Lesson], PlanningEntityCollectionProperty] = field(default_factory=list)
-    score: Annotated[HardSoftScore | None, PlanningScore] = field(default=None)
\ No newline at end of file
+    score: Annotated[HardSoftScore | None, PlanningScore] = field(default=None)
+    
+    def __post_init__(self):
+        assign_period_indexes(self.timeslots)
+        assign_allowed_timeslots(self.lessons, self.timeslots)
+        assign_allowed_rooms(self.lessons, self.rooms)
+
+
+def assign_period_indexes(timeslots: List[Timeslot]):
+    """曜日ごとに開始時刻順でコマ番号を振る（時間帯IDは週を通した連番のため昼休み・日の境目を区別できない）"""
+    by_day = {}
+    for timeslot in timeslots:
+        by_day.setdefault(timeslot.day_index, []).append(timeslot)
+    for day_timeslots in by_day.values():
+        for period_index, timeslot in enumerate(sorted(day_timeslots, key=lambda ts: ts.minute_of_week)):
+            timeslot.period_index = period_index
+
+
+def assign_allowed_timeslots(lessons: List[Lesson], timeslots: List[Timeslot]):
+    """値域未設定の授業に教師ごとの配置可能時間帯を設定（同じ教師の授業でリストを共有）"""
+    allowed_by_teacher = {}
+    for lesson in lessons:
+        if lesson.allowed_timeslots is None:
+            allowed = allowed_by_teacher.get(lesson.teacher.id)
+            if allowed is None:
+                allowed = teacher_allowed_timeslots(lesson.teacher, timeslots)
+                allowed_by_teacher[lesson.teacher.id] = allowed
+            lesson.allowed_timeslots = allowed
+
+
+def assign_allowed_rooms(lessons: List[Lesson], rooms: List[Room]):
+    """値域未設定の授業に使用可能な教室を設定（人数と必要設備が同じ授業でリストを共有）"""
+    allowed_by_requirement = {}
+    for lesson in lessons:
+        if lesson.allowed_rooms is None:
+            key = (lesson.student_group.student_count, tuple(sorted(lesson.subject.required_equipment)))
+            allowed = allowed_by_requirement.get(key)
+            if allowed is None:
+                allowed = lesson_allowed_rooms(lesson.subject, lesson.student_group, rooms)
+                allowed_by_requirement[key] = allowed
+            lesson.allowed_rooms = allowed
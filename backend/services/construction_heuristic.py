@@ -0,0 +1,183 @@
+"""クイックプレビュー用の First Fit Decreasing 構築（Python 側で索引を使って配置）
+
+授業・時間帯・教室は属性だけを使うため、Timefold の TimeTable でも quick_preview の
+軽量オブジェクトでも動く（このモジュールは JVM なしで import できる）。
+"""
+from collections import Counter
+from typing import Dict, Any, List, Optional, Tuple, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from backend.models.timefold_models import TimeTable, Lesson, Room, Timeslot
+
+
+def lesson_difficulty_order(timetable: "TimeTable") -> List["Lesson"]:
+    """配置先の少ない授業から並べる（First Fit Decreasing の「Decreasing」）
+
+    担当授業数に対して勤務可能枠が少ない教員の授業 → 時間帯の候補が少ない授業
+    → 教室の候補が少ない授業の順。
+    """
+    teacher_lessons: Dict[int, int] = {}
+    teacher_slots: Dict[int, int] = {}
+    for lesson in timetable.lessons:
+        teacher_lessons[lesson.teacher.id] = teacher_lessons.get(lesson.teacher.id, 0) + 1
+        teacher_slots[lesson.teacher.id] = len(lesson.allowed_timeslots)
+
+    def difficulty(lesson: "Lesson"):
+        pressure = teacher_lessons[lesson.teacher.id] / max(teacher_slots[lesson.teacher.id], 1)
+        return (-pressure, len(lesson.allowed_timeslots), len(lesson.allowed_rooms), lesson.id)
+
+    return sorted(timetable.lessons, key=difficulty)
+
+
+class _Occupancy:
+    """教員・クラス・教室ごとの使用中の時間帯（候補判定を O(1) にするための索引）"""
+
+    def __init__(self):
+        # キーは (教員・クラス・教室の ID, 時間帯 ID) と (ID, 曜日名)
+        self.teacher_at: Dict[Tuple[int, int], "Lesson"] = {}
+        self.group_at: Dict[Tuple[int, int], "Lesson"] = {}
+        self.room_at: Dict[Tuple[int, int], "Lesson"] = {}
+        self.teacher_day_count: Dict[Tuple[int, str], int] = {}
+        self.group_day_count: Dict[Tuple[int, str], int] = {}
+        self.group_subject_day_count: Dict[Tuple[int, int, str], int] = {}
+        # 大教室や特別教室を温存するため、条件を満たす教室のうち小さい順に試す
+        self._rooms_by_size: Dict[int, List["Room"]] = {}
+
+    def _counters(self, lesson: "Lesson", day: str):
+        return ((self.teacher_day_count, (lesson.teacher.id, day)),
+                (self.group_day_count, (lesson.student_group.id, day)),
+                (self.group_subject_day_count, (lesson.student_group.id, lesson.subject.id, day)))
+
+    def place(self, lesson: "Lesson", timeslot: "Timeslot", room: "Room"):
+        lesson.timeslot = timeslot
+        lesson.room = room
+        self.teacher_at[(lesson.teacher.id, timeslot.id)] = lesson
+        self.group_at[(lesson.student_group.id, timeslot.id)] = lesson
+        self.room_at[(room.id, timeslot.id)] = lesson
+        for counter, key in self._counters(lesson, timeslot.day_of_week):
+            counter[key] = counter.get(key, 0) + 1
+
+    def remove(self, lesson: "Lesson"):
+        timeslot = lesson.timeslot
+        del self.teacher_at[(lesson.teacher.id, timeslot.id)]
+        del self.group_at[(lesson.student_group.id, timeslot.id)]
+        del self.room_at[(lesson.room.id, timeslot.id)]
+        for counter, key in self._counters(lesson, timeslot.day_of_week):
+            counter[key] -= 1
+        lesson.timeslot = None
+        lesson.room = None
+
+    def teacher_free(self, lesson: "Lesson", timeslot: "Timeslot") -> bool:
+        if (lesson.teacher.id, timeslot.id) in self.teacher_at:
+            return False
+        limit = lesson.teacher.max_daily_lessons
+        return limit <= 0 or self.teacher_day_count.get((lesson.teacher.id, timeslot.day_of_week), 0) < limit
+
+    def free_room(self, lesson: "Lesson", timeslot: "Timeslot") -> Optional["Room"]:
+        rooms = self._rooms_by_size.get(id(lesson.allowed_rooms))
+        if rooms is None:
+            rooms = sorted(lesson.allowed_rooms, key=lambda r: (r.capacity, len(r.equipment), r.id))
+            self._rooms_by_size[id(lesson.allowed_rooms)] = rooms
+        return next((r for r in rooms if (r.id, timeslot.id) not in self.room_at), None)
+
+    def candidates(self, lesson: "Lesson") -> List["Timeslot"]:
+        """同じ科目・授業の少ない曜日から試す（ソフト制約の悪い初期解になりにくい）"""
+        group_id = lesson.student_group.id
+        return sorted(
+            lesson.allowed_timeslots,
+            key=lambda ts: (self.group_subject_day_count.get((group_id, lesson.subject.id, ts.day_of_week), 0),
+                            self.group_day_count.get((group_id, ts.day_of_week), 0),
+                            ts.minute_of_week)
+        )
+
+    def first_fit(self, lesson: "Lesson") -> bool:
+        """ハード制約を破らない最初の時間帯×教室へ配置"""
+        for timeslot in self.candidates(lesson):
+            if (lesson.student_group.id, timeslot.id) in self.group_at or not self.teacher_free(lesson, timeslot):
+                continue
+            room = self.free_room(lesson, timeslot)
+            if room is not None:
+                self.place(lesson, timeslot, room)
+                return True
+        return False
+
+    def eject_and_place(self, lesson: "Lesson", depth: int = 3, moved: Optional[set] = None) -> bool:
+        """同じクラス・同じ教員の授業を別の時間帯へ押し出して空けた枠に配置（深さ制限付きの増加路）"""
+        if depth == 0:
+            return self.first_fit(lesson)
+        moved = moved if moved is not None else {lesson.id}
+        for timeslot in self.candidates(lesson):
+            blockers = {b.id: b for b in (self.group_at.get((lesson.student_group.id, timeslot.id)),
+                                          self.teacher_at.get((lesson.teacher.id, timeslot.id))) if b is not None}
+            if len(blockers) > 1:
+                continue
+            blocker = next(iter(blockers.values()), None)
+            if blocker is not None:
+                if blocker.pinned or blocker.id in moved:
+                    continue
+                original = (blocker.timeslot, blocker.room)
+                self.remove(blocker)
+            room = self.free_room(lesson, timeslot) if self.teacher_free(lesson, timeslot) else None
+            if room is not None:
+                self.place(lesson, timeslot, room)
+                if blocker is None or self.eject_and_place(blocker, depth - 1, moved | {blocker.id}):
+                    return True
+                self.remove(lesson)
+            if blocker is not None:
+                self.place(blocker, *original)
+        return False
+
+    def place_least_conflicting(self, lesson: "Lesson"):
+        """どこに置いても違反する授業を、違反の最も少ない時間帯×教室へ置く（押し出しの後に使う）"""
+        best = None
+        for timeslot in self.candidates(lesson):
+            room = self.free_room(lesson, timeslot)
+            conflicts = (((lesson.student_group.id, timeslot.id) in self.group_at)
+                         + (not self.teacher_free(lesson, timeslot)) + (room is None))
+            if best is None or conflicts < best[0]:
+                best = (conflicts, timeslot, room or self._rooms_by_size[id(lesson.allowed_rooms)][0])
+        self.place(lesson, best[1], best[2])
+
+
+def first_fit_decreasing(timetable: "TimeTable") -> Dict[str, Any]:
+    """未配置の授業を、難しい順にハード制約を破らない最初の時間帯×教室へ配置する
+
+    ソルバーの構築ヒューリスティックは候補ごとにスコアを再計算するため、1000授業規模では
+    数十秒かかる。ここでは使用中の枠を辞書で持ち、候補判定を O(1) にする。
+    押し出しでも置けない授業は、違反の最も少ない候補へ置く。
+    """
+    occupancy = _Occupancy()
+    # 固定・ウォームスタート済みの授業は先に占有しておく
+    for lesson in timetable.lessons:
+        if lesson.timeslot is not None and lesson.room is not None:
+            occupancy.place(lesson, lesson.timeslot, lesson.room)
+
+    pending = [lesson for lesson in lesson_difficulty_order(timetable)
+               if not lesson.pinned and (lesson.timeslot is None or lesson.room is None)]
+    leftovers = [lesson for lesson in pending if not occupancy.first_fit(lesson)]
+    unplaced = [lesson for lesson in leftovers if not occupancy.eject_and_place(lesson)]
+    for lesson in unplaced:
+        occupancy.place_least_conflicting(lesson)
+
+    stats = {
+        "placed": len(pending) - len(unplaced),
+        "repaired": len(leftovers) - len(unplaced),
+        "conflicting": len(unplaced)
+    }
+    print(f"⚡ First Fit Decreasing: {stats}")
+    return stats
+
+
+def count_hard_violations(lessons: List["Lesson"]) -> int:
+    """ハード制約の違反量（define_constraints のハード制約と同じ数え方）を O(n) で数える"""
+    assigned = [l for l in lessons if l.timeslot is not None and l.room is not None]
+    violations = 0
+    for key in (lambda l: (l.timeslot.id, l.room.id),
+                lambda l: (l.timeslot.id, l.teacher.id),
+                lambda l: (l.timeslot.id, l.student_group.id)):
+        # 同じ枠に k 授業 → 組の数 k(k-1)/2 が違反
+        violations += sum(k * (k - 1) // 2 for k in Counter(map(key, assigned)).values())
+    daily = Counter((l.teacher.id, l.timeslot.day_of_week) for l in assigned if l.teacher.max_daily_lessons > 0)
+    limits = {l.teacher.id: l.teacher.max_daily_lessons for l in assigned}
+    violations += sum(max(count - limits[teacher_id], 0) for (teacher_id, _), count in daily.items())
+    return violations
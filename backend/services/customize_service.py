@@ -1,14 +1,14 @@
 """カスタマイズサービス"""
 from typing import Dict, List, Any, Optional
 from ..models.config import SystemConfig
-from ..models.database import JSONDataRepository
+from ..models.database import create_data_repository
 from ..models.data_models import Subject, Teacher, TimeSlot
 
 class CustomizeService:
     """カスタマイズ機能のサービスクラス"""
     
     def __init__(self, data_dir: str = "backend/data"):
-        self.data_repo = JSONDataRepository(data_dir)
+        self.data_repo = create_data_repository(data_dir)
         self.config_file = f"{data_dir}/system_config.json"
         self.config = SystemConfig.load(self.config_file)
     
@@ -19,13 +19,17 @@ class CustomizeService:
     def update_config(self, config_data: Dict[str, Any]) -> Dict[str, str]:
         """設定を更新"""
         try:
-            # 既存設定を更新
-            for key, value in config_data.items():
-                if hasattr(self.config, key):
-                    setattr(self.config, key, value)
+            changes = {key: value for key, value in config_data.items() if hasattr(self.config, key)}
             
-            # 設定を保存
-            self.config.save(self.config_file)
+            def apply_changes(saved: Dict[str, Any]) -> Dict[str, Any]:
+                # 保存済みの設定（他のワーカーの更新を含む）に今回の変更だけを重ねる
+                config = SystemConfig.from_dict({**SystemConfig().to_dict(), **saved})
+                for key, value in changes.items():
+                    setattr(config, key, value)
+                return config.to_dict()
+            
+            # 読み込みから保存までリポジトリの書き込みロック中に行う
+            self.config = SystemConfig.from_dict(self.data_repo.update_system_config(apply_changes))
             
             # 時間枠を再生成
             self._regenerate_timeslots()
@@ -55,17 +59,10 @@ class CustomizeService:
     def add_custom_subject(self, subject_data: Dict[str, Any]) -> Dict[str, Any]:
         """カスタム科目の追加"""
         try:
-            # データリポジトリを再読み込みして最新の状態を取得
-            self.data_repo.load_all_data()
-            
-            # IDの自動採番
-            existing_subjects = self.data_repo.get_subjects()
-            new_id = max([s.id for s in existing_subjects], default=0) + 1
-            
-            subject_data['id'] = new_id
-            subject = Subject(**subject_data)
+            # IDはリポジトリが書き込みロック中に採番する（同時追加でも重ならない）
+            subject = Subject(**{**subject_data, 'id': 0})
             
-            saved_subject = self.data_repo.save_subject(subject)
+            saved_subject = self.data_repo.add_subject(subject)
             
             return {
                 "status": "success",
@@ -80,17 +77,10 @@ class CustomizeService:
     def add_custom_teacher(self, teacher_data: Dict[str, Any]) -> Dict[str, Any]:
         """カスタム教師の追加"""
         try:
-            # データリポジトリを再読み込みして最新の状態を取得
-            self.data_repo.load_all_data()
-            
-            # IDの自動採番
-            existing_teachers = self.data_repo.get_teachers()
-            new_id = max([t.id for t in existing_teachers], default=0) + 1
-            
-            teacher_data['id'] = new_id
-            teacher = Teacher(**teacher_data)
+            # IDはリポジトリが書き込みロック中に採番する（同時追加でも重ならない）
+            teacher = Teacher(**{**teacher_data, 'id': 0})
             
-            saved_teacher = self.data_repo.save_teacher(teacher)
+            saved_teacher = self.data_repo.add_teacher(teacher)
             
             return {
                 "status": "success",
@@ -145,8 +135,8 @@ class CustomizeService:
     
     def get_customization_stats(self) -> Dict[str, Any]:
         """カスタマイズ統計情報"""
-        # 最新データを読み込み
-        self.data_repo.load_all_data()
+        # 変更されたファイルだけ再読み込み
+        self.data_repo.refresh()
         
         subjects = self.data_repo.get_subjects()
         teachers = self.data_repo.get_teachers()
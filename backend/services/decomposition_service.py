@@ -0,0 +1,260 @@
+"""クラス・教師のつながりで問題を分割し、プロセスプールで並列ソルブする分割最適化サービス"""
+import math
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Any, List, Optional, Tuple
+
+from backend.models.timefold_models import TimeTable, Lesson, Room
+from backend.services.optimization_service import OptimizationService
+
+
+def _init_worker():
+    """ワーカープロセス起動時に JVM を立ち上げ、ソルバーをウォームアップ"""
+    from backend.services.solver_registry import get_solver_registry
+    get_solver_registry().warm_up()
+
+
+def _solve_partition(partition: TimeTable, max_seconds: Optional[float]) -> Dict[str, Any]:
+    """ワーカープロセスで1パーティションを解き、割り当て結果だけを返す"""
+    start = time.perf_counter()
+    # 使用可能教室をこのパーティションの教室に絞る（該当がなければ共有の教室をそのまま使い、修復ソルブで解消）
+    room_ids = {r.id for r in partition.rooms}
+    for lesson in partition.lessons:
+        lesson.allowed_rooms = [r for r in lesson.allowed_rooms if r.id in room_ids] or lesson.allowed_rooms
+    solution = OptimizationService().optimize_timetable(partition, max_seconds=max_seconds)
+    return {
+        "assignments": [
+            (l.id, l.timeslot.id if l.timeslot else None, l.room.id if l.room else None)
+            for l in solution.lessons
+        ],
+        "score": str(solution.score),
+        "seconds": round(time.perf_counter() - start, 3)
+    }
+
+
+class _UnionFind:
+    def __init__(self):
+        self.parent: Dict[Any, Any] = {}
+
+    def find(self, node):
+        self.parent.setdefault(node, node)
+        while self.parent[node] != node:
+            self.parent[node] = self.parent[self.parent[node]]
+            node = self.parent[node]
+        return node
+
+    def union(self, a, b):
+        root_a, root_b = self.find(a), self.find(b)
+        if root_a != root_b:
+            self.parent[root_b] = root_a
+
+
+class DecompositionService:
+    """教師–クラス相互作用グラフでパーティション分割し、マージ後に全体修復ソルブを行う
+
+    クラス単位で分割するため、クラスの衝突はパーティション内で解消される。
+    複数パーティションにまたがる教師の衝突と教室の不足分は、最後の修復ソルブで解消する。
+    """
+
+    def __init__(self, optimization_service: Optional[OptimizationService] = None,
+                 max_workers: Optional[int] = None):
+        # 省略時は optimize の呼び出しごとに渡されたサービス（なければその場で生成）を使う
+        self.optimization_service = optimization_service
+        self.max_workers = max_workers or max(1, os.cpu_count() or 1)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+
+    def partition(self, timetable: TimeTable, partition_count: int) -> List[List[Lesson]]:
+        """授業をクラス単位でパーティションに分ける
+
+        教師を共有しないクラス群（連結成分）はまとめて配置し、
+        大きすぎる連結成分は共有教師の授業数が多いパーティションへクラスごとに寄せる。
+        """
+        lessons_by_group: Dict[int, List[Lesson]] = {}
+        teacher_lessons: Dict[int, Dict[int, int]] = {}
+        union_find = _UnionFind()
+        for lesson in timetable.lessons:
+            group_id = lesson.student_group.id
+            lessons_by_group.setdefault(group_id, []).append(lesson)
+            counts = teacher_lessons.setdefault(group_id, {})
+            counts[lesson.teacher.id] = counts.get(lesson.teacher.id, 0) + 1
+            union_find.union(("group", group_id), ("teacher", lesson.teacher.id))
+
+        components: Dict[Any, List[int]] = {}
+        for group_id in lessons_by_group:
+            components.setdefault(union_find.find(("group", group_id)), []).append(group_id)
+
+        partition_count = max(1, min(partition_count, len(lessons_by_group)))
+        capacity = math.ceil(len(timetable.lessons) / partition_count * 1.1)
+        partitions: List[List[int]] = [[] for _ in range(partition_count)]
+        loads = [0] * partition_count
+        teacher_loads: List[Dict[int, int]] = [{} for _ in range(partition_count)]
+
+        def place(group_id: int, index: int):
+            partitions[index].append(group_id)
+            loads[index] += len(lessons_by_group[group_id])
+            for teacher_id, count in teacher_lessons[group_id].items():
+                teacher_loads[index][teacher_id] = teacher_loads[index].get(teacher_id, 0) + count
+
+        def component_size(groups: List[int]) -> int:
+            return sum(len(lessons_by_group[g]) for g in groups)
+
+        for groups in sorted(components.values(), key=component_size, reverse=True):
+            size = component_size(groups)
+            lightest = min(range(partition_count), key=lambda i: loads[i])
+            if loads[lightest] + size <= capacity:
+                for group_id in groups:
+                    place(group_id, lightest)
+                continue
+
+            # 連結成分を分割: 共有教師の授業数が最大で、容量に余裕のあるパーティションへ
+            for group_id in sorted(groups, key=lambda g: len(lessons_by_group[g]), reverse=True):
+                group_size = len(lessons_by_group[group_id])
+
+                def affinity(index: int) -> Tuple[bool, int, int]:
+                    shared = sum(min(count, teacher_loads[index].get(teacher_id, 0))
+                                 for teacher_id, count in teacher_lessons[group_id].items())
+                    return (loads[index] + group_size <= capacity, shared, -loads[index])
+
+                place(group_id, max(range(partition_count), key=affinity))
+
+        return [
+            [lesson for group_id in groups for lesson in lessons_by_group[group_id]]
+            for groups in partitions if groups
+        ]
+
+    def split_rooms(self, timetable: TimeTable, partitions: List[List[Lesson]]) -> List[List[Room]]:
+        """教室を授業数に比例して各パーティションへ割り振る（不足時は全教室を共有）"""
+        slot_count = max(len(timetable.timeslots), 1)
+        required = [math.ceil(len(lessons) / slot_count) for lessons in partitions]
+        if sum(required) > len(timetable.rooms):
+            return [list(timetable.rooms) for _ in partitions]
+
+        total_lessons = sum(len(lessons) for lessons in partitions)
+        room_splits = []
+        start = 0
+        for index, lessons in enumerate(partitions):
+            if index == len(partitions) - 1:
+                count = len(timetable.rooms) - start
+            else:
+                remaining_required = sum(required[index + 1:])
+                share = round(len(timetable.rooms) * len(lessons) / total_lessons)
+                count = min(max(share, required[index]), len(timetable.rooms) - start - remaining_required)
+            room_splits.append(list(timetable.rooms[start:start + count]))
+            start += count
+        return room_splits
+
+    def optimize(self, timetable: TimeTable, max_seconds: Optional[float] = None,
+                 repair_seconds: Optional[float] = None,
+                 partition_count: Optional[int] = None,
+                 optimization_service: Optional[OptimizationService] = None,
+                 move_thread_count: Optional[str] = None) -> Tuple[TimeTable, Dict[str, Any]]:
+        """分割→並列ソルブ→マージ→全体修復ソルブ
+
+        optimization_service を渡すと全体ソルブ・修復ソルブはそのサービス（リクエスト時点の
+        データ・システム設定）で行う。
+        """
+        optimization_service = optimization_service or self.optimization_service or OptimizationService()
+        start = time.perf_counter()
+        partitions = self.partition(timetable, partition_count or self.max_workers)
+        if len(partitions) <= 1:
+            print("🧩 分割対象なし: 通常の最適化を実行")
+            solution = optimization_service.optimize_timetable(
+                timetable, max_seconds=max_seconds, move_thread_count=move_thread_count)
+            return solution, {"partitions": [], "decomposed": False,
+                              "total_seconds": round(time.perf_counter() - start, 3)}
+
+        room_splits = self.split_rooms(timetable, partitions)
+        problems = [
+            TimeTable(timeslots=timetable.timeslots, rooms=rooms, lessons=lessons)
+            for lessons, rooms in zip(partitions, room_splits)
+        ]
+        print(f"🧩 問題分割: {len(problems)}パーティション "
+              f"({', '.join(str(len(p.lessons)) for p in problems)}授業)")
+
+        parallel_start = time.perf_counter()
+        executor = self._get_executor()
+        futures = [executor.submit(_solve_partition, problem, max_seconds) for problem in problems]
+        results = [future.result() for future in futures]
+        parallel_seconds = time.perf_counter() - parallel_start
+
+        self._merge(timetable, results)
+
+        repair_start = time.perf_counter()
+        solution = optimization_service.optimize_timetable(
+            timetable, warm_start=True, max_seconds=repair_seconds, move_thread_count=move_thread_count)
+        repair_seconds_spent = time.perf_counter() - repair_start
+
+        stats = {
+            "decomposed": True,
+            "partitions": [
+                {
+                    "lessons": len(problem.lessons),
+                    "student_groups": len({l.student_group.id for l in problem.lessons}),
+                    "teachers": len({l.teacher.id for l in problem.lessons}),
+                    "rooms": len(problem.rooms),
+                    "score": result["score"],
+                    "seconds": result["seconds"]
+                } for problem, result in zip(problems, results)
+            ],
+            "shared_teachers": self._count_shared_teachers(partitions),
+            "parallel_seconds": round(parallel_seconds, 3),
+            "repair_seconds": round(repair_seconds_spent, 3),
+            "total_seconds": round(time.perf_counter() - start, 3)
+        }
+        print(f"🧩 分割最適化完了: Score {solution.score} ({stats['total_seconds']}秒)")
+        return solution, stats
+
+    def shutdown(self):
+        """ワーカープロセスを停止"""
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._executor = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        """JVM を持つワーカーを使い回すため、プールはリクエストをまたいで保持する"""
+        with self._executor_lock:
+            if self._executor is None:
+                # fork では親プロセスの JVM を引き継げないため spawn で起動
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker
+                )
+            return self._executor
+
+    def _merge(self, timetable: TimeTable, results: List[Dict[str, Any]]):
+        """各パーティションの割り当てを元の TimeTable に反映（修復ソルブの初期解になる）"""
+        timeslots_by_id = {ts.id: ts for ts in timetable.timeslots}
+        rooms_by_id = {r.id: r for r in timetable.rooms}
+        lessons_by_id = {l.id: l for l in timetable.lessons}
+        for result in results:
+            for lesson_id, timeslot_id, room_id in result["assignments"]:
+                lesson = lessons_by_id[lesson_id]
+                lesson.timeslot = timeslots_by_id.get(timeslot_id)
+                lesson.room = rooms_by_id.get(room_id)
+
+    def _count_shared_teachers(self, partitions: List[List[Lesson]]) -> int:
+        partition_counts: Dict[int, int] = {}
+        for lessons in partitions:
+            for teacher_id in {l.teacher.id for l in lessons}:
+                partition_counts[teacher_id] = partition_counts.get(teacher_id, 0) + 1
+        return sum(1 for count in partition_counts.values() if count > 1)
+
+
+_decomposition_service: Optional[DecompositionService] = None
+_decomposition_lock = threading.Lock()
+
+
+def get_decomposition_service() -> DecompositionService:
+    """分割最適化サービスのシングルトン取得（ワーカープロセスを共有）"""
+    global _decomposition_service
+    if _decomposition_service is None:
+        with _decomposition_lock:
+            if _decomposition_service is None:
+                _decomposition_service = DecompositionService()
+    return _decomposition_service
@@ -0,0 +1,67 @@
+"""データリポジトリからデモ問題（/api/optimize 形式の未割り当てJSON）を生成
+
+Timefold のドメインクラスを使わないため、JVM なしの NumPy エンジンからも利用できる。
+"""
+from typing import Dict, Any
+
+from backend.models.database import DataRepository
+
+
+def build_demo_problem(repository: DataRepository) -> Dict[str, Any]:
+    """クラス×科目ごとに週時間数分の授業を生成（担当は科目を教えられる最初の教師）"""
+    timeslots = [
+        {"id": ts.id, "day_of_week": ts.day_of_week, "start_time": ts.start_time, "end_time": ts.end_time}
+        for ts in repository.get_timeslots()
+    ]
+    rooms = [
+        {"id": r.id, "name": r.name, "capacity": r.capacity, "equipment": r.equipment}
+        for r in repository.get_rooms()
+    ]
+    teachers = [t.to_dict() for t in repository.get_teachers()]
+    subjects = [s.to_dict() for s in repository.get_subjects()]
+    student_groups = [sg.to_dict() for sg in repository.get_student_groups()]
+
+    print(f"📊 データベースから取得したクラス: {[sg['name'] for sg in student_groups]}")
+    print(f"🕒 データベースから取得した時間帯数: {len(timeslots)}")
+
+    lessons = []
+    for student_group in student_groups:
+        for subject in subjects:
+            teacher = next((t for t in teachers if subject["name"] in t.get("subjects", [])), None)
+            if teacher is None:
+                continue
+            for _ in range(subject.get("weekly_hours", 1)):
+                lessons.append({
+                    "id": len(lessons) + 1,
+                    "subject": {
+                        "id": subject["id"],
+                        "name": subject["name"],
+                        "required_equipment": subject.get("required_equipment") or []
+                    },
+                    "teacher": {
+                        "id": teacher["id"],
+                        "name": teacher["name"],
+                        "available_days": teacher.get("available_days") or [],
+                        "available_hours": teacher.get("available_hours") or [],
+                        "unavailable_times": teacher.get("unavailable_times") or [],
+                        "max_daily_lessons": teacher.get("max_daily_lessons") or 0
+                    },
+                    "student_group": {
+                        "id": student_group["id"],
+                        "name": student_group["name"],
+                        "student_count": student_group.get("student_count") or 0
+                    },
+                    "timeslot": None,
+                    "room": None
+                })
+
+    print(f"🎯 デモ用最適化データ生成完了:")
+    print(f"   📚 科目数: {len(subjects)}")
+    print(f"   👨‍🏫 教師数: {len(teachers)}")
+    print(f"   👥 クラス数: {len(student_groups)}")
+    print(f"   📝 授業数: {len(lessons)}")
+    print(f"   ⏰ 週時間数合計: {sum(s.get('weekly_hours', 1) for s in subjects)}")
+    print(f"   🕒 時間帯数: {len(timeslots)}")
+    print(f"   🏫 教室数: {len(rooms)}")
+
+    return {"timeslots": timeslots, "rooms": rooms, "lessons": lessons}
@@ -0,0 +1,180 @@
+"""JSON ⇔ Timefold ドメインオブジェクトの変換
+
+授業JSONには教師・科目・クラスが授業ごとに埋め込まれているが、変換時は ID ごとに1つの
+オブジェクトへまとめ（インターン）、全授業で共有する。時間帯・教室は ID の辞書で引き当てる。
+共有により Python 側の生成数だけでなく、ソルブ・スコア計算時の Python ⇔ Java 変換の対象も減る。
+JSON への変換でも、時間帯・教師などの断片は1度だけ作って授業間で使い回す。
+"""
+from datetime import time
+from typing import Dict, Any, Optional
+
+from backend.models.timefold_models import (
+    TimeTable, Lesson, Timeslot, Room, Subject, Teacher, StudentGroup
+)
+
+
+def timeslot_from_json(t: Dict[str, Any]) -> Timeslot:
+    """時間帯JSONを変換"""
+    return Timeslot(t["id"], t["day_of_week"], time.fromisoformat(t["start_time"]), time.fromisoformat(t["end_time"]))
+
+
+def timeslot_to_json(timeslot: Timeslot) -> Dict[str, Any]:
+    """時間帯をJSON形式に変換"""
+    return {
+        "id": timeslot.id,
+        "day_of_week": timeslot.day_of_week,
+        "start_time": timeslot.start_time.strftime("%H:%M"),
+        "end_time": timeslot.end_time.strftime("%H:%M")
+    }
+
+
+def room_from_json(r: Dict[str, Any]) -> Room:
+    """教室JSONを変換。収容人数・設備がなければ制限なし"""
+    return Room(r["id"], r["name"], capacity=r.get("capacity") or 0, equipment=list(r.get("equipment") or []))
+
+
+def room_to_json(room: Room) -> Dict[str, Any]:
+    """教室（収容人数・設備を含む）をJSON形式に変換"""
+    return {"id": room.id, "name": room.name, "capacity": room.capacity, "equipment": room.equipment}
+
+
+def subject_from_json(s: Dict[str, Any]) -> Subject:
+    """科目JSONを変換。必要設備がなければどの教室でも可"""
+    return Subject(s["id"], s["name"], required_equipment=list(s.get("required_equipment") or []))
+
+
+def subject_to_json(subject: Subject) -> Dict[str, Any]:
+    """科目（必要設備を含む）をJSON形式に変換"""
+    return {"id": subject.id, "name": subject.name, "required_equipment": subject.required_equipment}
+
+
+def student_group_from_json(sg: Dict[str, Any]) -> StudentGroup:
+    """クラスJSONを変換。生徒数がなければ教室の収容人数を問わない"""
+    return StudentGroup(sg["id"], sg["name"], student_count=sg.get("student_count") or 0)
+
+
+def student_group_to_json(student_group: StudentGroup) -> Dict[str, Any]:
+    """クラス（生徒数を含む）をJSON形式に変換"""
+    return {"id": student_group.id, "name": student_group.name, "student_count": student_group.student_count}
+
+
+def teacher_from_json(t: Dict[str, Any]) -> Teacher:
+    """教師JSON（teachers.json の項目、または授業内の教師）を変換。勤務条件がなければ制限なし"""
+    return Teacher(
+        t["id"], t["name"],
+        available_days=list(t.get("available_days") or []),
+        available_hours=list(t.get("available_hours") or []),
+        unavailable_times=list(t.get("unavailable_times") or []),
+        max_daily_lessons=t.get("max_daily_lessons") or 0
+    )
+
+
+def teacher_to_json(teacher: Teacher) -> Dict[str, Any]:
+    """教師（勤務条件を含む）をJSON形式に変換"""
+    return {
+        "id": teacher.id,
+        "name": teacher.name,
+        "available_days": teacher.available_days,
+        "available_hours": teacher.available_hours,
+        "unavailable_times": teacher.unavailable_times,
+        "max_daily_lessons": teacher.max_daily_lessons
+    }
+
+
+class FactInterner:
+    """科目・教師・クラスを ID ごとに1つだけ生成して共有する（同じ ID の2件目以降は最初のものを返す）"""
+
+    def __init__(self):
+        self.subjects: Dict[Any, Subject] = {}
+        self.teachers: Dict[Any, Teacher] = {}
+        self.student_groups: Dict[Any, StudentGroup] = {}
+
+    def subject(self, s: Dict[str, Any]) -> Subject:
+        subject = self.subjects.get(s["id"])
+        if subject is None:
+            subject = self.subjects[s["id"]] = subject_from_json(s)
+        return subject
+
+    def teacher(self, t: Dict[str, Any]) -> Teacher:
+        teacher = self.teachers.get(t["id"])
+        if teacher is None:
+            teacher = self.teachers[t["id"]] = teacher_from_json(t)
+        return teacher
+
+    def student_group(self, sg: Dict[str, Any]) -> StudentGroup:
+        student_group = self.student_groups.get(sg["id"])
+        if student_group is None:
+            student_group = self.student_groups[sg["id"]] = student_group_from_json(sg)
+        return student_group
+
+    def lesson(self, l: Dict[str, Any]) -> Lesson:
+        """授業JSONを未割り当てのLessonに変換"""
+        return Lesson(l["id"], self.subject(l["subject"]), self.teacher(l["teacher"]),
+                      self.student_group(l["student_group"]))
+
+
+def timetable_from_json(data: Dict[str, Any], interner: Optional[FactInterner] = None) -> TimeTable:
+    """/api/optimize 形式のJSONを TimeTable に変換（割り当て済みの時間帯・教室は ID で引き当てる）"""
+    interner = interner or FactInterner()
+    timeslots = [timeslot_from_json(t) for t in data["timeslots"]]
+    rooms = [room_from_json(r) for r in data["rooms"]]
+    timeslots_by_id = {ts.id: ts for ts in timeslots}
+    rooms_by_id = {r.id: r for r in rooms}
+
+    lessons = []
+    for l in data["lessons"]:
+        lesson = interner.lesson(l)
+        if l.get("timeslot"):
+            lesson.timeslot = timeslots_by_id.get(l["timeslot"]["id"])
+        if l.get("room"):
+            lesson.room = rooms_by_id.get(l["room"]["id"])
+        # 固定指定は割り当て済みの授業のみ有効
+        lesson.pinned = bool(l.get("pinned")) and lesson.timeslot is not None and lesson.room is not None
+        lessons.append(lesson)
+
+    return TimeTable(timeslots=timeslots, rooms=rooms, lessons=lessons)
+
+
+class _FragmentCache:
+    """オブジェクトごとに1度だけJSON断片を作る（授業間で同じ dict を共有する）"""
+
+    def __init__(self, to_json):
+        self._to_json = to_json
+        self._fragments: Dict[int, Dict[str, Any]] = {}
+
+    def __call__(self, obj) -> Optional[Dict[str, Any]]:
+        if obj is None:
+            return None
+        fragment = self._fragments.get(id(obj))
+        if fragment is None:
+            fragment = self._fragments[id(obj)] = self._to_json(obj)
+        return fragment
+
+
+def timetable_to_json(timetable: TimeTable) -> Dict[str, Any]:
+    """TimeTable を /api/optimize 形式のJSONに変換
+
+    授業内の時間帯・教室・教師などは授業間で同じ dict を共有するため、書き換えないこと。
+    """
+    timeslot_json = _FragmentCache(timeslot_to_json)
+    lesson_room_json = _FragmentCache(lambda r: {"id": r.id, "name": r.name})
+    subject_json = _FragmentCache(subject_to_json)
+    teacher_json = _FragmentCache(teacher_to_json)
+    student_group_json = _FragmentCache(student_group_to_json)
+
+    return {
+        "timeslots": [dict(timeslot_json(t)) for t in timetable.timeslots],
+        "rooms": [room_to_json(r) for r in timetable.rooms],
+        "lessons": [
+            {
+                "id": l.id,
+                "subject": subject_json(l.subject),
+                "teacher": teacher_json(l.teacher),
+                "student_group": student_group_json(l.student_group),
+                "timeslot": timeslot_json(l.timeslot),
+                "room": lesson_room_json(l.room),
+                "pinned": l.pinned
+            } for l in timetable.lessons
+        ],
+        "score": str(timetable.score) if timetable.score else "Perfect"
+    }
@@ -0,0 +1,245 @@
+"""ソルバーワーカー用の永続ジョブキュー（SQLite、リース方式）"""
+import json
+import os
+import sqlite3
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Dict, Any, List, Optional
+
+from backend.services.solver_registry import DEFAULT_PROFILE
+
+DEFAULT_QUEUE_PATH = os.environ.get("SOLVER_QUEUE_PATH", os.path.join("backend", "data", "solver_jobs.db"))
+
+# ワーカーが応答しなくなったジョブを再投入するまでの秒数（ハートビートで延長）
+DEFAULT_LEASE_SECONDS = 30.0
+# ワーカー異常終了で再実行する上限回数
+MAX_ATTEMPTS = 3
+
+# SolverJobService と同じ状態名を使う
+STATUS_QUEUED = "SOLVING_SCHEDULED"
+STATUS_ACTIVE = "SOLVING_ACTIVE"
+STATUS_COMPLETED = "COMPLETED"
+STATUS_FAILED = "FAILED"
+
+
+
+def unsupported_job_options(options: Dict[str, Any]) -> List[str]:
+    """ジョブ（SolverManager で既定プロファイル・分割なしで解く）が扱えない指定の説明"""
+    problems = []
+    if (options.get("profile") or DEFAULT_PROFILE) != DEFAULT_PROFILE:
+        problems.append(f"profile={options['profile']}（ジョブは {DEFAULT_PROFILE} のみ。/api/optimize を使ってください）")
+    if options.get("decompose"):
+        problems.append("decompose（ジョブでは分割ソルブに対応していません。/api/optimize を使ってください）")
+    return problems
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS solver_jobs (
+    job_id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    request TEXT NOT NULL,
+    options TEXT NOT NULL,
+    score TEXT,
+    solution TEXT,
+    error TEXT,
+    terminated_early INTEGER NOT NULL DEFAULT 0,
+    cancel_requested INTEGER NOT NULL DEFAULT 0,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    worker_id TEXT,
+    lease_expires_at REAL,
+    submitted_at REAL NOT NULL,
+    started_at REAL,
+    best_found_at REAL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_solver_jobs_status ON solver_jobs (status, submitted_at);
+"""
+
+
+class SQLiteJobQueue:
+    """Web プロセスが投入し、ソルバーワーカーがリースを取って処理するジョブキュー
+
+    ワーカーは処理中に定期的にリースを延長する。延長が途絶えたジョブ（ワーカー停止・OOM）は
+    リース切れ後に別のワーカーが再取得する。
+    """
+
+    def __init__(self, db_path: str = DEFAULT_QUEUE_PATH):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+
+    def enqueue(self, request_data: Optional[Dict[str, Any]], options: Dict[str, Any]) -> str:
+        """ジョブを投入してIDを返す"""
+        job_id = uuid.uuid4().hex
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO solver_jobs (job_id, status, request, options, submitted_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (job_id, STATUS_QUEUED, json.dumps(request_data or {}, ensure_ascii=False),
+                 json.dumps(options, ensure_ascii=False), time.time())
+            )
+        print(f"📥 ジョブをキューに投入: {job_id}")
+        return job_id
+
+    def claim(self, worker_id: str, lease_seconds: float = DEFAULT_LEASE_SECONDS) -> Optional[Dict[str, Any]]:
+        """最も古い待機中ジョブ（またはリース切れジョブ）を取得してリースを設定"""
+        while True:
+            with self._transaction() as conn:
+                now = time.time()
+                row = conn.execute(
+                    "SELECT * FROM solver_jobs WHERE status = ? "
+                    "OR (status = ? AND lease_expires_at < ?) ORDER BY submitted_at LIMIT 1",
+                    (STATUS_QUEUED, STATUS_ACTIVE, now)
+                ).fetchone()
+                if row is None:
+                    return None
+
+                if row["attempts"] >= MAX_ATTEMPTS:
+                    conn.execute(
+                        "UPDATE solver_jobs SET status = ?, error = ?, finished_at = ? WHERE job_id = ?",
+                        (STATUS_FAILED, f"ワーカーが{MAX_ATTEMPTS}回応答なしのため中止", now, row["job_id"])
+                    )
+                    continue
+
+                if row["status"] == STATUS_ACTIVE:
+                    print(f"♻️ リース切れジョブを再取得: {row['job_id']} (前回ワーカー: {row['worker_id']})")
+                conn.execute(
+                    "UPDATE solver_jobs SET status = ?, worker_id = ?, lease_expires_at = ?, "
+                    "attempts = attempts + 1, started_at = COALESCE(started_at, ?) WHERE job_id = ?",
+                    (STATUS_ACTIVE, worker_id, now + lease_seconds, now, row["job_id"])
+                )
+                row = conn.execute("SELECT * FROM solver_jobs WHERE job_id = ?", (row["job_id"],)).fetchone()
+                return self._row_to_job(row)
+
+    def heartbeat(self, job_id: str, worker_id: str, lease_seconds: float = DEFAULT_LEASE_SECONDS,
+                  score: Optional[str] = None, solution: Optional[Dict[str, Any]] = None) -> bool:
+        """リースを延長し、途中のベスト解を保存（リースを失っていれば False）"""
+        now = time.time()
+        with self._connect() as conn:
+            if solution is not None:
+                cursor = conn.execute(
+                    "UPDATE solver_jobs SET lease_expires_at = ?, score = ?, solution = ?, best_found_at = ? "
+                    "WHERE job_id = ? AND worker_id = ? AND status = ?",
+                    (now + lease_seconds, score, json.dumps(solution, ensure_ascii=False), now,
+                     job_id, worker_id, STATUS_ACTIVE)
+                )
+            else:
+                cursor = conn.execute(
+                    "UPDATE solver_jobs SET lease_expires_at = ? WHERE job_id = ? AND worker_id = ? AND status = ?",
+                    (now + lease_seconds, job_id, worker_id, STATUS_ACTIVE)
+                )
+            return cursor.rowcount == 1
+
+    def complete(self, job_id: str, worker_id: str, score: Optional[str],
+                 solution: Optional[Dict[str, Any]], terminated_early: bool = False) -> bool:
+        """最終解を書き込んで完了にする"""
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE solver_jobs SET status = ?, score = ?, solution = ?, terminated_early = ?, "
+                "finished_at = ?, lease_expires_at = NULL WHERE job_id = ? AND worker_id = ? AND status = ?",
+                (STATUS_COMPLETED, score, json.dumps(solution, ensure_ascii=False) if solution else None,
+                 int(terminated_early), time.time(), job_id, worker_id, STATUS_ACTIVE)
+            )
+            return cursor.rowcount == 1
+
+    def release(self, job_id: str, worker_id: str, score: Optional[str] = None,
+                solution: Optional[Dict[str, Any]] = None) -> bool:
+        """ワーカー停止時にリースを返してジョブを待機中に戻す（途中解は再開用に保存）
+
+        正常な停止による返却は異常終了ではないため、試行回数に数えない。
+        """
+        with self._connect() as conn:
+            if solution is not None:
+                conn.execute(
+                    "UPDATE solver_jobs SET score = ?, solution = ?, best_found_at = ? "
+                    "WHERE job_id = ? AND worker_id = ? AND status = ?",
+                    (score, json.dumps(solution, ensure_ascii=False), time.time(), job_id, worker_id, STATUS_ACTIVE)
+                )
+            cursor = conn.execute(
+                "UPDATE solver_jobs SET status = ?, worker_id = NULL, lease_expires_at = NULL, "
+                "attempts = MAX(attempts - 1, 0) WHERE job_id = ? AND worker_id = ? AND status = ?",
+                (STATUS_QUEUED, job_id, worker_id, STATUS_ACTIVE)
+            )
+            return cursor.rowcount == 1
+
+    def fail(self, job_id: str, worker_id: str, error: str) -> bool:
+        """エラー終了を記録"""
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE solver_jobs SET status = ?, error = ?, finished_at = ?, lease_expires_at = NULL "
+                "WHERE job_id = ? AND worker_id = ? AND status = ?",
+                (STATUS_FAILED, error, time.time(), job_id, worker_id, STATUS_ACTIVE)
+            )
+            return cursor.rowcount == 1
+
+    def request_cancel(self, job_id: str) -> bool:
+        """早期終了を要求（待機中ならその場で完了扱い、実行中ならワーカーが終了させる）"""
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE solver_jobs SET status = ?, terminated_early = 1, finished_at = ? "
+                "WHERE job_id = ? AND status = ?",
+                (STATUS_COMPLETED, now, job_id, STATUS_QUEUED)
+            )
+            cursor = conn.execute(
+                "UPDATE solver_jobs SET cancel_requested = 1 WHERE job_id = ?", (job_id,)
+            )
+            return cursor.rowcount == 1
+
+    def is_cancel_requested(self, job_id: str) -> bool:
+        with self._connect() as conn:
+            row = conn.execute("SELECT cancel_requested FROM solver_jobs WHERE job_id = ?",
+                               (job_id,)).fetchone()
+            return bool(row and row["cancel_requested"])
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """ジョブ1件（解を含む）"""
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM solver_jobs WHERE job_id = ?", (job_id,)).fetchone()
+            return self._row_to_job(row) if row else None
+
+    def purge_finished(self, older_than_seconds: float):
+        """古い終了済みジョブを削除"""
+        with self._connect() as conn:
+            conn.execute(
+                "DELETE FROM solver_jobs WHERE finished_at IS NOT NULL AND finished_at < ?",
+                (time.time() - older_than_seconds,)
+            )
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30.0)
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    @contextmanager
+    def _transaction(self):
+        """複数ワーカーの同時取得を防ぐため書き込みロックを先に取る"""
+        conn = sqlite3.connect(self.db_path, timeout=30.0, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        finally:
+            conn.close()
+
+    def _row_to_job(self, row: sqlite3.Row) -> Dict[str, Any]:
+        job = dict(row)
+        job["request"] = json.loads(job["request"])
+        job["options"] = json.loads(job["options"])
+        job["solution"] = json.loads(job["solution"]) if job["solution"] else None
+        job["terminated_early"] = bool(job["terminated_early"])
+        job["cancel_requested"] = bool(job["cancel_requested"])
+        return job
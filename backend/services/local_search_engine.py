@@ -0,0 +1,439 @@
+"""JVM なしで動く NumPy 版の局所探索エンジン（Late Acceptance + 差分スコア計算）
+
+授業・時間帯・教室を整数配列に変換し、define_constraints と同じハード・ソフトのペナルティを
+占有数の行列（時間帯×教室、時間帯×教師、クラス×曜日 など）から計算する。
+/api/optimize と同じJSONを受け取り、同じ形式の解JSONを返す。
+"""
+import random
+import time as time_module
+from collections import namedtuple
+from datetime import time
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+
+from backend.models.scheduling_rules import (
+    DAY_INDEX, MAX_CONSECUTIVE_BREAK_MINUTES, teacher_allowed_timeslots, lesson_allowed_rooms,
+    require_value_ranges
+)
+
+# /api/optimize で選べる、ソルバーを使わないプロファイル名
+LOCAL_SEARCH_PROFILE = "local_search"
+
+# define_constraints のソフト制約の重み
+SUBJECT_SAME_DAY_WEIGHT = 10   # Subject distribution across days
+SUBJECT_SPREAD_REWARD = 8      # Encourage subject spread
+DAILY_LESSON_PAIR_WEIGHT = 5   # Daily lesson limit
+CONSECUTIVE_WEIGHT = 3         # Avoid consecutive same subject
+
+# 探索中の比較用にハード・ソフトを1つの整数にまとめる（ソフトの絶対値はこれより十分小さい）
+HARD_FACTOR = 10 ** 9
+
+# scheduling_rules の値域計算に渡す軽量オブジェクト（Timefold のドメインクラスと同じ属性名）
+_Timeslot = namedtuple("_Timeslot", "id day_of_week start_time end_time")
+_Room = namedtuple("_Room", "id name capacity equipment")
+_Subject = namedtuple("_Subject", "id name required_equipment")
+_Teacher = namedtuple("_Teacher", "id name available_days available_hours unavailable_times max_daily_lessons")
+_StudentGroup = namedtuple("_StudentGroup", "id name student_count")
+
+
+def _pairs(counts: np.ndarray) -> int:
+    """各セルの件数 c から組の数 c(c-1)/2 の合計"""
+    return int((counts * (counts - 1) // 2).sum())
+
+
+def _code(mapping: Dict[Any, int], key) -> int:
+    """キーに連番を振る"""
+    if key not in mapping:
+        mapping[key] = len(mapping)
+    return mapping[key]
+
+
+class EncodedProblem:
+    """/api/optimize 形式の問題JSONを整数配列に変換したもの"""
+
+    def __init__(self, data: Dict[str, Any]):
+        require_value_ranges(data["timeslots"], data["rooms"])
+        self.data = data
+
+        # 時間帯: 曜日（制約と同じく曜日名の文字列で一致判定）・コマ番号・開始終了時刻（分）
+        self.timeslots = [
+            _Timeslot(t["id"], t["day_of_week"], time.fromisoformat(t["start_time"]),
+                      time.fromisoformat(t["end_time"]))
+            for t in data["timeslots"]
+        ]
+        self.timeslot_index = {ts.id: i for i, ts in enumerate(self.timeslots)}
+        day_codes: Dict[str, int] = {}
+        self.ts_day = np.array([_code(day_codes, ts.day_of_week) for ts in self.timeslots], dtype=np.int64)
+        self.day_count = max(len(day_codes), 1)
+        start, end, day_index = [], [], []
+        for ts in self.timeslots:
+            index = DAY_INDEX.get(ts.day_of_week.upper(), DAY_INDEX.get(ts.day_of_week))
+            if index is None:
+                raise ValueError(f"不明な曜日です: {ts.day_of_week}")
+            day_index.append(index)
+            start.append(index * 24 * 60 + ts.start_time.hour * 60 + ts.start_time.minute)
+            end.append(index * 24 * 60 + ts.end_time.hour * 60 + ts.end_time.minute)
+        self.ts_start = np.array(start, dtype=np.int64)
+        self.ts_end = np.array(end, dtype=np.int64)
+        # assign_period_indexes と同じく曜日番号ごとに開始時刻順でコマ番号を振る
+        self.ts_period = np.zeros(len(self.timeslots), dtype=np.int64)
+        for index in set(day_index):
+            members = [i for i, d in enumerate(day_index) if d == index]
+            for period, i in enumerate(sorted(members, key=lambda i: start[i])):
+                self.ts_period[i] = period
+
+        same_day = self.ts_day[:, None] == self.ts_day[None, :]
+        next_period = np.abs(self.ts_period[:, None] - self.ts_period[None, :]) == 1
+        # 同じ日の隣り合うコマ（教師の空きコマ判定）
+        self.adjacent = (same_day & next_period).astype(np.int64)
+        # 短い休み時間を挟むだけの連続コマ（同じ科目の連続授業判定）
+        gap = (np.maximum(self.ts_start[:, None], self.ts_start[None, :])
+               - np.minimum(self.ts_end[:, None], self.ts_end[None, :]))
+        self.consecutive = (same_day & next_period & (gap <= MAX_CONSECUTIVE_BREAK_MINUTES)).astype(np.int64)
+
+        self.rooms = [
+            _Room(r["id"], r["name"], r.get("capacity") or 0, list(r.get("equipment") or []))
+            for r in data["rooms"]
+        ]
+        self.room_index = {room.id: i for i, room in enumerate(self.rooms)}
+
+        # 授業: 教師・クラス・科目×クラスの番号と値域（TimeTable と同じく教師ごと・条件ごとに共有）
+        teacher_codes: Dict[Any, int] = {}
+        group_codes: Dict[Any, int] = {}
+        subject_group_codes: Dict[Tuple[Any, Any], int] = {}
+        allowed_ts_by_teacher: Dict[Any, np.ndarray] = {}
+        allowed_rooms_by_requirement: Dict[Tuple, np.ndarray] = {}
+        teacher_limits: Dict[int, int] = {}
+        self.lesson_teacher, self.lesson_group, self.lesson_subject_group = [], [], []
+        self.allowed_timeslots: List[np.ndarray] = []
+        self.allowed_rooms: List[np.ndarray] = []
+        for l in data["lessons"]:
+            teacher = _Teacher(
+                l["teacher"]["id"], l["teacher"]["name"],
+                list(l["teacher"].get("available_days") or []), list(l["teacher"].get("available_hours") or []),
+                list(l["teacher"].get("unavailable_times") or []), l["teacher"].get("max_daily_lessons") or 0
+            )
+            subject = _Subject(l["subject"]["id"], l["subject"]["name"],
+                               list(l["subject"].get("required_equipment") or []))
+            group = _StudentGroup(l["student_group"]["id"], l["student_group"]["name"],
+                                  l["student_group"].get("student_count") or 0)
+
+            teacher_code = _code(teacher_codes, teacher.id)
+            teacher_limits[teacher_code] = max(teacher_limits.get(teacher_code, 0), teacher.max_daily_lessons)
+            self.lesson_teacher.append(teacher_code)
+            self.lesson_group.append(_code(group_codes, group.id))
+            self.lesson_subject_group.append(_code(subject_group_codes, (subject.id, group.id)))
+
+            allowed = allowed_ts_by_teacher.get(teacher.id)
+            if allowed is None:
+                allowed = np.array([self.timeslot_index[ts.id]
+                                    for ts in teacher_allowed_timeslots(teacher, self.timeslots)], dtype=np.int64)
+                allowed_ts_by_teacher[teacher.id] = allowed
+            self.allowed_timeslots.append(allowed)
+
+            key = (group.student_count, tuple(sorted(subject.required_equipment)))
+            allowed = allowed_rooms_by_requirement.get(key)
+            if allowed is None:
+                allowed = np.array([self.room_index[r.id]
+                                    for r in lesson_allowed_rooms(subject, group, self.rooms)], dtype=np.int64)
+                allowed_rooms_by_requirement[key] = allowed
+            self.allowed_rooms.append(allowed)
+
+        self.lesson_teacher = np.array(self.lesson_teacher, dtype=np.int64)
+        self.lesson_group = np.array(self.lesson_group, dtype=np.int64)
+        self.lesson_subject_group = np.array(self.lesson_subject_group, dtype=np.int64)
+        self.teacher_count = max(len(teacher_codes), 1)
+        self.group_count = max(len(group_codes), 1)
+        self.subject_group_count = max(len(subject_group_codes), 1)
+        self.teacher_limit = np.array([teacher_limits.get(t, 0) for t in range(self.teacher_count)], dtype=np.int64)
+
+        # 初期割り当て（-1 は未割り当て）と固定
+        self.initial_timeslot = np.array(
+            [self.timeslot_index.get((l.get("timeslot") or {}).get("id"), -1) for l in data["lessons"]], dtype=np.int64)
+        self.initial_room = np.array(
+            [self.room_index.get((l.get("room") or {}).get("id"), -1) for l in data["lessons"]], dtype=np.int64)
+        assigned = (self.initial_timeslot >= 0) & (self.initial_room >= 0)
+        self.initial_timeslot[~assigned] = -1
+        self.initial_room[~assigned] = -1
+        self.pinned = np.array([bool(l.get("pinned")) for l in data["lessons"]], dtype=bool) & assigned
+
+    def score(self, timeslot: np.ndarray, room: np.ndarray) -> Tuple[int, int]:
+        """割り当て全体の (ハード, ソフト) スコアを占有数の行列から計算（未割り当ての授業は数えない）"""
+        assigned = (timeslot >= 0) & (room >= 0)
+        ts, rm = timeslot[assigned], room[assigned]
+        teacher, group = self.lesson_teacher[assigned], self.lesson_group[assigned]
+        subject_group = self.lesson_subject_group[assigned]
+        day = self.ts_day[ts]
+        T, R, D = len(self.timeslots), len(self.rooms), self.day_count
+
+        room_ts = np.bincount(ts * R + rm, minlength=T * R)
+        teacher_ts = np.bincount(teacher * T + ts, minlength=self.teacher_count * T).reshape(self.teacher_count, T)
+        group_ts = np.bincount(group * T + ts, minlength=self.group_count * T)
+        teacher_day = np.bincount(teacher * D + day, minlength=self.teacher_count * D).reshape(self.teacher_count, D)
+        limit = self.teacher_limit[:, None]
+        excess = np.where(limit > 0, np.maximum(teacher_day - limit, 0), 0).sum()
+        hard = -(_pairs(room_ts) + _pairs(teacher_ts) + _pairs(group_ts) + int(excess))
+
+        sg_day = np.bincount(subject_group * D + day, minlength=self.subject_group_count * D)
+        sg_total = np.bincount(subject_group, minlength=self.subject_group_count)
+        group_day = np.bincount(group * D + day, minlength=self.group_count * D)
+        sg_ts = np.bincount(subject_group * T + ts,
+                            minlength=self.subject_group_count * T).reshape(self.subject_group_count, T)
+        teacher_room = np.bincount(teacher * R + rm, minlength=self.teacher_count * R)
+        teacher_total = np.bincount(teacher, minlength=self.teacher_count)
+
+        same_day_subject = _pairs(sg_day)
+        consecutive = int(((sg_ts @ self.consecutive) * sg_ts).sum()) // 2
+        adjacent = int(((teacher_ts @ self.adjacent) * teacher_ts).sum()) // 2
+        soft = (-SUBJECT_SAME_DAY_WEIGHT * same_day_subject
+                + SUBJECT_SPREAD_REWARD * (_pairs(sg_total) - same_day_subject)
+                - DAILY_LESSON_PAIR_WEIGHT * _pairs(group_day)
+                - CONSECUTIVE_WEIGHT * consecutive
+                - (_pairs(teacher_total) - _pairs(teacher_room))
+                - (_pairs(teacher_day) - _pairs(teacher_ts) - adjacent))
+        return hard, soft
+
+
+class LateAcceptanceEngine:
+    """占有数を差分更新しながら Late Acceptance で探索する
+
+    1手は「授業1つを時間帯×教室の全候補のうち最良の位置へ動かす」変更（候補はまとめてベクトル計算）か、
+    「同じクラスの授業2つの時間帯を入れ替える」交換。
+    """
+
+    def __init__(self, problem: EncodedProblem, seed: int = 0, late_acceptance_size: int = 400,
+                 swap_probability: float = 0.3):
+        self.problem = problem
+        self.random = random.Random(seed)
+        self.late_acceptance_size = late_acceptance_size
+        self.swap_probability = swap_probability
+
+        p = problem
+        T, R, D = len(p.timeslots), len(p.rooms), p.day_count
+        self.timeslot = np.full(len(p.lesson_teacher), -1, dtype=np.int64)
+        self.room = np.full(len(p.lesson_teacher), -1, dtype=np.int64)
+        self.room_ts = np.zeros((T, R), dtype=np.int64)
+        self.teacher_ts = np.zeros((T, p.teacher_count), dtype=np.int64)
+        self.group_ts = np.zeros((T, p.group_count), dtype=np.int64)
+        self.teacher_day = np.zeros((p.teacher_count, D), dtype=np.int64)
+        self.group_day = np.zeros((p.group_count, D), dtype=np.int64)
+        self.sg_day = np.zeros((p.subject_group_count, D), dtype=np.int64)
+        self.sg_ts = np.zeros((p.subject_group_count, T), dtype=np.int64)
+        self.sg_total = np.zeros(p.subject_group_count, dtype=np.int64)
+        self.teacher_room = np.zeros((p.teacher_count, R), dtype=np.int64)
+        self.teacher_total = np.zeros(p.teacher_count, dtype=np.int64)
+
+        self.movable = [i for i in range(len(p.lesson_teacher)) if not p.pinned[i]]
+        self.lessons_by_group: Dict[int, List[int]] = {}
+        for i in self.movable:
+            self.lessons_by_group.setdefault(int(p.lesson_group[i]), []).append(i)
+
+    # --- 占有数の差分更新 ---
+
+    def _update(self, i: int, ts: int, rm: int, sign: int):
+        p = self.problem
+        t, g, sg, d = p.lesson_teacher[i], p.lesson_group[i], p.lesson_subject_group[i], p.ts_day[ts]
+        self.room_ts[ts, rm] += sign
+        self.teacher_ts[ts, t] += sign
+        self.group_ts[ts, g] += sign
+        self.teacher_day[t, d] += sign
+        self.group_day[g, d] += sign
+        self.sg_day[sg, d] += sign
+        self.sg_ts[sg, ts] += sign
+        self.sg_total[sg] += sign
+        self.teacher_room[t, rm] += sign
+        self.teacher_total[t] += sign
+
+    def _add(self, i: int, ts: int, rm: int):
+        self._update(i, ts, rm, 1)
+        self.timeslot[i] = ts
+        self.room[i] = rm
+
+    def _remove(self, i: int):
+        self._update(i, self.timeslot[i], self.room[i], -1)
+        self.timeslot[i] = -1
+        self.room[i] = -1
+
+    def _gains(self, i: int, timeslots: np.ndarray, rooms: np.ndarray) -> np.ndarray:
+        """授業 i（占有数から除いた状態）を各 (時間帯, 教室) に置いたときのスコア増分（HARD_FACTOR 換算）"""
+        p = self.problem
+        t, g, sg = p.lesson_teacher[i], p.lesson_group[i], p.lesson_subject_group[i]
+        day = p.ts_day[timeslots]
+
+        hard = -self.room_ts[timeslots][:, rooms] - (self.teacher_ts[timeslots, t] + self.group_ts[timeslots, g])[:, None]
+        limit = p.teacher_limit[t]
+        if limit > 0:
+            hard = hard - (self.teacher_day[t, day] >= limit)[:, None]
+
+        same_day_subject = self.sg_day[sg, day]
+        same_day_teacher_gap = (self.teacher_day[t, day] - self.teacher_ts[timeslots, t]
+                                - p.adjacent[timeslots] @ self.teacher_ts[:, t])
+        soft_ts = (-(SUBJECT_SAME_DAY_WEIGHT + SUBJECT_SPREAD_REWARD) * same_day_subject
+                   + SUBJECT_SPREAD_REWARD * self.sg_total[sg]
+                   - DAILY_LESSON_PAIR_WEIGHT * self.group_day[g, day]
+                   - CONSECUTIVE_WEIGHT * (p.consecutive[timeslots] @ self.sg_ts[sg])
+                   - same_day_teacher_gap)
+        soft_room = -(self.teacher_total[t] - self.teacher_room[t, rooms])
+        return hard * HARD_FACTOR + soft_ts[:, None] + soft_room[None, :]
+
+    def _gain(self, i: int, ts: int, rm: int) -> int:
+        return int(self._gains(i, np.array([ts]), np.array([rm]))[0, 0])
+
+    def _best_position(self, i: int, exclude: Optional[Tuple[int, int]] = None) -> Tuple[int, int, int]:
+        """値域内の最良の (時間帯, 教室, 増分)。同点は乱択"""
+        timeslots, rooms = self.problem.allowed_timeslots[i], self.problem.allowed_rooms[i]
+        gains = self._gains(i, timeslots, rooms)
+        if exclude is not None:
+            gains[(timeslots == exclude[0])[:, None] & (rooms == exclude[1])[None, :]] = np.iinfo(np.int64).min
+        best = np.flatnonzero(gains == gains.max())
+        b, s = divmod(int(best[self.random.randrange(len(best))]), len(rooms))
+        return int(timeslots[b]), int(rooms[s]), int(gains[b, s])
+
+    # --- 探索 ---
+
+    def construct(self):
+        """固定・割り当て済みの授業を置き、残りを時間帯の候補が少ない順に最良の位置へ挿入"""
+        p = self.problem
+        for i in range(len(p.lesson_teacher)):
+            if p.initial_timeslot[i] >= 0:
+                self._add(i, int(p.initial_timeslot[i]), int(p.initial_room[i]))
+        pending = sorted((i for i in range(len(p.lesson_teacher)) if self.timeslot[i] < 0),
+                         key=lambda i: (len(p.allowed_timeslots[i]), len(p.allowed_rooms[i])))
+        for i in pending:
+            ts, rm, _ = self._best_position(i)
+            self._add(i, ts, rm)
+
+    def _change_move(self) -> Optional[Tuple[int, Any]]:
+        """授業1つを最良の別位置へ（増分と取り消し情報を返す）"""
+        i = self.movable[self.random.randrange(len(self.movable))]
+        old = (int(self.timeslot[i]), int(self.room[i]))
+        if len(self.problem.allowed_timeslots[i]) * len(self.problem.allowed_rooms[i]) < 2:
+            return None
+        self._remove(i)
+        old_gain = self._gain(i, *old)
+        ts, rm, gain = self._best_position(i, exclude=old)
+        self._add(i, ts, rm)
+        return gain - old_gain, [(i, old)]
+
+    def _swap_move(self) -> Optional[Tuple[int, Any]]:
+        """同じクラスの授業2つの時間帯を入れ替える（教室はそのまま）"""
+        i = self.movable[self.random.randrange(len(self.movable))]
+        same_group = self.lessons_by_group[int(self.problem.lesson_group[i])]
+        j = same_group[self.random.randrange(len(same_group))]
+        ts_i, ts_j = int(self.timeslot[i]), int(self.timeslot[j])
+        if ts_i == ts_j or ts_j not in self.problem.allowed_timeslots[i] or ts_i not in self.problem.allowed_timeslots[j]:
+            return None
+        old = [(i, (ts_i, int(self.room[i]))), (j, (ts_j, int(self.room[j])))]
+        delta = 0
+        for k, position in old:
+            self._remove(k)
+            delta -= self._gain(k, *position)
+        for (k, (_, rm)), ts in zip(old, (ts_j, ts_i)):
+            delta += self._gain(k, ts, rm)
+            self._add(k, ts, rm)
+        return delta, old
+
+    def _undo(self, old):
+        for k, _ in old:
+            self._remove(k)
+        for k, position in old:
+            self._add(k, *position)
+
+    def solve(self, max_seconds: float = 10.0, unimproved_seconds: float = 3.0) -> Dict[str, Any]:
+        """構築後、時間切れか改善停止まで Late Acceptance で探索し、最良解を割り当てる"""
+        start = time_module.perf_counter()
+        self.construct()
+        hard, soft = self.problem.score(self.timeslot, self.room)
+        current = hard * HARD_FACTOR + soft
+        best = current
+        best_assignment = (self.timeslot.copy(), self.room.copy())
+        late = [current] * self.late_acceptance_size
+        steps = accepted = 0
+        last_improvement = time_module.perf_counter()
+
+        while self.movable:
+            if steps % 100 == 0:
+                now = time_module.perf_counter()
+                if now - start >= max_seconds or now - last_improvement >= unimproved_seconds:
+                    break
+            move = self._swap_move() if self.random.random() < self.swap_probability else self._change_move()
+            steps += 1
+            if move is None:
+                continue
+            delta, old = move
+            candidate = current + delta
+            slot = steps % self.late_acceptance_size
+            if candidate >= late[slot] or candidate >= current:
+                current = candidate
+                accepted += 1
+                if current > best:
+                    best = current
+                    best_assignment = (self.timeslot.copy(), self.room.copy())
+                    last_improvement = time_module.perf_counter()
+            else:
+                self._undo(old)
+            late[slot] = current
+
+        self.timeslot, self.room = best_assignment
+        # 差分更新で追跡したスコア（to_json は全体を再計算する）
+        hard = (best + HARD_FACTOR // 2) // HARD_FACTOR
+        soft = best - hard * HARD_FACTOR
+        stats = {
+            "steps": steps,
+            "accepted": accepted,
+            "seconds": round(time_module.perf_counter() - start, 3),
+            "steps_per_second": int(steps / max(time_module.perf_counter() - start, 1e-9))
+        }
+        print(f"🧮 NumPy局所探索完了: {hard}hard/{soft}soft {stats}")
+        return {"hard": hard, "soft": soft, **stats}
+
+    def to_json(self) -> Dict[str, Any]:
+        """OptimizationService.convert_to_json と同じ形式の解JSON"""
+        p = self.problem
+        hard, soft = p.score(self.timeslot, self.room)
+
+        def timeslot_json(ts: _Timeslot) -> Dict[str, Any]:
+            return {"id": ts.id, "day_of_week": ts.day_of_week,
+                    "start_time": ts.start_time.strftime("%H:%M"), "end_time": ts.end_time.strftime("%H:%M")}
+
+        lessons = []
+        for i, l in enumerate(p.data["lessons"]):
+            teacher = l["teacher"]
+            ts, rm = int(self.timeslot[i]), int(self.room[i])
+            lessons.append({
+                "id": l["id"],
+                "subject": {"id": l["subject"]["id"], "name": l["subject"]["name"],
+                            "required_equipment": list(l["subject"].get("required_equipment") or [])},
+                "teacher": {
+                    "id": teacher["id"],
+                    "name": teacher["name"],
+                    "available_days": list(teacher.get("available_days") or []),
+                    "available_hours": list(teacher.get("available_hours") or []),
+                    "unavailable_times": list(teacher.get("unavailable_times") or []),
+                    "max_daily_lessons": teacher.get("max_daily_lessons") or 0
+                },
+                "student_group": {"id": l["student_group"]["id"], "name": l["student_group"]["name"],
+                                  "student_count": l["student_group"].get("student_count") or 0},
+                "timeslot": timeslot_json(p.timeslots[ts]) if ts >= 0 else None,
+                "room": {"id": p.rooms[rm].id, "name": p.rooms[rm].name} if rm >= 0 else None,
+                "pinned": bool(p.pinned[i])
+            })
+        return {
+            "timeslots": [timeslot_json(ts) for ts in p.timeslots],
+            "rooms": [{"id": r.id, "name": r.name, "capacity": r.capacity, "equipment": r.equipment} for r in p.rooms],
+            "lessons": lessons,
+            "score": f"{hard}hard/{soft}soft",
+            "hard_violations": -hard,
+            "unassigned_lessons": int(((self.timeslot < 0) | (self.room < 0)).sum())
+        }
+
+
+def solve_local_search(data: Dict[str, Any], max_seconds: Optional[float] = None,
+                       seed: int = 0) -> Dict[str, Any]:
+    """問題JSONを NumPy エンジンで解き、/api/optimize と同じ形式の解JSONを返す"""
+    engine = LateAcceptanceEngine(EncodedProblem(data), seed=seed)
+    stats = engine.solve(max_seconds=max_seconds or 10.0)
+    result = engine.to_json()
+    result["engine"] = {"name": "numpy-late-acceptance", **stats}
+    return result
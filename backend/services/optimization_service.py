@@ -1,171 +1,159 @@
-from datetime import time
-from typing import List, Dict, Any
+import os
+from typing import List, Dict, Any, Optional, Tuple
 import json
 
-from timefold.solver import SolverFactory
-from timefold.solver.config import SolverConfig, TerminationConfig, ScoreDirectorFactoryConfig, Duration
+from timefold.solver.config import SolverConfig, SolverConfigOverride
 
-from backend.models.timefold_models import (
-    TimeTable, Lesson, Timeslot, Room, Subject, Teacher, StudentGroup, define_constraints
+from backend.models.timefold_models import TimeTable, Lesson
+from backend.models.config import SystemConfig
+from backend.models.database import DataRepository, create_data_repository
+from backend.services.solver_registry import (
+    get_solver_registry, resolve_move_thread_count, DEFAULT_PROFILE, CONSTRUCTION_PROFILE
 )
-from backend.models.database import JSONDataRepository
+from backend.services.termination_policy import TerminationPolicy
+from backend.services.domain_converter import FactInterner, timetable_from_json, timetable_to_json
+from backend.services.demo_problem import build_demo_problem
+from backend.services.warm_start import apply_warm_start
+from backend.services.construction_heuristic import (
+    count_hard_violations, lesson_difficulty_order
+)
+
+# group_by で集計するハード制約の集計キー（制約の group_by と同じ順）とキーの個数
+GROUPED_HARD_CONSTRAINTS = {
+    "Teacher max daily lessons": (lambda lesson: (lesson.teacher.id, lesson.timeslot.day_of_week), 2),
+}
 
 class OptimizationService:
-    def __init__(self):
-        self.db = JSONDataRepository()
+    def __init__(self, data_repo: Optional[DataRepository] = None):
+        # API からはプロセスで共有するリポジトリを受け取る（リクエストごとにデータを読み直さない）
+        self.db = data_repo or create_data_repository()
+        self.termination_policy = TerminationPolicy()
+        self.system_config = SystemConfig.load(os.path.join(self.db.data_dir, "system_config.json"))
         
     def generate_demo_data(self) -> TimeTable:
         """デモ用の基本データを生成"""
-        # 🔧 重要: 最新データを強制再読み込み
-        self.db.load_all_data()
-        
-        # データベースから時間帯設定を取得
-        timeslots_data = [ts.to_dict() for ts in self.db.get_timeslots()]
-        timeslots = []
-        
-        for ts_data in timeslots_data:
-            timeslot = Timeslot(
-                id=ts_data['id'],
-                day_of_week=ts_data['day_of_week'],
-                start_time=time.fromisoformat(ts_data['start_time']),
-                end_time=time.fromisoformat(ts_data['end_time'])
-            )
-            timeslots.append(timeslot)
-        
-        # デモ用：教室2つのみ
-        rooms = [
-            Room(1, "教室A"),
-            Room(2, "教室B"),
-        ]
-        
-        # データベースから実際の教師と科目、学生グループを取得
-        teachers_data = [t.to_dict() for t in self.db.get_teachers()]
-        subjects_data = [s.to_dict() for s in self.db.get_subjects()]
-        student_groups_data = [sg.to_dict() for sg in self.db.get_student_groups()]
-        
-        # TimefoldAI用のオブジェクトに変換
-        teachers = [Teacher(t['id'], t['name']) for t in teachers_data]
-        subjects = [Subject(s['id'], s['name']) for s in subjects_data]
-        student_groups = [StudentGroup(sg['id'], sg['name']) for sg in student_groups_data]
+        # 🔧 重要: 変更されたデータファイルを再読み込み
+        self.db.refresh()
+        return self.convert_from_json(build_demo_problem(self.db))
+    
+    def convert_to_json(self, timetable: TimeTable) -> Dict[str, Any]:
+        """TimefoldAIオブジェクトをJSON形式に変換（時間帯・教師などの断片は授業間で共有）"""
+        return timetable_to_json(timetable)
+    
+    def solution_quality(self, timetable: TimeTable) -> Dict[str, Any]:
+        """ハード制約の違反量（ハードスコアの絶対値）と未配置の授業数"""
+        return {
+            "hard_violations": (-timetable.score.hard_score if timetable.score
+                                else count_hard_violations(timetable.lessons)),
+            "unassigned_lessons": sum(1 for l in timetable.lessons if l.timeslot is None or l.room is None)
+        }
+    
+    def convert_from_json(self, data: Dict[str, Any]) -> TimeTable:
+        """JSON形式のデータをTimefoldAIオブジェクトに変換（教師・科目・クラスは ID ごとに共有）"""
+        return timetable_from_json(data)
+    
+    def build_problem(self, data: Optional[Dict[str, Any]]) -> Tuple[TimeTable, bool]:
+        """リクエストJSONから問題を構築（previous_solution 指定時はウォームスタート）"""
+        if not data:
+            return self.generate_demo_data(), False
         
-        # デバッグ用：データベースから取得した設定をログ出力
-        print(f"📊 データベースから取得したクラス: {[sg.name for sg in student_groups]}")
-        print(f"🕒 データベースから取得した時間帯数: {len(timeslots)}")
+        if data.get("lessons") is None:
+            timetable = self.generate_demo_data()
+        else:
+            timetable = self.convert_from_json(data)
         
-        # 授業を週時間数に応じて生成
-        lessons = []
-        lesson_id = 1
+        previous_solution = data.get("previous_solution")
+        if not previous_solution:
+            return timetable, False
         
-        for student_group in student_groups:
-            for subject_data in subjects_data:
-                subject = Subject(subject_data['id'], subject_data['name'])
-                weekly_hours = subject_data.get('weekly_hours', 1)  # 週時間数を取得
-                
-                print(f"📚 科目: {subject.name} - 週{weekly_hours}時間")
-                
-                # その科目を教えられる教師を見つける
-                suitable_teachers = []
-                for teacher in teachers:
-                    teacher_data = next((t for t in teachers_data if t['id'] == teacher.id), None)
-                    if teacher_data and subject.name in teacher_data.get('subjects', []):
-                        suitable_teachers.append(teacher)
-                
-                # 適切な教師がいれば、週時間数分の授業を作成
-                if suitable_teachers:
-                    teacher = suitable_teachers[0]  # 最初の適切な教師を選択
-                    
-                    # 週時間数分だけ授業を生成
-                    for hour in range(weekly_hours):
-                        lesson = Lesson(lesson_id, subject, teacher, student_group)
-                        lessons.append(lesson)
-                        lesson_id += 1
-                        print(f"   📝 授業{hour+1}: {subject.name} - {teacher.name} - {student_group.name}")
+        self.apply_warm_start(timetable, previous_solution,
+                              pin_unchanged=data.get("pin_unchanged", True))
+        return timetable, True
+    
+    def lesson_from_json(self, l: Dict[str, Any], interner: Optional[FactInterner] = None) -> Lesson:
+        """授業JSONを未割り当てのLessonに変換"""
+        return (interner or FactInterner()).lesson(l)
+    
+    def apply_warm_start(self, timetable: TimeTable, previous_solution: Dict[str, Any],
+                         pin_unchanged: bool = True) -> Dict[str, int]:
+        """前回の解を初期値として投入し、変更のない授業を固定する（warm_start.apply_warm_start）"""
+        return apply_warm_start(timetable, previous_solution, pin_unchanged=pin_unchanged)
+    
+    def create_solver_config(self) -> SolverConfig:
+        """Timefold Solver設定を生成（同期実行・ジョブ実行で共通）"""
+        return get_solver_registry().build_solver_config()
+    
+    def explain_score(self, timetable: TimeTable) -> Dict[str, Any]:
+        """制約ごとのスコア内訳（一致件数・スコア影響・ハード違反の授業）を返す"""
+        analysis = get_solver_registry().get_solution_manager().analyze(timetable)
         
-        # 合計週時間数の計算
-        total_weekly_hours = sum(s.get('weekly_hours', 1) for s in subjects_data)
+        constraints = []
+        for constraint in analysis.constraint_analyses:
+            weight = constraint.weight
+            is_hard = (weight.hard_score != 0) if weight is not None else (constraint.score.hard_score != 0)
+            entry = {
+                "name": constraint.constraint_name,
+                "type": "hard" if is_hard else "soft",
+                "weight": str(weight) if weight is not None else None,
+                "score": str(constraint.score),
+                "match_count": constraint.match_count
+            }
+            if is_hard:
+                lesson_ids_of = self._violation_lesson_ids(constraint.constraint_name, timetable)
+                entry["violations"] = [
+                    {
+                        "lesson_ids": lesson_ids_of(match.justification.facts),
+                        "score": str(match.score)
+                    } for match in constraint.matches
+                ]
+            constraints.append(entry)
         
-        print(f"🎯 デモ用最適化データ生成完了:")
-        print(f"   📚 科目数: {len(subjects)}")
-        print(f"   👨‍🏫 教師数: {len(teachers)}")  
-        print(f"   👥 クラス数: {len(student_groups)}")
-        print(f"   📝 授業数: {len(lessons)}")
-        print(f"   ⏰ 週時間数合計: {total_weekly_hours}")
-        print(f"   🕒 時間帯数: {len(timeslots)}")
-        print(f"   🏫 教室数: {len(rooms)}")
+        # 影響の大きい制約から並べる（ハード優先）
+        constraints.sort(key=lambda c: (c["type"] != "hard", -c["match_count"]))
         
-        return TimeTable(timeslots=timeslots, rooms=rooms, lessons=lessons)
-    
-    def convert_to_json(self, timetable: TimeTable) -> Dict[str, Any]:
-        """TimefoldAIオブジェクトをJSON形式に変換"""
         return {
-            "timeslots": [
-                {
-                    "id": t.id, 
-                    "day_of_week": t.day_of_week, 
-                    "start_time": t.start_time.strftime("%H:%M"), 
-                    "end_time": t.end_time.strftime("%H:%M")
-                } for t in timetable.timeslots
-            ],
-            "rooms": [
-                {"id": r.id, "name": r.name} for r in timetable.rooms
-            ],
-            "lessons": [
-                {
-                    "id": l.id, 
-                    "subject": {"id": l.subject.id, "name": l.subject.name},
-                    "teacher": {"id": l.teacher.id, "name": l.teacher.name},
-                    "student_group": {"id": l.student_group.id, "name": l.student_group.name},
-                    "timeslot": {
-                        "id": l.timeslot.id, 
-                        "day_of_week": l.timeslot.day_of_week,
-                        "start_time": l.timeslot.start_time.strftime("%H:%M"),
-                        "end_time": l.timeslot.end_time.strftime("%H:%M")
-                    } if l.timeslot else None,
-                    "room": {"id": l.room.id, "name": l.room.name} if l.room else None
-                } for l in timetable.lessons
-            ],
-            "score": str(timetable.score) if timetable.score else "Perfect"
+            "score": str(analysis.score),
+            "feasible": analysis.score.is_feasible,
+            "constraints": constraints
         }
     
-    def convert_from_json(self, data: Dict[str, Any]) -> TimeTable:
-        """JSON形式のデータをTimefoldAIオブジェクトに変換"""
-        # Timeslotsの変換
-        timeslots = [
-            Timeslot(
-                t["id"], 
-                t["day_of_week"], 
-                time.fromisoformat(t["start_time"]), 
-                time.fromisoformat(t["end_time"])
-            ) for t in data["timeslots"]
-        ]
+    def _violation_lesson_ids(self, constraint_name: str, timetable: TimeTable):
+        """制約の一致（justification の事実）から違反している授業IDを取り出す関数を返す"""
+        group_key = GROUPED_HARD_CONSTRAINTS.get(constraint_name)
+        if group_key is None:
+            return lambda facts: [fact.id for fact in facts if isinstance(fact, Lesson)]
         
-        # Roomsの変換
-        rooms = [Room(r["id"], r["name"]) for r in data["rooms"]]
-        
-        # Lessonsの変換
-        lessons = []
-        for l in data["lessons"]:
-            subject = Subject(l["subject"]["id"], l["subject"]["name"])
-            teacher = Teacher(l["teacher"]["id"], l["teacher"]["name"])
-            student_group = StudentGroup(l["student_group"]["id"], l["student_group"]["name"])
-            
-            lesson = Lesson(l["id"], subject, teacher, student_group)
-            
-            # timeslotとroomが割り当てられている場合
-            if l.get("timeslot"):
-                lesson.timeslot = next(
-                    (ts for ts in timeslots if ts.id == l["timeslot"]["id"]), None
-                )
-            if l.get("room"):
-                lesson.room = next(
-                    (r for r in rooms if r.id == l["room"]["id"]), None
-                )
-            
-            lessons.append(lesson)
-        
-        return TimeTable(timeslots=timeslots, rooms=rooms, lessons=lessons)
+        # group_by の制約は事実が (集計キー..., 集計値...) になるため、同じキーの授業へ引き戻す
+        # （for_each と同じく、時間帯・教室が未割り当ての授業は集計に含まれない）
+        key_func, key_size = group_key
+        lesson_ids: Dict[tuple, List[int]] = {}
+        for lesson in timetable.lessons:
+            if lesson.timeslot is not None and lesson.room is not None:
+                lesson_ids.setdefault(key_func(lesson), []).append(lesson.id)
+        return lambda facts: lesson_ids.get(tuple(list(facts)[:key_size]), [])
+    
+    def create_config_override(self, timetable: TimeTable, warm_start: bool = False,
+                               max_seconds: Optional[float] = None,
+                               profile: str = DEFAULT_PROFILE) -> SolverConfigOverride:
+        """問題サイズに応じた終了条件で SolverConfig を上書き"""
+        if profile == CONSTRUCTION_PROFILE:
+            return SolverConfigOverride(termination_config=self.termination_policy.build_construction(max_seconds))
+        limits = self.termination_policy.describe(timetable, max_seconds, warm_start)
+        print(f"⏱️ 終了条件: {limits}")
+        return SolverConfigOverride(
+            termination_config=self.termination_policy.build(timetable, max_seconds, warm_start)
+        )
     
-    def optimize_timetable(self, timetable: TimeTable) -> TimeTable:
+    def resolve_move_thread_count(self, move_thread_count: Optional[str] = None) -> Optional[int]:
+        """リクエスト指定がなければシステム設定の move_thread_count を使う"""
+        if move_thread_count is None:
+            move_thread_count = self.system_config.move_thread_count
+        return resolve_move_thread_count(move_thread_count)
+    
+    def optimize_timetable(self, timetable: TimeTable, warm_start: bool = False,
+                           max_seconds: Optional[float] = None,
+                           move_thread_count: Optional[str] = None,
+                           profile: str = DEFAULT_PROFILE) -> TimeTable:
         """🎯 本格版 Timefold AI v6 で時間割を最適化"""
         try:
             print("🎯 Starting Real Timefold AI v6 optimization...")
@@ -173,23 +161,21 @@ class OptimizationService:
             print("🧠 Meta-heuristic algorithms: Tabu Search, Simulated Annealing, Hill Climbing")
             print("⚖️ Hard/Soft constraint multi-objective optimization")
             
-            # 🚀 本格版 Timefold Solver設定
-            solver_config = SolverConfig(
-                solution_class=TimeTable,
-                entity_class_list=[Lesson],
-                score_director_factory_config=ScoreDirectorFactoryConfig(
-                    constraint_provider_function=define_constraints
-                ),
-                termination_config=TerminationConfig(
-                    spent_limit=Duration(seconds=30)  # 30秒で本格最適化
-                )
-            )
-            
             print("🚀 Executing Real Timefold AI v6...")
             
-            # 🎯 本物のTimefold Solver実行
-            solver = SolverFactory.create(solver_config).build_solver()
+            original_order = {lesson.id: index for index, lesson in enumerate(timetable.lessons)}
+            if profile == CONSTRUCTION_PROFILE:
+                # FIRST_FIT は渡した順に配置するため、難しい授業を先頭に並べる（First Fit Decreasing）
+                timetable.lessons = lesson_difficulty_order(timetable)
+            
+            # 🎯 本物のTimefold Solver実行（キャッシュ済みSolverFactoryを再利用）
+            override = self.create_config_override(timetable, warm_start, max_seconds, profile)
+            thread_count = self.resolve_move_thread_count(move_thread_count)
+            solver = get_solver_registry().get_solver_factory(
+                profile, move_thread_count=thread_count).build_solver(override)
             solution = solver.solve(timetable)
+            # レスポンスはリクエストと同じ授業順で返す
+            solution.lessons.sort(key=lambda lesson: original_order[lesson.id])
             
             print(f"🎉 Real AI Optimization completed! Score: {solution.score}")
             
@@ -0,0 +1,49 @@
+"""実行中ジョブへ適用するリアルタイム問題変更（Timefold ProblemChange）"""
+from typing import List
+
+from timefold.solver import ProblemChange, ProblemChangeDirector
+
+from backend.models.timefold_models import (
+    TimeTable, Lesson, Timeslot, Room, teacher_allowed_timeslots, lesson_allowed_rooms
+)
+
+
+class AddLessonsProblemChange(ProblemChange[TimeTable]):
+    """授業を追加（未割り当てで投入し、ソルバーが配置する）"""
+
+    def __init__(self, lessons: List[Lesson], timeslots: List[Timeslot], rooms: List[Room]):
+        self.lessons = lessons
+        # 勤務条件・教室条件の判定は Python 側の問題で行い、作業中の解では ID で引き当てる
+        self.allowed_timeslot_ids = {
+            lesson.id: {ts.id for ts in teacher_allowed_timeslots(lesson.teacher, timeslots)}
+            for lesson in lessons
+        }
+        self.allowed_room_ids = {
+            lesson.id: {r.id for r in lesson_allowed_rooms(lesson.subject, lesson.student_group, rooms)}
+            for lesson in lessons
+        }
+
+    def do_change(self, working_solution: TimeTable, problem_change_director: ProblemChangeDirector):
+        for lesson in self.lessons:
+            allowed_ids = self.allowed_timeslot_ids[lesson.id]
+            lesson.allowed_timeslots = [ts for ts in working_solution.timeslots if ts.id in allowed_ids]
+            allowed_room_ids = self.allowed_room_ids[lesson.id]
+            lesson.allowed_rooms = [r for r in working_solution.rooms if r.id in allowed_room_ids]
+        for lesson in self.lessons:
+            problem_change_director.add_entity(
+                lesson, lambda working_lesson: working_solution.lessons.append(working_lesson)
+            )
+
+
+class RemoveLessonsProblemChange(ProblemChange[TimeTable]):
+    """授業IDを指定して削除"""
+
+    def __init__(self, lesson_ids: List[int]):
+        self.lesson_ids = set(lesson_ids)
+
+    def do_change(self, working_solution: TimeTable, problem_change_director: ProblemChangeDirector):
+        targets = [lesson for lesson in working_solution.lessons if lesson.id in self.lesson_ids]
+        for lesson in targets:
+            problem_change_director.remove_entity(
+                lesson, lambda working_lesson: working_solution.lessons.remove(working_lesson)
+            )
@@ -0,0 +1,88 @@
+"""ワーカーモード用のジョブサービス（Web プロセスはキューへの投入と結果参照のみ）"""
+import time
+from typing import Callable, Dict, Any, Optional
+
+from backend.services.job_queue import SQLiteJobQueue, DEFAULT_QUEUE_PATH, STATUS_QUEUED
+
+# 終了済みジョブを保持する秒数（SolverJobService と同じ）
+FINISHED_JOB_TTL_SECONDS = 3600
+
+
+class QueuedSolverJobService:
+    """SolverJobService と同じ形式で状態を返す、SQLite キュー経由のジョブサービス
+
+    JVM を起動しないため、Web ワーカーを増やしてもソルバーのメモリは増えない。
+    """
+
+    def __init__(self, queue: Optional[SQLiteJobQueue] = None, queue_path: str = DEFAULT_QUEUE_PATH,
+                 optimization_service_factory: Optional[Callable[[], Any]] = None):
+        self.queue = queue or SQLiteJobQueue(queue_path)
+        # スコア分析時だけ使う OptimizationService の生成関数（JVM の起動はここで呼ぶまで遅らせる）。
+        # API からは start_jvm() と共有リポジトリを使う new_optimization_service を渡す
+        self.optimization_service_factory = optimization_service_factory
+
+    def enqueue(self, request_data: Optional[Dict[str, Any]], options: Dict[str, Any]) -> str:
+        """リクエストJSONをそのまま投入（問題の構築はワーカー側で行う）"""
+        self.queue.purge_finished(FINISHED_JOB_TTL_SECONDS)
+        return self.queue.enqueue(request_data, options)
+
+    def get_status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        job = self.queue.get(job_id)
+        if job is None:
+            return None
+        return self._status(job)
+
+    def get_result(self, job_id: str) -> Optional[Dict[str, Any]]:
+        job = self.queue.get(job_id)
+        if job is None:
+            return None
+        status = self._status(job)
+        status["solution"] = job["solution"]
+        return status
+
+    def get_best_solution(self, job_id: str):
+        """スコア分析用に現時点のベスト解を TimeTable に変換（JVM を使う）"""
+        job = self.queue.get(job_id)
+        if job is None:
+            return None
+        if self.optimization_service_factory is not None:
+            optimization = self.optimization_service_factory()
+        else:
+            from backend.services.solver_registry import start_jvm
+            start_jvm()
+            from backend.services.optimization_service import OptimizationService
+            optimization = OptimizationService()
+        if job["solution"] is None:
+            return optimization.build_problem(job["request"])[0]
+        return optimization.convert_from_json(job["solution"])
+
+    def terminate(self, job_id: str) -> Optional[Dict[str, Any]]:
+        if not self.queue.request_cancel(job_id):
+            return None
+        print(f"🛑 ジョブ早期終了を要求: {job_id}")
+        return self.get_status(job_id)
+
+    def add_lessons(self, job_id: str, lessons) -> Optional[Dict[str, Any]]:
+        raise ValueError("ワーカーモードでは実行中ジョブへの授業追加に対応していません")
+
+    def remove_lessons(self, job_id: str, lesson_ids) -> Optional[Dict[str, Any]]:
+        raise ValueError("ワーカーモードでは実行中ジョブからの授業削除に対応していません")
+
+    def wait_for_events(self, job_id: str, after_seq: int = 0, timeout: float = 15.0):
+        raise ValueError("ワーカーモードでは改善イベントの配信に対応していません（状態APIをポーリングしてください）")
+
+    def _status(self, job: Dict[str, Any]) -> Dict[str, Any]:
+        end = job["finished_at"] or time.time()
+        return {
+            "job_id": job["job_id"],
+            "status": job["status"],
+            "score": job["score"],
+            "elapsed_seconds": round(end - job["submitted_at"], 3),
+            "best_found_seconds": (
+                round(job["best_found_at"] - job["submitted_at"], 3) if job["best_found_at"] else None
+            ),
+            "terminated_early": job["terminated_early"],
+            "queued": job["status"] == STATUS_QUEUED,
+            "attempts": job["attempts"],
+            "error": job["error"]
+        }
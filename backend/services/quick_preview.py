@@ -0,0 +1,181 @@
+"""⚡ クイックプレビュー: JVM を使わず First Fit Decreasing だけで大まかな時間割を返す
+
+Timefold のドメインクラスは import すると JVM が起動するため、ここでは同じ属性名の軽量オブジェクトに
+変換して construction_heuristic・warm_start をそのまま使う。JVM の起動前やソルバーが使えない
+環境でも、カスタマイズ画面のプレビューは即座に応答できる。
+"""
+from collections import namedtuple
+from dataclasses import dataclass, field
+from datetime import time
+from typing import Dict, Any, List, Optional, Tuple
+
+from backend.models.database import DataRepository
+from backend.models.scheduling_rules import (
+    DAY_INDEX, teacher_allowed_timeslots, lesson_allowed_rooms, require_value_ranges
+)
+from backend.services.construction_heuristic import first_fit_decreasing, count_hard_violations
+from backend.services.demo_problem import build_demo_problem
+from backend.services.warm_start import apply_warm_start
+
+# Timefold の Subject / Teacher / StudentGroup / Room と同じ属性（フィールド順は解JSONのキー順）
+PreviewSubject = namedtuple("PreviewSubject", "id name required_equipment")
+PreviewTeacher = namedtuple("PreviewTeacher",
+                            "id name available_days available_hours unavailable_times max_daily_lessons")
+PreviewStudentGroup = namedtuple("PreviewStudentGroup", "id name student_count")
+PreviewRoom = namedtuple("PreviewRoom", "id name capacity equipment")
+
+
+@dataclass(eq=False)
+class PreviewTimeslot:
+    """時間帯（Timefold の Timeslot と同じく週の始まりからの分を持つ）"""
+    id: int
+    day_of_week: str
+    start_time: time
+    end_time: time
+    minute_of_week: int = field(default=0)
+
+    def __post_init__(self):
+        day_index = DAY_INDEX.get(self.day_of_week.upper(), DAY_INDEX.get(self.day_of_week))
+        if day_index is None:
+            raise ValueError(f"不明な曜日です: {self.day_of_week}")
+        self.minute_of_week = day_index * 24 * 60 + self.start_time.hour * 60 + self.start_time.minute
+
+
+@dataclass(eq=False)
+class PreviewLesson:
+    """授業（配置と値域を持つ。値域リストは教師・教室条件ごとに共有）"""
+    id: int
+    subject: PreviewSubject
+    teacher: PreviewTeacher
+    student_group: PreviewStudentGroup
+    allowed_timeslots: List[PreviewTimeslot]
+    allowed_rooms: List[PreviewRoom]
+    timeslot: Optional[PreviewTimeslot] = None
+    room: Optional[PreviewRoom] = None
+    pinned: bool = False
+
+
+@dataclass(eq=False)
+class PreviewTimetable:
+    """TimeTable と同じ属性（時間帯・教室・授業）を持つ問題"""
+    timeslots: List[PreviewTimeslot]
+    rooms: List[PreviewRoom]
+    lessons: List[PreviewLesson]
+
+
+def preview_timetable_from_json(data: Dict[str, Any]) -> PreviewTimetable:
+    """/api/optimize 形式のJSONを変換（教師・科目・クラスは ID ごとに共有、値域は TimeTable と同じ規則）"""
+    require_value_ranges(data["timeslots"], data["rooms"])
+    timeslots = [
+        PreviewTimeslot(t["id"], t["day_of_week"], time.fromisoformat(t["start_time"]),
+                        time.fromisoformat(t["end_time"]))
+        for t in data["timeslots"]
+    ]
+    rooms = [PreviewRoom(r["id"], r["name"], r.get("capacity") or 0, list(r.get("equipment") or []))
+             for r in data["rooms"]]
+    timeslots_by_id = {ts.id: ts for ts in timeslots}
+    rooms_by_id = {r.id: r for r in rooms}
+
+    subjects: Dict[Any, PreviewSubject] = {}
+    teachers: Dict[Any, PreviewTeacher] = {}
+    student_groups: Dict[Any, PreviewStudentGroup] = {}
+    allowed_by_teacher: Dict[Any, List[PreviewTimeslot]] = {}
+    allowed_by_requirement: Dict[Tuple, List[PreviewRoom]] = {}
+
+    lessons = []
+    for l in data["lessons"]:
+        s, t, sg = l["subject"], l["teacher"], l["student_group"]
+        subject = subjects.get(s["id"])
+        if subject is None:
+            subject = subjects[s["id"]] = PreviewSubject(s["id"], s["name"], list(s.get("required_equipment") or []))
+        teacher = teachers.get(t["id"])
+        if teacher is None:
+            teacher = teachers[t["id"]] = PreviewTeacher(
+                t["id"], t["name"], list(t.get("available_days") or []), list(t.get("available_hours") or []),
+                list(t.get("unavailable_times") or []), t.get("max_daily_lessons") or 0)
+        student_group = student_groups.get(sg["id"])
+        if student_group is None:
+            student_group = student_groups[sg["id"]] = PreviewStudentGroup(
+                sg["id"], sg["name"], sg.get("student_count") or 0)
+
+        allowed_timeslots = allowed_by_teacher.get(teacher.id)
+        if allowed_timeslots is None:
+            allowed_timeslots = allowed_by_teacher[teacher.id] = teacher_allowed_timeslots(teacher, timeslots)
+        key = (student_group.student_count, tuple(sorted(subject.required_equipment)))
+        allowed_rooms = allowed_by_requirement.get(key)
+        if allowed_rooms is None:
+            allowed_rooms = allowed_by_requirement[key] = lesson_allowed_rooms(subject, student_group, rooms)
+
+        lesson = PreviewLesson(l["id"], subject, teacher, student_group, allowed_timeslots, allowed_rooms)
+        if l.get("timeslot"):
+            lesson.timeslot = timeslots_by_id.get(l["timeslot"]["id"])
+        if l.get("room"):
+            lesson.room = rooms_by_id.get(l["room"]["id"])
+        # 固定指定は割り当て済みの授業のみ有効
+        lesson.pinned = bool(l.get("pinned")) and lesson.timeslot is not None and lesson.room is not None
+        lessons.append(lesson)
+
+    return PreviewTimetable(timeslots=timeslots, rooms=rooms, lessons=lessons)
+
+
+def build_preview_problem(data: Optional[Dict[str, Any]],
+                          repository: DataRepository) -> Tuple[PreviewTimetable, bool]:
+    """OptimizationService.build_problem と同じ規則で問題を構築（previous_solution 指定時はウォームスタート）"""
+    if not data or data.get("lessons") is None:
+        repository.refresh()
+        timetable = preview_timetable_from_json(build_demo_problem(repository))
+    else:
+        timetable = preview_timetable_from_json(data)
+
+    previous_solution = (data or {}).get("previous_solution")
+    if not previous_solution:
+        return timetable, False
+    apply_warm_start(timetable, previous_solution, pin_unchanged=data.get("pin_unchanged", True))
+    return timetable, True
+
+
+def _timeslot_json(ts: PreviewTimeslot) -> Dict[str, Any]:
+    return {"id": ts.id, "day_of_week": ts.day_of_week,
+            "start_time": ts.start_time.strftime("%H:%M"), "end_time": ts.end_time.strftime("%H:%M")}
+
+
+def preview_timetable(timetable: PreviewTimetable) -> Dict[str, Any]:
+    """未配置の授業を First Fit Decreasing で配置し、/api/optimize と同じ形式の解JSONを返す
+
+    ソフトスコアは計算しない（score は "-Nhard/*soft"、N はハード制約の違反量）。
+    授業内の時間帯・教師などは授業間で同じ dict を共有するため、書き換えないこと。
+    """
+    first_fit_decreasing(timetable)
+    hard_violations = count_hard_violations(timetable.lessons)
+
+    fragments: Dict[int, Dict[str, Any]] = {}
+
+    def fragment(obj, to_json) -> Optional[Dict[str, Any]]:
+        if obj is None:
+            return None
+        value = fragments.get(id(obj))
+        if value is None:
+            value = fragments[id(obj)] = to_json(obj)
+        return value
+
+    def lesson_room_json(room: PreviewRoom) -> Dict[str, Any]:
+        return {"id": room.id, "name": room.name}
+
+    return {
+        "timeslots": [dict(fragment(ts, _timeslot_json)) for ts in timetable.timeslots],
+        "rooms": [r._asdict() for r in timetable.rooms],
+        "lessons": [
+            {
+                "id": l.id,
+                "subject": fragment(l.subject, PreviewSubject._asdict),
+                "teacher": fragment(l.teacher, PreviewTeacher._asdict),
+                "student_group": fragment(l.student_group, PreviewStudentGroup._asdict),
+                "timeslot": fragment(l.timeslot, _timeslot_json),
+                "room": fragment(l.room, lesson_room_json),
+                "pinned": l.pinned
+            } for l in timetable.lessons
+        ],
+        "score": f"{-hard_violations}hard/*soft",
+        "hard_violations": hard_violations,
+        "unassigned_lessons": sum(1 for l in timetable.lessons if l.timeslot is None or l.room is None)
+    }
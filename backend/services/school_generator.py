@@ -0,0 +1,351 @@
+"""負荷試験用の学校データ生成（シード固定で再現可能）"""
+import json
+import math
+import os
+import random
+from collections import Counter, namedtuple
+from dataclasses import dataclass, field
+from datetime import time
+from typing import Dict, Any, List, Optional
+
+from backend.models.data_models import Subject, Teacher, TimeSlot, StudentGroup, Room
+from backend.models.scheduling_rules import teacher_allowed_timeslots
+
+WEEKDAYS = ["MONDAY", "TUESDAY", "WEDNESDAY", "THURSDAY", "FRIDAY"]
+
+# 科目マスタ: 名前 -> (コード, カテゴリ, 必要設備)
+SUBJECT_CATALOG: Dict[str, tuple] = {
+    "国語": ("JPN", "language", []),
+    "数学": ("MATH", "science", []),
+    "英語": ("ENG", "language", []),
+    "理科": ("SCI", "science", ["実験台"]),
+    "社会": ("SOC", "general", []),
+    "音楽": ("MUS", "arts", ["ピアノ"]),
+    "美術": ("ART", "arts", ["画材"]),
+    "保健体育": ("PE", "sports", ["体育館"]),
+    "技術家庭": ("TECH", "general", ["PC"]),
+    "情報": ("INFO", "science", ["PC"]),
+}
+
+# カリキュラム名 -> 科目ごとの週時間数
+DEFAULT_CURRICULA: Dict[str, Dict[str, int]] = {
+    "普通科": {"国語": 4, "数学": 4, "英語": 4, "理科": 3, "社会": 3,
+              "音楽": 1, "美術": 1, "保健体育": 3, "技術家庭": 2},
+    "理数科": {"国語": 3, "数学": 6, "英語": 4, "理科": 5, "社会": 2,
+              "保健体育": 3, "情報": 2},
+    "国際科": {"国語": 4, "数学": 3, "英語": 7, "理科": 2, "社会": 4,
+              "音楽": 1, "保健体育": 3, "情報": 1},
+}
+
+# 同じカテゴリ内で兼任しやすい科目
+SECONDARY_QUALIFICATIONS: Dict[str, List[str]] = {
+    "国語": ["社会"], "社会": ["国語"], "数学": ["理科", "情報"], "理科": ["数学"],
+    "英語": ["国語"], "音楽": ["美術"], "美術": ["音楽", "技術家庭"],
+    "保健体育": [], "技術家庭": ["情報"], "情報": ["数学", "技術家庭"],
+}
+
+# 設備 -> 特別教室名
+SPECIAL_ROOMS: Dict[str, str] = {
+    "実験台": "理科室", "ピアノ": "音楽室", "画材": "美術室", "体育館": "体育館", "PC": "PC室",
+}
+
+# scheduling_rules の値域計算に渡す時間帯（開始・終了を time で持つ）
+_Slot = namedtuple("_Slot", "id day_of_week start_time end_time")
+
+
+def teacher_capacity(teacher: Teacher, timeslots: List[TimeSlot]) -> int:
+    """教師が週に担当できる授業数の上限（勤務可能な時間帯数。1日の上限があれば曜日ごとに頭打ち）"""
+    slots = [_Slot(ts.id, ts.day_of_week, time.fromisoformat(ts.start_time), time.fromisoformat(ts.end_time))
+             for ts in timeslots]
+    per_day = Counter(ts.day_of_week for ts in teacher_allowed_timeslots(teacher, slots))
+    limit = teacher.max_daily_lessons
+    return sum(min(count, limit) if limit > 0 else count for count in per_day.values())
+
+
+@dataclass
+class SchoolGeneratorConfig:
+    """学校規模・カリキュラム・教員構成の生成パラメータ"""
+    seed: int = 0
+    grades: int = 3
+    classes_per_grade: int = 4
+    curricula: Dict[str, Dict[str, int]] = field(default_factory=lambda: dict(DEFAULT_CURRICULA))
+    days: List[str] = field(default_factory=lambda: list(WEEKDAYS))
+    periods_per_day: int = 6
+    # 何限目の後に昼休みを入れるか
+    lunch_after_period: int = 4
+    # 週時間数の揺らぎ（±この値の範囲で科目ごとに増減）
+    weekly_hours_jitter: int = 1
+    # 教師1人あたりの目標担当時間
+    target_teacher_hours: int = 18
+    # 2科目目の免許を持つ教師の割合
+    multi_qualification_ratio: float = 0.3
+    # 非常勤教師の割合（勤務曜日・時間帯が限られる）
+    part_time_ratio: float = 0.2
+    # 常勤教師に不在時間帯を設定する割合
+    unavailable_ratio: float = 0.2
+    students_per_class: int = 35
+    # 特別教室の目標稼働率（設備ごとの教室数をこの稼働率に収まるよう決める）
+    special_room_utilization: float = 0.8
+
+
+class SchoolGenerator:
+    """subjects.json / teachers.json と同じ形式の学校データと TimeTable を生成"""
+
+    def __init__(self, config: Optional[SchoolGeneratorConfig] = None):
+        self.config = config or SchoolGeneratorConfig()
+
+    def generate(self) -> Dict[str, Any]:
+        """学校データ一式を生成（lessons 等は /api/demo-data と同じ形式）"""
+        rng = random.Random(self.config.seed)
+
+        timeslots = self._generate_timeslots()
+        subjects = self._generate_subjects()
+        student_groups = self._generate_student_groups(rng)
+        hours = self._generate_weekly_hours(rng, student_groups)
+        teachers = self._generate_teachers(rng, hours)
+        rooms = self._generate_rooms(student_groups, subjects, hours)
+        lessons = self._generate_lessons(rng, hours, subjects, teachers, student_groups, timeslots)
+
+        school = {
+            "subjects": [s.to_dict() for s in subjects],
+            "teachers": [t.to_dict() for t in teachers],
+            "student_groups": [g.to_dict() for g in student_groups],
+            "timeslots": [ts.to_dict() for ts in timeslots],
+            "rooms": rooms,
+            "lessons": lessons,
+        }
+        print(f"🏫 学校データ生成: {len(student_groups)}クラス, {len(teachers)}教師, "
+              f"{len(rooms)}教室, {len(lessons)}授業 (seed={self.config.seed})")
+        return school
+
+    def to_timetable(self, school: Dict[str, Any]):
+        """生成データを TimeTable に変換（教師・クラスは共有オブジェクトにする）"""
+        from backend.models.timefold_models import (
+            TimeTable, Lesson, Timeslot, Room, Subject as TFSubject, Teacher as TFTeacher,
+            StudentGroup as TFStudentGroup
+        )
+
+        timeslots = [
+            Timeslot(ts["id"], ts["day_of_week"],
+                     time.fromisoformat(ts["start_time"]), time.fromisoformat(ts["end_time"]))
+            for ts in school["timeslots"]
+        ]
+        rooms = [Room(r["id"], r["name"], capacity=r["capacity"], equipment=r["equipment"])
+                 for r in school["rooms"]]
+        subjects = {
+            s["id"]: TFSubject(s["id"], s["name"], required_equipment=s["required_equipment"])
+            for s in school["subjects"]
+        }
+        teachers = {
+            t["id"]: TFTeacher(t["id"], t["name"], available_days=t["available_days"],
+                               available_hours=t["available_hours"], unavailable_times=t["unavailable_times"],
+                               max_daily_lessons=t["max_daily_lessons"])
+            for t in school["teachers"]
+        }
+        groups = {
+            g["id"]: TFStudentGroup(g["id"], g["name"], student_count=g["student_count"])
+            for g in school["student_groups"]
+        }
+
+        lessons = [
+            Lesson(l["id"], subjects[l["subject"]["id"]], teachers[l["teacher"]["id"]],
+                   groups[l["student_group"]["id"]])
+            for l in school["lessons"]
+        ]
+        return TimeTable(timeslots=timeslots, rooms=rooms, lessons=lessons)
+
+    def write_json(self, school: Dict[str, Any], output_dir: str):
+        """データ種別ごとに JSON ファイルへ保存"""
+        os.makedirs(output_dir, exist_ok=True)
+        for name, records in school.items():
+            with open(os.path.join(output_dir, f"{name}.json"), 'w', encoding='utf-8') as f:
+                json.dump(records, f, ensure_ascii=False, indent=2)
+        print(f"💾 学校データ保存: {output_dir}")
+
+    def _generate_timeslots(self) -> List[TimeSlot]:
+        timeslots = []
+        for day in self.config.days:
+            start_minutes = 8 * 60 + 50
+            for period in range(1, self.config.periods_per_day + 1):
+                end_minutes = start_minutes + 50
+                timeslots.append(TimeSlot(
+                    id=len(timeslots) + 1,
+                    day_of_week=day,
+                    start_time=f"{start_minutes // 60:02d}:{start_minutes % 60:02d}",
+                    end_time=f"{end_minutes // 60:02d}:{end_minutes % 60:02d}",
+                    period_name=f"{period}限"
+                ))
+                # 休み時間10分、昼休み50分
+                start_minutes = end_minutes + (50 if period == self.config.lunch_after_period else 10)
+        return timeslots
+
+    def _generate_subjects(self) -> List[Subject]:
+        names = []
+        for curriculum in self.config.curricula.values():
+            names.extend(name for name in curriculum if name not in names)
+
+        subjects = []
+        for subject_id, name in enumerate(names, start=1):
+            code, category, equipment = SUBJECT_CATALOG.get(name, (name.upper(), "general", []))
+            weekly_hours = max(c.get(name, 0) for c in self.config.curricula.values())
+            subjects.append(Subject(
+                id=subject_id, name=name, code=code, description=f"{name}の授業",
+                required_equipment=list(equipment), category=category,
+                weekly_hours=weekly_hours
+            ))
+        return subjects
+
+    def _generate_student_groups(self, rng: random.Random) -> List[StudentGroup]:
+        curriculum_names = list(self.config.curricula.keys())
+        groups = []
+        for grade in range(1, self.config.grades + 1):
+            for index in range(self.config.classes_per_grade):
+                letter = chr(ord("A") + index) if index < 26 else str(index + 1)
+                # 先頭クラスは普通科、残りはカリキュラムを順に割り当て
+                curriculum = curriculum_names[index % len(curriculum_names)]
+                groups.append(StudentGroup(
+                    id=len(groups) + 1,
+                    name=f"{grade}年{letter}組",
+                    grade=grade,
+                    class_letter=letter,
+                    student_count=self.config.students_per_class - rng.randint(0, 5),
+                    curriculum=[curriculum]
+                ))
+        return groups
+
+    def _generate_weekly_hours(self, rng: random.Random,
+                               groups: List[StudentGroup]) -> Dict[int, Dict[str, int]]:
+        """クラスごとの科目別週時間数（時間帯数を超えないよう調整）"""
+        slot_count = len(self.config.days) * self.config.periods_per_day
+        jitter = self.config.weekly_hours_jitter
+        hours: Dict[int, Dict[str, int]] = {}
+        for group in groups:
+            base = self.config.curricula[group.curriculum[0]]
+            group_hours = {name: max(1, h + rng.randint(-jitter, jitter)) for name, h in base.items()}
+            # 時間帯数を超える分は時間数の多い科目から削る
+            while sum(group_hours.values()) > slot_count:
+                largest = max(group_hours, key=group_hours.get)
+                group_hours[largest] -= 1
+            hours[group.id] = group_hours
+        return hours
+
+    def _generate_teachers(self, rng: random.Random, hours: Dict[int, Dict[str, int]]) -> List[Teacher]:
+        demand: Dict[str, int] = {}
+        for group_hours in hours.values():
+            for name, h in group_hours.items():
+                demand[name] = demand.get(name, 0) + h
+
+        teachers = []
+        for name, total_hours in demand.items():
+            for _ in range(max(1, math.ceil(total_hours / self.config.target_teacher_hours))):
+                teacher_id = len(teachers) + 1
+                qualifications = [name]
+                secondary = [s for s in SECONDARY_QUALIFICATIONS.get(name, []) if s in demand]
+                if secondary and rng.random() < self.config.multi_qualification_ratio:
+                    qualifications.append(rng.choice(secondary))
+
+                teacher = self._new_teacher(teacher_id, qualifications)
+                if rng.random() < self.config.part_time_ratio:
+                    teacher.employment_type = "part_time"
+                    teacher.available_days = sorted(
+                        rng.sample(self.config.days, k=min(len(self.config.days), rng.randint(3, 4))),
+                        key=self.config.days.index
+                    )
+                    teacher.available_hours = [rng.choice(["08:50-12:40", "08:50-15:20", "10:50-16:20"])]
+                    teacher.max_daily_lessons = 4
+                    teacher.max_weekly_hours = 15
+                elif rng.random() < self.config.unavailable_ratio:
+                    teacher.unavailable_times = [rng.choice(["08:50-09:40", "14:30-16:20"])]
+                teachers.append(teacher)
+        return teachers
+
+    def _new_teacher(self, teacher_id: int, qualifications: List[str]) -> Teacher:
+        """常勤教師（勤務条件の制限なし）"""
+        return Teacher(
+            id=teacher_id, name=f"教師{teacher_id}", email=f"teacher{teacher_id}@school.jp",
+            subjects=qualifications, max_weekly_hours=self.config.target_teacher_hours + 6
+        )
+
+    def _generate_rooms(self, groups: List[StudentGroup], subjects: List[Subject],
+                        hours: Dict[int, Dict[str, int]]) -> List[Dict[str, Any]]:
+        """ホームルーム教室（クラス数分）と、週の需要に見合う数の特別教室"""
+        rooms = [
+            Room(id=group.id, name=f"{group.name}教室", capacity=40)
+            for group in groups
+        ]
+        demand: Dict[str, int] = {}
+        for subject in subjects:
+            subject_hours = sum(h.get(subject.name, 0) for h in hours.values())
+            for equipment in subject.required_equipment:
+                demand[equipment] = demand.get(equipment, 0) + subject_hours
+
+        slot_count = len(self.config.days) * self.config.periods_per_day
+        for equipment, total_hours in demand.items():
+            count = max(1, math.ceil(total_hours / (slot_count * self.config.special_room_utilization)))
+            base_name = SPECIAL_ROOMS.get(equipment, f"{equipment}室")
+            for index in range(count):
+                rooms.append(Room(
+                    id=len(rooms) + 1,
+                    name=base_name if count == 1 else f"第{index + 1}{base_name}",
+                    capacity=40,
+                    equipment=[equipment],
+                    room_type="special"
+                ))
+        return [r.to_dict() for r in rooms]
+
+    def _generate_lessons(self, rng: random.Random, hours: Dict[int, Dict[str, int]],
+                          subjects: List[Subject], teachers: List[Teacher],
+                          groups: List[StudentGroup], timeslots: List[TimeSlot]) -> List[Dict[str, Any]]:
+        """クラス×科目ごとに、担当可能で負荷の最も低い教師へ週時間数分の授業を割り当て
+
+        勤務可能な枠（teacher_capacity）を超える教師には割り当てない。担当できる教師が
+        いなければ常勤教師を追加する（teachers に追加される）。非常勤教師に勤務できない量の授業が
+        割り当てられ、負荷試験の学校が 0hard に到達できなくなるのを防ぐ。
+        """
+        subjects_by_name = {s.name: s for s in subjects}
+        load = {t.id: 0 for t in teachers}
+        capacity = {t.id: teacher_capacity(t, timeslots) for t in teachers}
+        qualified: Dict[str, List[Teacher]] = {}
+        for teacher in teachers:
+            for name in teacher.subjects:
+                qualified.setdefault(name, []).append(teacher)
+
+        lessons = []
+        for group in groups:
+            for name, weekly_hours in hours[group.id].items():
+                candidates = [t for t in qualified[name] if load[t.id] + weekly_hours <= capacity[t.id]]
+                if candidates:
+                    # 同負荷の教師が複数いる場合の選択もシードで決定的にする
+                    teacher = min(candidates, key=lambda t: (load[t.id] / t.max_weekly_hours, rng.random()))
+                else:
+                    teacher = self._new_teacher(len(teachers) + 1, [name])
+                    teachers.append(teacher)
+                    qualified[name].append(teacher)
+                    load[teacher.id] = 0
+                    capacity[teacher.id] = teacher_capacity(teacher, timeslots)
+                    print(f"👩‍🏫 {name}の担当枠が足りないため{teacher.name}を追加")
+                load[teacher.id] += weekly_hours
+                subject = subjects_by_name[name]
+                for _ in range(weekly_hours):
+                    lessons.append({
+                        "id": len(lessons) + 1,
+                        "subject": {"id": subject.id, "name": subject.name,
+                                    "required_equipment": subject.required_equipment},
+                        "teacher": {
+                            "id": teacher.id, "name": teacher.name,
+                            "available_days": teacher.available_days,
+                            "available_hours": teacher.available_hours,
+                            "unavailable_times": teacher.unavailable_times,
+                            "max_daily_lessons": teacher.max_daily_lessons
+                        },
+                        "student_group": {"id": group.id, "name": group.name,
+                                          "student_count": group.student_count},
+                        "timeslot": None,
+                        "room": None
+                    })
+        return lessons
+
+
+def generate_school(seed: int = 0, **overrides) -> Dict[str, Any]:
+    """設定値を上書きして学校データを生成"""
+    return SchoolGenerator(SchoolGeneratorConfig(seed=seed, **overrides)).generate()
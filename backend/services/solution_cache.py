@@ -0,0 +1,175 @@
+"""同一問題の再最適化を省くための解キャッシュ（問題内容のハッシュをキーにする）"""
+import copy
+import hashlib
+import importlib.util
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Optional
+
+DEFAULT_MAX_ENTRIES = 128
+
+# キャッシュする解を決めるソース（制約・値域条件、プレビューの構築処理、ソルバープロファイルと終了条件）
+FINGERPRINT_MODULES = (
+    "backend.models.timefold_models",
+    "backend.models.scheduling_rules",
+    "backend.services.construction_heuristic",
+    "backend.services.quick_preview",
+    "backend.services.solver_registry",
+    "backend.services.termination_policy",
+)
+FINGERPRINT_FILES = (
+    os.path.join(os.path.dirname(__file__), "..", "config", "solverConfig.xml"),
+)
+
+
+def _constraint_fingerprint() -> str:
+    """制約定義・プレビュー・ソルバー設定のソースから算出した指紋。いずれかを変更すると既存キャッシュは無効になる"""
+    digest = hashlib.sha256()
+    # モジュールを import すると JVM が起動するため、ファイルの場所だけ解決する
+    paths = [importlib.util.find_spec(module).origin for module in FINGERPRINT_MODULES]
+    for path in [*paths, *FINGERPRINT_FILES]:
+        with open(path, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+
+class SolutionCache:
+    """メモリ上の LRU と任意のディスク層からなる解キャッシュ"""
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, cache_dir: Optional[str] = None):
+        self.max_entries = max_entries
+        self.cache_dir = cache_dir
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._constraint_fingerprint = _constraint_fingerprint()
+        self.hits = 0
+        self.misses = 0
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def make_key(self, timetable, profile: str, options: Optional[Dict[str, Any]] = None) -> str:
+        """問題の正規化表現（授業・時間帯・教室・値域条件・固定配置・制約・プロファイル・終了条件）のハッシュ
+
+        キャッシュした解JSONには教師・科目・クラスの名前も入るため、名前もキーに含める
+        （/customize で名前を変えた後に古い名前の解を返さない）。
+        """
+        canonical = {
+            "lessons": sorted(
+                [
+                    l.id, l.subject.id, l.teacher.id, l.student_group.id,
+                    # 固定された授業は配置も問題の一部
+                    [l.timeslot.id, l.room.id] if l.pinned else None
+                ] for l in timetable.lessons
+            ),
+            "timeslots": sorted(
+                [ts.id, ts.day_of_week, ts.start_time.isoformat(), ts.end_time.isoformat()]
+                for ts in timetable.timeslots
+            ),
+            "rooms": sorted([r.id, r.name, r.capacity, sorted(r.equipment)] for r in timetable.rooms),
+            # 値域（勤務条件・教室条件）を決める属性と、解JSONに出力される名前
+            "teachers": sorted({
+                (l.teacher.id, l.teacher.name, tuple(l.teacher.available_days), tuple(l.teacher.available_hours),
+                 tuple(l.teacher.unavailable_times), l.teacher.max_daily_lessons)
+                for l in timetable.lessons
+            }),
+            "subjects": sorted({(l.subject.id, l.subject.name, tuple(sorted(l.subject.required_equipment)))
+                                for l in timetable.lessons}),
+            "student_groups": sorted({(l.student_group.id, l.student_group.name, l.student_group.student_count)
+                                      for l in timetable.lessons}),
+            "constraints": self._constraint_fingerprint,
+            "profile": profile,
+            "max_seconds": (options or {}).get("max_seconds"),
+        }
+        payload = json.dumps(canonical, ensure_ascii=False, separators=(",", ":"))
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """キャッシュ済みの解JSON（呼び出し側で変更してもよいようコピーを返す）"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return copy.deepcopy(entry)
+
+        entry = self._read_disk(key)
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._put_memory(key, entry)
+        return copy.deepcopy(entry)
+
+    def put(self, key: str, result: Dict[str, Any]):
+        """解JSONを保存"""
+        entry = copy.deepcopy(result)
+        with self._lock:
+            self._put_memory(key, entry)
+        self._write_disk(key, entry)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "disk": self.cache_dir
+        }
+
+    def _put_memory(self, key: str, entry: Dict[str, Any]):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def _read_disk(self, key: str) -> Optional[Dict[str, Any]]:
+        if not self.cache_dir:
+            return None
+        try:
+            with open(self._disk_path(key), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_disk(self, key: str, entry: Dict[str, Any]):
+        if not self.cache_dir:
+            return
+        tmp_path = None
+        try:
+            # 書きかけのファイルを読まれないよう一時ファイル経由で置き換える（名前はスレッド間でも重ならない）
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, prefix=f".{key}.", suffix=".tmp")
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(entry, f, ensure_ascii=False)
+            os.replace(tmp_path, self._disk_path(key))
+        except OSError as e:
+            print(f"⚠️ 解キャッシュのディスク書き込み失敗: {e}")
+            if tmp_path is not None and os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+
+
+_solution_cache: Optional[SolutionCache] = None
+_solution_cache_lock = threading.Lock()
+
+
+def get_solution_cache() -> SolutionCache:
+    """解キャッシュのシングルトン取得（SOLUTION_CACHE_DIR 指定時はディスク層も使う）"""
+    global _solution_cache
+    if _solution_cache is None:
+        with _solution_cache_lock:
+            if _solution_cache is None:
+                _solution_cache = SolutionCache(
+                    max_entries=int(os.environ.get("SOLUTION_CACHE_SIZE", DEFAULT_MAX_ENTRIES)),
+                    cache_dir=os.environ.get("SOLUTION_CACHE_DIR") or None
+                )
+    return _solution_cache
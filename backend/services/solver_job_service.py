@@ -0,0 +1,252 @@
+"""非同期ソルバージョブ管理サービス（Timefold SolverManager ベース）"""
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Dict, Any, List, Optional, Tuple
+
+from timefold.solver import SolverManager, SolverStatus
+from timefold.solver.config import SolverManagerConfig
+
+from backend.models.timefold_models import TimeTable
+from backend.services.optimization_service import OptimizationService
+from backend.services.problem_changes import AddLessonsProblemChange, RemoveLessonsProblemChange
+from backend.services.solver_registry import get_solver_registry
+
+# 終了済みジョブを保持する秒数（ポーリング用に結果を残す）
+FINISHED_JOB_TTL_SECONDS = 3600
+
+
+@dataclass
+class SolverJobRecord:
+    """1件のソルバージョブの状態"""
+    job_id: str
+    submitted_at: float
+    problem: TimeTable
+    best_solution: Optional[TimeTable] = None
+    best_score: Optional[str] = None
+    best_found_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    terminated_early: bool = False
+    move_thread_count: Optional[int] = None
+    error: Optional[str] = None
+    # 前回イベント時点の割り当て（lesson_id -> (timeslot_id, room_id)）と差分イベント列
+    assignments: Dict[int, Tuple[Optional[int], Optional[int]]] = field(default_factory=dict)
+    events: List[Dict[str, Any]] = field(default_factory=list)
+    changed: threading.Condition = field(default_factory=threading.Condition)
+
+
+class SolverJobService:
+    """SolverManager で時間割最適化をバックグラウンド実行するサービス"""
+
+    def __init__(self, optimization_service: Optional[OptimizationService] = None):
+        self.optimization_service = optimization_service or OptimizationService()
+        # move_thread_count ごとに SolverManager を用意（ジョブIDから引けるよう記録する）
+        self._solver_managers: Dict[Optional[int], SolverManager] = {}
+        self._jobs: Dict[str, SolverJobRecord] = {}
+        self._lock = threading.Lock()
+        self._manager_lock = threading.Lock()
+
+    def submit(self, timetable: TimeTable, warm_start: bool = False,
+               max_seconds: Optional[float] = None,
+               move_thread_count: Optional[str] = None) -> str:
+        """問題を投入し、すぐにジョブIDを返す"""
+        self._purge_finished_jobs()
+
+        job_id = uuid.uuid4().hex
+        thread_count = self.optimization_service.resolve_move_thread_count(move_thread_count)
+        record = SolverJobRecord(job_id=job_id, submitted_at=time.time(), problem=timetable,
+                                 move_thread_count=thread_count)
+        with self._lock:
+            self._jobs[job_id] = record
+
+        override = self.optimization_service.create_config_override(timetable, warm_start, max_seconds)
+        (self._get_solver_manager(thread_count).solve_builder()
+            .with_problem_id(job_id)
+            .with_problem(timetable)
+            .with_config_override(override)
+            .with_best_solution_consumer(lambda solution: self._on_best_solution(job_id, solution))
+            .with_final_best_solution_consumer(lambda solution: self._on_final_solution(job_id, solution))
+            .with_exception_handler(lambda problem_id, error: self._on_error(job_id, error))
+            .run())
+
+        print(f"🚀 ソルバージョブ投入: {job_id} ({len(timetable.lessons)}授業)")
+        return job_id
+
+    def get_status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """ジョブの状態（スコア・経過時間）を返す"""
+        record = self._get_record(job_id)
+        if record is None:
+            return None
+
+        end = record.finished_at or time.time()
+        return {
+            "job_id": job_id,
+            "status": self._solver_status(record),
+            "score": record.best_score,
+            "elapsed_seconds": round(end - record.submitted_at, 3),
+            "best_found_seconds": (
+                round(record.best_found_at - record.submitted_at, 3) if record.best_found_at else None
+            ),
+            "terminated_early": record.terminated_early,
+            "error": record.error
+        }
+
+    def get_result(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """状態に加えて現時点のベスト解（未取得なら投入時の問題）を返す"""
+        status = self.get_status(job_id)
+        if status is None:
+            return None
+
+        status["solution"] = self.optimization_service.convert_to_json(self.get_best_solution(job_id))
+        return status
+
+    def get_best_solution(self, job_id: str) -> Optional[TimeTable]:
+        """現時点のベスト解（未取得なら投入時の問題）"""
+        record = self._get_record(job_id)
+        if record is None:
+            return None
+        return record.best_solution or record.problem
+
+    def wait_for_events(self, job_id: str, after_seq: int = 0,
+                        timeout: float = 15.0) -> Optional[Tuple[List[Dict[str, Any]], bool]]:
+        """after_seq より後の改善イベントを待って返す（タイムアウト時は空リスト）
+        
+        戻り値は (イベント列, ジョブ終了済みか)。
+        """
+        record = self._get_record(job_id)
+        if record is None:
+            return None
+
+        with record.changed:
+            record.changed.wait_for(
+                lambda: len(record.events) > after_seq or record.finished_at is not None, timeout
+            )
+            return record.events[after_seq:], record.finished_at is not None
+
+    def terminate(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """実行中のジョブを早期終了させる"""
+        record = self._get_record(job_id)
+        if record is None:
+            return None
+
+        if record.finished_at is None:
+            record.terminated_early = True
+            self._get_solver_manager(record.move_thread_count).terminate_early(job_id)
+            print(f"🛑 ソルバージョブ早期終了: {job_id}")
+        return self.get_status(job_id)
+
+    def add_lessons(self, job_id: str, lessons_data: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """実行中のジョブに授業（JSON）を追加（再ソルブせず現在の解から継続）"""
+        record = self._get_record(job_id)
+        if record is None:
+            return None
+        lessons = [self.optimization_service.lesson_from_json(l) for l in lessons_data]
+        change = AddLessonsProblemChange(lessons, record.problem.timeslots, record.problem.rooms)
+        return self._apply_problem_change(job_id, change, f"授業追加 {len(lessons)}件")
+
+    def remove_lessons(self, job_id: str, lesson_ids: List[int]) -> Optional[Dict[str, Any]]:
+        """実行中のジョブから授業を削除"""
+        return self._apply_problem_change(job_id, RemoveLessonsProblemChange(lesson_ids),
+                                          f"授業削除 {len(lesson_ids)}件")
+
+    def _apply_problem_change(self, job_id: str, problem_change, description: str) -> Optional[Dict[str, Any]]:
+        record = self._get_record(job_id)
+        if record is None:
+            return None
+        if record.finished_at is not None:
+            raise ValueError(f"ジョブは既に終了しています: {job_id}")
+
+        self._get_solver_manager(record.move_thread_count).add_problem_change(job_id, problem_change)
+        print(f"🔁 問題変更を適用: {job_id} ({description})")
+        return self.get_status(job_id)
+
+    def _get_solver_manager(self, move_thread_count: Optional[int]) -> SolverManager:
+        with self._manager_lock:
+            manager = self._solver_managers.get(move_thread_count)
+            if manager is None:
+                manager = SolverManager.create(
+                    get_solver_registry().get_solver_factory(move_thread_count=move_thread_count),
+                    SolverManagerConfig(parallel_solver_count='AUTO')
+                )
+                self._solver_managers[move_thread_count] = manager
+            return manager
+
+    def _get_record(self, job_id: str) -> Optional[SolverJobRecord]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _solver_status(self, record: SolverJobRecord) -> str:
+        if record.error is not None:
+            return "FAILED"
+        if record.finished_at is not None:
+            return "COMPLETED"
+        status = self._get_solver_manager(record.move_thread_count).get_solver_status(record.job_id)
+        if status == SolverStatus.NOT_SOLVING:
+            # 最終解コールバック到着前の僅かな隙間
+            return "COMPLETED"
+        return status.name
+
+    def _on_best_solution(self, job_id: str, solution: TimeTable):
+        record = self._get_record(job_id)
+        if record is not None:
+            record.best_score = str(solution.score) if solution.score is not None else None
+            record.best_solution = solution
+            record.best_found_at = time.time()
+            self._record_event(record, solution)
+
+    def _record_event(self, record: SolverJobRecord, solution: TimeTable):
+        """前回イベントから配置が変わった授業だけを差分イベントとして追加"""
+        changes = []
+        seen = set()
+        for lesson in solution.lessons:
+            assignment = (lesson.timeslot.id if lesson.timeslot else None,
+                          lesson.room.id if lesson.room else None)
+            seen.add(lesson.id)
+            if record.assignments.get(lesson.id, (None, None)) != assignment:
+                record.assignments[lesson.id] = assignment
+                changes.append({"lesson_id": lesson.id, "timeslot_id": assignment[0], "room_id": assignment[1]})
+        # ProblemChange で削除された授業
+        for lesson_id in [lesson_id for lesson_id in record.assignments if lesson_id not in seen]:
+            del record.assignments[lesson_id]
+            changes.append({"lesson_id": lesson_id, "removed": True})
+
+        with record.changed:
+            record.events.append({
+                "seq": len(record.events) + 1,
+                "score": record.best_score,
+                "elapsed_seconds": round(record.best_found_at - record.submitted_at, 3),
+                "changes": changes
+            })
+            record.changed.notify_all()
+
+    def _on_final_solution(self, job_id: str, solution: TimeTable):
+        record = self._get_record(job_id)
+        if record is not None:
+            if solution.score is not None:
+                record.best_score = str(solution.score)
+                record.best_solution = solution
+            elif record.best_solution is None:
+                record.best_solution = solution
+            with record.changed:
+                record.finished_at = time.time()
+                record.changed.notify_all()
+            print(f"🎉 ソルバージョブ完了: {job_id} Score: {solution.score}")
+
+    def _on_error(self, job_id: str, error: Exception):
+        record = self._get_record(job_id)
+        if record is not None:
+            with record.changed:
+                record.error = str(error)
+                record.finished_at = time.time()
+                record.changed.notify_all()
+        print(f"❌ ソルバージョブエラー: {job_id} {error}")
+
+    def _purge_finished_jobs(self):
+        """TTL を過ぎた終了済みジョブを破棄"""
+        cutoff = time.time() - FINISHED_JOB_TTL_SECONDS
+        with self._lock:
+            expired = [job_id for job_id, record in self._jobs.items()
+                       if record.finished_at is not None and record.finished_at < cutoff]
+            for job_id in expired:
+                del self._jobs[job_id]
@@ -0,0 +1,255 @@
+"""プロセス共通のソルバーレジストリ（SolverFactory キャッシュと JVM ウォームアップ）"""
+import os
+import threading
+import time
+from pathlib import Path
+from datetime import time as dt_time
+from typing import Callable, Dict, Any, Optional, Tuple, Union, TYPE_CHECKING
+
+# timefold（ドメインクラスの import で JVM が起動する）は初回のソルブ・ウォームアップまで import しない。
+# このモジュール自体は JVM なしで import でき、/api/test などは起動直後から応答できる。
+if TYPE_CHECKING:
+    from timefold.solver import SolverFactory, SolutionManager
+    from timefold.solver.config import SolverConfig
+    from backend.models.timefold_models import TimeTable
+
+DEFAULT_PROFILE = "default"
+CONSTRUCTION_PROFILE = "construction"
+# ソルバーを使わず Python 側の First Fit Decreasing だけで返すプロファイル（SOLVER_PROFILES 外）
+PREVIEW_PROFILE = "preview"
+
+# 構築ヒューリスティックのみのフェーズ設定
+CONSTRUCTION_CONFIG_PATH = os.path.join(os.path.dirname(__file__), "..", "config", "solverConfig.xml")
+
+
+_jvm_lock = threading.Lock()
+_jvm_started = False
+
+
+def start_jvm():
+    """timefold のドメインモデルを import して JVM を起動する（起動済みなら何もしない）
+    
+    JVM を起動したスレッドは Java の非デーモンスレッドとして登録され、プロセス終了時の
+    DestroyJavaVM がその終了を待ち続ける。リクエスト処理やウォームアップのスレッドで起動すると
+    プロセスが終了しなくなるため、専用スレッドで起動し、起動後に JVM から切り離す。
+    """
+    global _jvm_started
+    if _jvm_started:
+        return
+    with _jvm_lock:
+        if _jvm_started:
+            return
+        errors = []
+
+        def run():
+            try:
+                import backend.models.timefold_models  # noqa: F401（import 時に JVM が起動する）
+                import jpype
+                jpype.java.lang.Thread.detach()
+            except BaseException as e:
+                errors.append(e)
+
+        thread = threading.Thread(target=run, name="jvm-start", daemon=True)
+        thread.start()
+        thread.join()
+        if errors:
+            raise errors[0]
+        _jvm_started = True
+
+
+def _default_solver_config() -> "SolverConfig":
+    """本格最適化用の設定（30秒）"""
+    from timefold.solver.config import SolverConfig, ScoreDirectorFactoryConfig, TerminationConfig, Duration
+    from backend.models.timefold_models import TimeTable, Lesson, define_constraints
+    return SolverConfig(
+        solution_class=TimeTable,
+        entity_class_list=[Lesson],
+        score_director_factory_config=ScoreDirectorFactoryConfig(
+            constraint_provider_function=define_constraints
+        ),
+        termination_config=TerminationConfig(
+            spent_limit=Duration(seconds=30)  # 30秒で本格最適化
+        )
+    )
+
+
+def _construction_solver_config() -> "SolverConfig":
+    """構築ヒューリスティックのみの設定（フェーズは solverConfig.xml から読み込む）"""
+    from timefold.solver.config import SolverConfig, ScoreDirectorFactoryConfig
+    from backend.models.timefold_models import TimeTable, Lesson, define_constraints
+    return SolverConfig(
+        solution_class=TimeTable,
+        entity_class_list=[Lesson],
+        score_director_factory_config=ScoreDirectorFactoryConfig(
+            constraint_provider_function=define_constraints
+        ),
+        xml_source_file=Path(os.path.abspath(CONSTRUCTION_CONFIG_PATH))
+    )
+
+
+# プロファイル名 -> SolverConfig 生成関数
+SOLVER_PROFILES: Dict[str, Callable[[], "SolverConfig"]] = {
+    DEFAULT_PROFILE: _default_solver_config,
+    CONSTRUCTION_PROFILE: _construction_solver_config,
+}
+
+
+def resolve_move_thread_count(value: Union[str, int, None]) -> Optional[int]:
+    """move_thread_count 設定値をスレッド数に解決（None は単一スレッド）
+    
+    AUTO は Web 処理用に1コアを残し、最大8スレッドまで使う。
+    """
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = value.strip().upper()
+        if value in ("", "NONE"):
+            return None
+        if value == "AUTO":
+            cores = os.cpu_count() or 1
+            return min(cores - 1, 8) if cores >= 3 else None
+    count = int(value)
+    return count if count > 1 else None
+
+
+class SolverRegistry:
+    """SolverFactory をプロファイルごとに1度だけ構築して再利用するレジストリ"""
+
+    def __init__(self):
+        self._factories: Dict[Tuple[str, Optional[int]], "SolverFactory"] = {}
+        self._solution_managers: Dict[str, "SolutionManager"] = {}
+        self._lock = threading.RLock()
+        self._warmup_thread: Optional[threading.Thread] = None
+        self.state = "cold"  # cold, warming, ready, error
+        self.warmup_seconds: Optional[float] = None
+        self.error: Optional[str] = None
+        self.multithreading_error: Optional[str] = None
+
+    def build_solver_config(self, profile: str = DEFAULT_PROFILE) -> "SolverConfig":
+        """プロファイルの SolverConfig を生成"""
+        if profile not in SOLVER_PROFILES:
+            raise ValueError(f"未知のソルバープロファイル: {profile}")
+        return SOLVER_PROFILES[profile]()
+
+    def get_solver_factory(self, profile: str = DEFAULT_PROFILE,
+                           move_thread_count: Optional[int] = None) -> "SolverFactory":
+        """キャッシュ済み SolverFactory を取得（初回のみ制約ストリームをコンパイル）
+        
+        move_thread_count は SolverConfigOverride で変更できないため、スレッド数ごとに構築する。
+        """
+        key = (profile, move_thread_count)
+        factory = self._factories.get(key)
+        if factory is not None:
+            return factory
+
+        with self._lock:
+            factory = self._factories.get(key)
+            if factory is None:
+                from timefold.solver import SolverFactory
+                from timefold.solver.config import RequiresEnterpriseError
+                start = time.perf_counter()
+                solver_config = self.build_solver_config(profile)
+                if move_thread_count:
+                    solver_config.move_thread_count = move_thread_count
+                try:
+                    factory = SolverFactory.create(solver_config)
+                except RequiresEnterpriseError as e:
+                    # マルチスレッド探索は timefold-enterprise が必要 → 単一スレッドで継続
+                    self.multithreading_error = str(e)
+                    print(f"⚠️ マルチスレッド探索は利用不可、単一スレッドで実行: {e}")
+                    factory = self.get_solver_factory(profile)
+                self._factories[key] = factory
+                print(f"🏭 SolverFactory構築: {profile} (move threads: {move_thread_count or 'NONE'}, "
+                      f"{time.perf_counter() - start:.2f}秒)")
+            return factory
+
+    def get_solution_manager(self, profile: str = DEFAULT_PROFILE) -> "SolutionManager":
+        """キャッシュ済み SolutionManager を取得（スコア分析用、ソルブ不要）"""
+        manager = self._solution_managers.get(profile)
+        if manager is not None:
+            return manager
+
+        with self._lock:
+            manager = self._solution_managers.get(profile)
+            if manager is None:
+                from timefold.solver import SolutionManager
+                manager = SolutionManager.create(self.get_solver_factory(profile))
+                self._solution_managers[profile] = manager
+            return manager
+
+    def warm_up(self):
+        """JVM起動・制約コンパイル・極小問題の試行ソルブを実施"""
+        with self._lock:
+            if self.state in ("warming", "ready"):
+                return
+            self.state = "warming"
+
+        start = time.perf_counter()
+        try:
+            print("🔥 ソルバーウォームアップ開始...")
+            start_jvm()
+            from timefold.solver.config import SolverConfigOverride, TerminationConfig, Duration
+            solver = self.get_solver_factory().build_solver(SolverConfigOverride(
+                termination_config=TerminationConfig(spent_limit=Duration(milliseconds=500))
+            ))
+            solver.solve(self._warmup_problem())
+            self.warmup_seconds = round(time.perf_counter() - start, 3)
+            self.state = "ready"
+            print(f"✅ ソルバーウォームアップ完了 ({self.warmup_seconds}秒)")
+        except Exception as e:
+            self.state = "error"
+            self.error = str(e)
+            print(f"❌ ソルバーウォームアップエラー: {e}")
+
+    def start_background_warm_up(self):
+        """バックグラウンドスレッドでウォームアップを開始"""
+        with self._lock:
+            if self._warmup_thread is not None:
+                return
+            self._warmup_thread = threading.Thread(
+                target=self.warm_up, name="solver-warmup", daemon=True
+            )
+            self._warmup_thread.start()
+
+    def status(self) -> Dict[str, Any]:
+        """レディネス情報"""
+        return {
+            "state": self.state,
+            "ready": self.state == "ready",
+            "warmup_seconds": self.warmup_seconds,
+            "cached_profiles": sorted({profile for profile, _ in self._factories.keys()}),
+            "available_profiles": sorted(SOLVER_PROFILES.keys()),
+            "cpu_count": os.cpu_count(),
+            "multithreading_error": self.multithreading_error,
+            "error": self.error
+        }
+
+    def _warmup_problem(self) -> "TimeTable":
+        """ウォームアップ用の極小問題"""
+        from backend.models.timefold_models import TimeTable, Lesson, Timeslot, Room, Subject, Teacher, StudentGroup
+        timeslots = [
+            Timeslot(1, "MONDAY", dt_time(9, 0), dt_time(9, 50)),
+            Timeslot(2, "MONDAY", dt_time(10, 0), dt_time(10, 50)),
+        ]
+        rooms = [Room(1, "教室A")]
+        teacher = Teacher(1, "ウォームアップ先生")
+        group = StudentGroup(1, "ウォームアップ組")
+        lessons = [
+            Lesson(1, Subject(1, "数学"), teacher, group),
+            Lesson(2, Subject(2, "国語"), teacher, group),
+        ]
+        return TimeTable(timeslots=timeslots, rooms=rooms, lessons=lessons)
+
+
+_registry: Optional[SolverRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_solver_registry() -> SolverRegistry:
+    """ソルバーレジストリのシングルトン取得"""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = SolverRegistry()
+    return _registry
@@ -0,0 +1,78 @@
+"""問題サイズに応じたソルバー終了条件"""
+from dataclasses import dataclass
+from typing import Dict, Any, Optional
+
+from timefold.solver.config import TerminationConfig, TerminationCompositionStyle, Duration
+
+from backend.models.timefold_models import TimeTable
+
+
+def _duration(seconds: float) -> Duration:
+    return Duration(milliseconds=int(seconds * 1000))
+
+
+@dataclass
+class TerminationPolicy:
+    """探索空間（授業数×時間帯数×教室数）で時間予算を決め、改善停止で早期終了する"""
+    min_seconds: float = 1.0
+    max_seconds: float = 120.0
+    # 1秒あたりに見込む探索空間サイズ
+    search_space_per_second: int = 20000
+    # 予算に対する「改善なし」打ち切り時間の割合
+    unimproved_ratio: float = 0.2
+    # 0hard 到達後、ソフト改善がこの割合の時間なければ終了
+    feasible_unimproved_ratio: float = 0.1
+    # ウォームスタート時の改善なし打ち切り時間（秒）
+    warm_start_unimproved_seconds: float = 2.0
+    # 構築ヒューリスティックのみのプロファイルの安全上限（秒）
+    construction_max_seconds: float = 60.0
+
+    def budget_seconds(self, timetable: TimeTable, max_seconds: Optional[float] = None) -> float:
+        """問題サイズから時間予算を算出（リクエスト指定の上限で頭打ち）"""
+        search_space = len(timetable.lessons) * max(len(timetable.timeslots), 1) * max(len(timetable.rooms), 1)
+        budget = self.min_seconds + search_space / self.search_space_per_second
+        budget = min(max(budget, self.min_seconds), self.max_seconds)
+        if max_seconds is not None and max_seconds > 0:
+            budget = min(budget, max_seconds)
+        return round(budget, 3)
+
+    def describe(self, timetable: TimeTable, max_seconds: Optional[float] = None,
+                 warm_start: bool = False) -> Dict[str, Any]:
+        """終了条件の各秒数"""
+        budget = self.budget_seconds(timetable, max_seconds)
+        if warm_start:
+            unimproved = min(self.warm_start_unimproved_seconds, budget)
+        else:
+            unimproved = min(max(budget * self.unimproved_ratio, self.min_seconds), budget)
+        feasible_unimproved = min(max(budget * self.feasible_unimproved_ratio, 0.5), unimproved)
+        return {
+            "budget_seconds": budget,
+            "unimproved_seconds": round(unimproved, 3),
+            "feasible_unimproved_seconds": round(feasible_unimproved, 3),
+            "warm_start": warm_start
+        }
+
+    def build(self, timetable: TimeTable, max_seconds: Optional[float] = None,
+              warm_start: bool = False) -> TerminationConfig:
+        """いずれかの条件を満たした時点で終了する TerminationConfig を生成"""
+        limits = self.describe(timetable, max_seconds, warm_start)
+        return TerminationConfig(
+            spent_limit=_duration(limits["budget_seconds"]),
+            unimproved_spent_limit=_duration(limits["unimproved_seconds"]),
+            termination_config_list=[
+                # 0hard 到達かつソフトスコアが改善しなくなったら終了
+                TerminationConfig(
+                    best_score_limit="0hard/*soft",
+                    unimproved_spent_limit=_duration(limits["feasible_unimproved_seconds"]),
+                    termination_composition_style=TerminationCompositionStyle.AND
+                )
+            ],
+            termination_composition_style=TerminationCompositionStyle.OR
+        )
+
+    def build_construction(self, max_seconds: Optional[float] = None) -> TerminationConfig:
+        """構築ヒューリスティックのみのプロファイル用（全授業を配置した時点で終わるため上限のみ）"""
+        limit = self.construction_max_seconds
+        if max_seconds is not None and max_seconds > 0:
+            limit = min(limit, max_seconds)
+        return TerminationConfig(spent_limit=_duration(limit))
@@ -0,0 +1,206 @@
+"""送信された時間割のスコア計算・検証（ソルバーも JVM も使わない）
+
+define_constraints と同じ数え方で、ハード・ソフトの各制約を
+(時間帯, 教室) / (時間帯, 教師) / (時間帯, クラス) などのキーで授業をまとめた辞書から数える。
+授業数 n に対して O(n)（ハード違反の組の列挙は違反数に比例）で、数千授業でも数ミリ秒で終わる。
+"""
+from collections import Counter, defaultdict
+from datetime import time
+from typing import Dict, Any, List, Tuple
+
+from backend.models.scheduling_rules import DAY_INDEX, MAX_CONSECUTIVE_BREAK_MINUTES
+
+
+# (制約名, 重み) - define_constraints と同じ順・同じ重み（ソフトは報酬を正、ペナルティを負で持つ）
+HARD_CONSTRAINTS = [
+    ("Room conflict", 1),
+    ("Teacher conflict", 1),
+    ("Student group conflict", 1),
+    ("Teacher max daily lessons", 1),
+]
+SOFT_CONSTRAINTS = [
+    ("Subject distribution across days", -10),
+    ("Daily lesson limit", -5),
+    ("Encourage subject spread", 8),
+    ("Avoid consecutive same subject", -3),
+    ("Teacher room stability", -1),
+    ("Teacher time efficiency", -1),
+]
+
+
+def _pairs(count: int) -> int:
+    return count * (count - 1) // 2
+
+
+def _minute_of_week(day_index: int, value: str) -> int:
+    parsed = time.fromisoformat(value)
+    return day_index * 24 * 60 + parsed.hour * 60 + parsed.minute
+
+
+def _timeslot_table(timeslots: List[Dict[str, Any]]) -> Dict[Any, Tuple[str, int]]:
+    """時間帯ID -> (曜日, コマ番号)。コマ番号は assign_period_indexes と同じく曜日ごとの開始時刻順"""
+    by_day: Dict[int, List[Tuple[int, Dict[str, Any]]]] = defaultdict(list)
+    for ts in timeslots:
+        day = ts["day_of_week"]
+        index = DAY_INDEX.get(day.upper(), DAY_INDEX.get(day))
+        if index is None:
+            raise ValueError(f"不明な曜日です: {day}")
+        by_day[index].append((_minute_of_week(index, ts["start_time"]), ts))
+
+    table = {}
+    for index, members in by_day.items():
+        for period, (_, ts) in enumerate(sorted(members, key=lambda m: m[0])):
+            table[ts["id"]] = (ts["day_of_week"], period)
+    return table
+
+
+def _consecutive_next(timeslots: List[Dict[str, Any]], table: Dict[Any, Tuple[str, int]]) -> Dict[Any, Any]:
+    """時間帯ID -> 短い休み時間だけを挟んで続く次のコマの時間帯ID（連続授業の判定用）"""
+    by_position = {(table[ts["id"]][0], table[ts["id"]][1]): ts for ts in timeslots}
+    following = {}
+    for ts in timeslots:
+        day, period = table[ts["id"]]
+        nxt = by_position.get((day, period + 1))
+        if nxt is None:
+            continue
+        index = DAY_INDEX.get(day.upper(), DAY_INDEX.get(day))
+        gap = _minute_of_week(index, nxt["start_time"]) - _minute_of_week(index, ts["end_time"])
+        if gap <= MAX_CONSECUTIVE_BREAK_MINUTES:
+            following[ts["id"]] = nxt["id"]
+    return following
+
+
+def _score_text(hard: int, soft: int) -> str:
+    """HardSoftScore の文字列表現と同じ形式"""
+    return f"{hard}hard/{soft}soft"
+
+
+def _conflict_pairs(buckets: Dict[Tuple, List[Any]]) -> List[Dict[str, Any]]:
+    """同じキーに入った授業の組をすべて列挙"""
+    violations = []
+    for lesson_ids in buckets.values():
+        for i in range(len(lesson_ids)):
+            for j in range(i + 1, len(lesson_ids)):
+                violations.append({"lesson_ids": [lesson_ids[i], lesson_ids[j]], "score": _score_text(-1, 0)})
+    return violations
+
+
+def score_timetable(data: Dict[str, Any]) -> Dict[str, Any]:
+    """/api/optimize 形式の時間割JSONのスコアと制約ごとの内訳（ハード違反の授業の組）を返す
+
+    時間帯・教室が両方決まっている授業だけを数える（ソルバーと同じく未配置の授業は対象外）。
+    """
+    table = _timeslot_table(data.get("timeslots") or [])
+    room_ids = {r["id"] for r in data.get("rooms") or []}
+    following = _consecutive_next(data.get("timeslots") or [], table)
+
+    room_at: Dict[Tuple, List[Any]] = defaultdict(list)
+    teacher_at: Dict[Tuple, List[Any]] = defaultdict(list)
+    group_at: Dict[Tuple, List[Any]] = defaultdict(list)
+    teacher_day: Dict[Tuple, List[Any]] = defaultdict(list)
+    teacher_limits: Dict[Any, int] = {}
+    subject_group = Counter()
+    subject_group_day = Counter()
+    subject_group_slot = Counter()
+    group_day = Counter()
+    teacher_total = Counter()
+    teacher_room = Counter()
+    teacher_day_total = Counter()
+    teacher_day_period = Counter()
+    unassigned = 0
+
+    for l in data.get("lessons") or []:
+        timeslot_id = (l.get("timeslot") or {}).get("id")
+        room_id = (l.get("room") or {}).get("id")
+        if timeslot_id not in table or room_id not in room_ids:
+            unassigned += 1
+            continue
+        day, period = table[timeslot_id]
+        teacher_id = l["teacher"]["id"]
+        group_id = l["student_group"]["id"]
+        subject_id = l["subject"]["id"]
+
+        room_at[(timeslot_id, room_id)].append(l["id"])
+        teacher_at[(timeslot_id, teacher_id)].append(l["id"])
+        group_at[(timeslot_id, group_id)].append(l["id"])
+        limit = l["teacher"].get("max_daily_lessons") or 0
+        if limit > 0:
+            teacher_day[(teacher_id, day)].append(l["id"])
+            teacher_limits[teacher_id] = max(teacher_limits.get(teacher_id, 0), limit)
+
+        subject_group[(subject_id, group_id)] += 1
+        subject_group_day[(subject_id, group_id, day)] += 1
+        subject_group_slot[(subject_id, group_id, timeslot_id)] += 1
+        group_day[(group_id, day)] += 1
+        teacher_total[teacher_id] += 1
+        teacher_room[(teacher_id, room_id)] += 1
+        teacher_day_total[(teacher_id, day)] += 1
+        teacher_day_period[(teacher_id, day, period)] += 1
+
+    # ハード制約: 同じキーの授業の組（教師の1日上限は超過分）
+    hard_matches = []
+    for buckets in (room_at, teacher_at, group_at):
+        pairs = _conflict_pairs({key: ids for key, ids in buckets.items() if len(ids) > 1})
+        hard_matches.append((pairs, len(pairs)))
+    excesses = [(lesson_ids, len(lesson_ids) - teacher_limits[teacher_id])
+                for (teacher_id, _), lesson_ids in teacher_day.items()
+                if len(lesson_ids) > teacher_limits[teacher_id]]
+    hard_matches.append(([{"lesson_ids": lesson_ids, "score": _score_text(-excess, 0)}
+                          for lesson_ids, excess in excesses],
+                         sum(excess for _, excess in excesses)))
+
+    # ソフト制約: (一致件数, 重みをかける前の量)
+    same_day_pairs = sum(_pairs(c) for c in subject_group_day.values())
+    spread_pairs = sum(_pairs(c) for c in subject_group.values()) - same_day_pairs
+    busy_days = [_pairs(c) for c in group_day.values() if c > 1]
+    consecutive_pairs = sum(count * subject_group_slot[(subject_id, group_id, following[timeslot_id])]
+                            for (subject_id, group_id, timeslot_id), count in subject_group_slot.items()
+                            if timeslot_id in following)
+    same_room = Counter()
+    for (teacher_id, _), count in teacher_room.items():
+        same_room[teacher_id] += _pairs(count)
+    room_changes = [_pairs(total) - same_room[teacher_id] for teacher_id, total in teacher_total.items()
+                    if _pairs(total) > same_room[teacher_id]]
+    # 同じ曜日の組のうち、同じコマ・隣のコマの組を除いたもの
+    near_pairs = sum(_pairs(count) + count * teacher_day_period[(teacher_id, day, period + 1)]
+                     for (teacher_id, day, period), count in teacher_day_period.items())
+    gap_pairs = sum(_pairs(c) for c in teacher_day_total.values()) - near_pairs
+    soft_amounts = [
+        (same_day_pairs, same_day_pairs),
+        (len(busy_days), sum(busy_days)),
+        (spread_pairs, spread_pairs),
+        (consecutive_pairs, consecutive_pairs),
+        (len(room_changes), sum(room_changes)),
+        (gap_pairs, gap_pairs),
+    ]
+
+    constraints = []
+    hard_score = 0
+    # 重みは explain_score（ConstraintAnalysis.weight）と同じく符号付き（ペナルティは負、報酬は正）
+    for (name, weight), (matches, amount) in zip(HARD_CONSTRAINTS, hard_matches):
+        score = -weight * amount
+        hard_score += score
+        constraints.append({
+            "name": name, "type": "hard", "weight": _score_text(-weight, 0),
+            "score": _score_text(score, 0), "match_count": len(matches), "violations": matches
+        })
+    soft_score = 0
+    for (name, weight), (match_count, amount) in zip(SOFT_CONSTRAINTS, soft_amounts):
+        soft_score += weight * amount
+        constraints.append({
+            "name": name, "type": "soft", "weight": _score_text(0, weight),
+            "score": _score_text(0, weight * amount), "match_count": match_count
+        })
+
+    # 影響の大きい制約から並べる（explain_score と同じ並び）
+    constraints.sort(key=lambda c: (c["type"] != "hard", -c["match_count"]))
+
+    return {
+        "score": _score_text(hard_score, soft_score),
+        "hard_score": hard_score,
+        "soft_score": soft_score,
+        "feasible": hard_score >= 0,
+        "hard_violations": -hard_score,
+        "unassigned_lessons": unassigned,
+        "constraints": constraints
+    }
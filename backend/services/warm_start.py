@@ -0,0 +1,63 @@
+"""前回の解からのウォームスタート（初期値の投入と変更のない授業の固定）
+
+Timefold のドメインクラスを import しないため、JVM なしのクイックプレビューからも利用できる。
+引数は TimeTable と同じ属性（timeslots・rooms・lessons と授業の allowed_*）を持つオブジェクトであればよい。
+"""
+from typing import Dict, Any, List
+
+
+def apply_warm_start(timetable, previous_solution: Dict[str, Any], pin_unchanged: bool = True) -> Dict[str, int]:
+    """前回の解を初期値として投入し、変更のない授業を固定する
+
+    授業IDは科目・教師の追加で振り直されるため、(科目, 教師, クラス) の組で前回の配置を引き継ぐ。
+    勤務条件・教室条件の変更で値域（allowed_timeslots / allowed_rooms）から外れた配置は
+    引き継がず、未割り当てのまま再配置対象にする。
+    """
+    timeslots_by_id = {ts.id: ts for ts in timetable.timeslots}
+    rooms_by_id = {r.id: r for r in timetable.rooms}
+
+    previous_assignments: Dict[tuple, List[tuple]] = {}
+    for l in previous_solution.get("lessons", []):
+        if not l.get("timeslot") or not l.get("room"):
+            continue
+        key = (l["subject"]["id"], l["teacher"]["id"], l["student_group"]["id"])
+        previous_assignments.setdefault(key, []).append((l["timeslot"]["id"], l["room"]["id"]))
+
+    # 値域リストは教師・教室条件ごとに共有されているため、ID集合もリスト単位で使い回す
+    allowed_ids: Dict[int, set] = {}
+
+    def ids_of(values: List) -> set:
+        ids = allowed_ids.get(id(values))
+        if ids is None:
+            ids = allowed_ids[id(values)] = {v.id for v in values}
+        return ids
+
+    seeded = 0
+    for lesson in timetable.lessons:
+        key = (lesson.subject.id, lesson.teacher.id, lesson.student_group.id)
+        candidates = previous_assignments.get(key)
+        if not candidates:
+            continue
+
+        timeslot_id, room_id = candidates.pop(0)
+        timeslot = timeslots_by_id.get(timeslot_id)
+        room = rooms_by_id.get(room_id)
+        if timeslot is None or room is None:
+            # 時間帯・教室の設定が変わった授業は再配置対象
+            continue
+        if timeslot_id not in ids_of(lesson.allowed_timeslots) or room_id not in ids_of(lesson.allowed_rooms):
+            # 勤務できない時間帯・設備や定員を満たさない教室には固定しない
+            continue
+
+        lesson.timeslot = timeslot
+        lesson.room = room
+        lesson.pinned = pin_unchanged
+        seeded += 1
+
+    stats = {
+        "seeded_lessons": seeded,
+        "pinned_lessons": seeded if pin_unchanged else 0,
+        "free_lessons": len(timetable.lessons) - seeded
+    }
+    print(f"♻️ ウォームスタート: {stats}")
+    return stats
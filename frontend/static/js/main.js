@@ -212,7 +212,8 @@ async function runOptimizationTest() {
         const statusResponse = await fetch('/api/optimization-status');
         const statusData = await statusResponse.json();
         
-        if (statusData.status !== 'ready') {
+        // warming_up 中も最適化は実行可能（初回のみ起動待ちが発生）
+        if (statusData.status === 'error') {
             throw new Error(statusData.message);
         }
         
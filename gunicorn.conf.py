@@ -0,0 +1,28 @@
+"""gunicorn 設定（Dockerfile / Railway / Render の本番起動用）
+
+環境変数で上書きできる:
+    PORT              待ち受けポート（Cloud Run は 8080）
+    WEB_CONCURRENCY   ワーカープロセス数
+    GUNICORN_THREADS  ワーカーあたりのスレッド数
+"""
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+
+# ワーカーごとに JVM（数百MB）と解キャッシュ・ソルバージョブを持つため、インプロセスのソルブでは
+# 1ワーカー＋複数スレッドで並行リクエストを処理する。ソルブを solver_worker.py に任せる
+# SOLVER_MODE=worker では Web プロセスが JVM を起動しないので、ワーカーを増やせる。
+worker_class = "gthread"
+workers = int(os.environ.get("WEB_CONCURRENCY", 2 if os.environ.get("SOLVER_MODE") == "worker" else 1))
+threads = int(os.environ.get("GUNICORN_THREADS", 8))
+
+# JVM はフォーク後の各ワーカーで起動する（フォーク前に起動した JVM は子プロセスで使えない）
+preload_app = False
+
+# 同期の /api/optimize は数十秒かかるため、ワーカーのタイムアウトで打ち切らない
+timeout = 0
+graceful_timeout = 30
+keepalive = 5
+
+accesslog = "-"
+errorlog = "-"
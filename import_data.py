@@ -0,0 +1,30 @@
+"""既存の JSON データ（subjects.json・teachers.json・rooms.json）を SQLite に取り込むスクリプト
+
+取り込み後に DATA_BACKEND=sqlite で起動すると SQLiteDataRepository が使われる。
+"""
+import sys
+import os
+import argparse
+sys.path.append(os.path.dirname(__file__))
+
+from backend.models.sqlite_repository import import_json_data, DB_FILE_NAME
+
+
+def main():
+    """メイン実行関数"""
+    parser = argparse.ArgumentParser(description="JSON データを SQLite に取り込む")
+    parser.add_argument("--data-dir", default="backend/data",
+                        help="JSON データと system_config.json のディレクトリ")
+    parser.add_argument("--db", default=os.environ.get("DATA_DB_PATH"),
+                        help=f"SQLite データベースのパス（既定: <data-dir>/{DB_FILE_NAME}）")
+    parser.add_argument("--replace", action="store_true",
+                        help="既存の科目・教師・教室・クラスを削除してから取り込む")
+    args = parser.parse_args()
+
+    counts = import_json_data(args.data_dir, args.db, replace=args.replace)
+    for kind, count in counts.items():
+        print(f"  - {kind}: {count}件")
+
+
+if __name__ == '__main__':
+    main()
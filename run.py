@@ -34,11 +34,14 @@ def main():
         print(f"🧪 APIテスト: http://localhost:{port}/api/test")
         print("🛑 終了: Ctrl+C")
     
-    # サーバー起動
+    # サーバー起動（本番は gunicorn -c gunicorn.conf.py wsgi:app）
+    # リローダーは子プロセスをもう1つ起動し、JVM の起動とウォームアップが2回走るため使わない
     app.run(
         host=host,
         port=port,
-        debug=debug
+        debug=debug,
+        use_reloader=False,
+        threaded=True
     )
 
 if __name__ == '__main__':
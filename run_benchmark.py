@@ -0,0 +1,117 @@
+"""TimefoldAI ソルバーベンチマーク実行スクリプト"""
+import sys
+import os
+import json
+import argparse
+import platform
+import subprocess
+from datetime import datetime
+sys.path.append(os.path.dirname(__file__))
+
+
+def load_problem_factory(input_path):
+    """ベンチマーク用の問題生成関数（JSON指定がなければデモデータ）"""
+    from backend.services.optimization_service import OptimizationService
+    service = OptimizationService()
+
+    if input_path:
+        with open(input_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        return lambda: service.convert_from_json(data)
+    return service.generate_demo_data
+
+
+def report_metadata():
+    """コミット間比較用のメタ情報"""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], cwd=os.path.dirname(os.path.abspath(__file__)),
+                                capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "cpu_count": os.cpu_count()
+    }
+
+
+def main():
+    """メイン実行関数"""
+    parser = argparse.ArgumentParser(description="TimefoldAI ソルバーベンチマーク")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    solver = subparsers.add_parser("solver", help="問題サイズ別のソルバー性能計測")
+    solver.add_argument("--sizes", default="20,200,1000,5000", help="カンマ区切りの授業数")
+    solver.add_argument("--seconds", type=float, default=30.0, help="1サイズあたりのソルブ時間")
+    solver.add_argument("--seed", type=int, default=0, help="データセット・ソルバーの乱数シード")
+    solver.add_argument("--output", help="結果JSONの出力先")
+
+    school = subparsers.add_parser("generate-school", help="負荷試験用の学校データを生成")
+    school.add_argument("--seed", type=int, default=0, help="乱数シード")
+    school.add_argument("--grades", type=int, default=3, help="学年数")
+    school.add_argument("--classes-per-grade", type=int, default=4, help="1学年あたりのクラス数")
+    school.add_argument("--output-dir", required=True, help="JSONの出力先ディレクトリ")
+
+    move_threads = subparsers.add_parser("move-threads", help="move_thread_count 別の速度比較")
+    move_threads.add_argument("--threads", default="1,2,4,8", help="カンマ区切りのスレッド数")
+    move_threads.add_argument("--seconds", type=float, default=10.0, help="1回あたりのソルブ時間")
+    move_threads.add_argument("--input", help="問題JSON（/api/demo-data 形式）")
+    move_threads.add_argument("--output", help="結果JSONの出力先")
+
+    conversion = subparsers.add_parser("conversion", help="JSON ⇔ ドメインオブジェクト変換の計測")
+    conversion.add_argument("--sizes", default="1000,10000", help="カンマ区切りの授業数")
+    conversion.add_argument("--seed", type=int, default=0, help="データセットの乱数シード")
+    conversion.add_argument("--repeat", type=int, default=3, help="各計測の繰り返し回数（最短時間を記録）")
+    conversion.add_argument("--solver-update", action="store_true",
+                            help="SolutionManager.update（Python ⇔ Java 変換）の時間も計測")
+    conversion.add_argument("--output", help="結果JSONの出力先")
+
+    args = parser.parse_args()
+
+    if args.command == "generate-school":
+        from backend.services.school_generator import SchoolGenerator, SchoolGeneratorConfig
+        generator = SchoolGenerator(SchoolGeneratorConfig(
+            seed=args.seed, grades=args.grades, classes_per_grade=args.classes_per_grade
+        ))
+        generator.write_json(generator.generate(), args.output_dir)
+        return
+
+    if args.command == "solver":
+        from backend.benchmark.solver_suite import run_solver_benchmark
+        sizes = [int(size) for size in args.sizes.split(",")]
+        report = {
+            "benchmark": "solver",
+            **report_metadata(),
+            "results": run_solver_benchmark(sizes, args.seconds, args.seed)
+        }
+    elif args.command == "move-threads":
+        from backend.benchmark.move_threads import run_move_thread_benchmark
+        thread_counts = [int(t) for t in args.threads.split(",")]
+        report = {
+            "benchmark": "move_threads",
+            **report_metadata(),
+            "results": run_move_thread_benchmark(load_problem_factory(args.input),
+                                                 thread_counts, args.seconds)
+        }
+
+    elif args.command == "conversion":
+        from backend.benchmark.conversion import run_conversion_benchmark
+        sizes = [int(size) for size in args.sizes.split(",")]
+        report = {
+            "benchmark": "conversion",
+            **report_metadata(),
+            "results": run_conversion_benchmark(sizes, args.seed, args.repeat, args.solver_update)
+        }
+
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output)
+        print(f"💾 ベンチマーク結果保存: {args.output}")
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
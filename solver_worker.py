@@ -0,0 +1,131 @@
+"""TimefoldAI ソルバーワーカー起動スクリプト（SQLite ジョブキューを処理）"""
+import sys
+import os
+import signal
+import socket
+import time
+import argparse
+sys.path.append(os.path.dirname(__file__))
+
+from backend.services.job_queue import (
+    SQLiteJobQueue, DEFAULT_QUEUE_PATH, DEFAULT_LEASE_SECONDS, unsupported_job_options
+)
+
+
+class SolverWorker:
+    """キューからジョブを1件ずつ取得してソルブし、途中経過と結果を書き戻す"""
+
+    def __init__(self, queue: SQLiteJobQueue, worker_id: str, lease_seconds: float = DEFAULT_LEASE_SECONDS,
+                 poll_interval: float = 1.0, heartbeat_interval: float = 2.0):
+        from backend.services.solver_job_service import SolverJobService
+        from backend.services.solver_registry import get_solver_registry
+
+        self.queue = queue
+        self.worker_id = worker_id
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self.heartbeat_interval = heartbeat_interval
+        self.job_service = SolverJobService()
+        self.stopping = False
+        get_solver_registry().warm_up()
+
+    def stop(self, *_):
+        """実行中のジョブは早期終了させ、途中解を保存してキューに戻してから停止"""
+        print("🛑 ワーカー停止要求を受信")
+        self.stopping = True
+
+    def run(self):
+        print(f"👷 ソルバーワーカー起動: {self.worker_id} (キュー: {self.queue.db_path})")
+        while not self.stopping:
+            job = self.queue.claim(self.worker_id, self.lease_seconds)
+            if job is None:
+                time.sleep(self.poll_interval)
+                continue
+            try:
+                self.process(job)
+            except Exception as e:
+                print(f"❌ ジョブ処理エラー: {job['job_id']} {e}")
+                import traceback
+                traceback.print_exc()
+                self.queue.fail(job["job_id"], self.worker_id, str(e))
+        print("👋 ソルバーワーカー終了")
+
+    def process(self, job):
+        job_id = job["job_id"]
+        request_data = dict(job["request"] or {})
+        options = job["options"]
+        unsupported = unsupported_job_options(options)
+        if unsupported:
+            # 対応前に投入されたジョブ（現在は投入時に 400 で拒否）
+            self.queue.fail(job_id, self.worker_id, "未対応のオプション: " + "; ".join(unsupported))
+            return
+        if job["solution"] is not None:
+            # 前回のワーカーが保存した途中解から再開
+            request_data.update(previous_solution=job["solution"], pin_unchanged=False)
+            print(f"♻️ 途中解から再開: {job_id}")
+
+        optimization = self.job_service.optimization_service
+        timetable, warm_start = optimization.build_problem(request_data)
+        local_job_id = self.job_service.submit(
+            timetable, warm_start=warm_start, max_seconds=options.get("max_seconds"),
+            move_thread_count=options.get("move_thread_count")
+        )
+        print(f"⚙️ ジョブ実行開始: {job_id} (試行{job['attempts']}回目)")
+
+        last_score = None
+        while True:
+            time.sleep(self.heartbeat_interval)
+            status = self.job_service.get_status(local_job_id)
+
+            if status["status"] in ("COMPLETED", "FAILED"):
+                break
+
+            if self.stopping or self.queue.is_cancel_requested(job_id):
+                self.job_service.terminate(local_job_id)
+                continue
+
+            # スコアが変わった時だけ途中解を書き込む
+            solution = None
+            if status["score"] != last_score:
+                last_score = status["score"]
+                solution = optimization.convert_to_json(self.job_service.get_best_solution(local_job_id))
+            if not self.queue.heartbeat(job_id, self.worker_id, self.lease_seconds, status["score"], solution):
+                # リースを失った（他のワーカーが再取得済み）ので結果は書き込まない
+                print(f"⚠️ リース喪失: {job_id}")
+                self.job_service.terminate(local_job_id)
+                return
+
+        if status["status"] == "FAILED":
+            self.queue.fail(job_id, self.worker_id, status["error"] or "ソルバーエラー")
+            return
+
+        solution = optimization.convert_to_json(self.job_service.get_best_solution(local_job_id))
+        if self.stopping and status["terminated_early"] and not self.queue.is_cancel_requested(job_id):
+            # ワーカー停止による打ち切りは完了扱いにしない。途中解を残してキューに戻し、別のワーカーが続きから解く
+            self.queue.release(job_id, self.worker_id, status["score"], solution)
+            print(f"↩️ ジョブをキューに戻しました: {job_id} Score: {status['score']}")
+            return
+        self.queue.complete(job_id, self.worker_id, status["score"], solution,
+                            terminated_early=status["terminated_early"])
+        print(f"✅ ジョブ完了: {job_id} Score: {status['score']}")
+
+
+def main():
+    """メイン実行関数"""
+    parser = argparse.ArgumentParser(description="TimefoldAI ソルバーワーカー")
+    parser.add_argument("--queue", default=DEFAULT_QUEUE_PATH,
+                        help="SQLite ジョブキューのパス")
+    parser.add_argument("--worker-id", default=f"{socket.gethostname()}-{os.getpid()}")
+    parser.add_argument("--lease-seconds", type=float, default=DEFAULT_LEASE_SECONDS)
+    parser.add_argument("--poll-interval", type=float, default=1.0)
+    args = parser.parse_args()
+
+    worker = SolverWorker(SQLiteJobQueue(args.queue), args.worker_id,
+                          lease_seconds=args.lease_seconds, poll_interval=args.poll_interval)
+    signal.signal(signal.SIGTERM, worker.stop)
+    signal.signal(signal.SIGINT, worker.stop)
+    worker.run()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,270 @@
+"""制約書き換えの等価性テスト（旧ペア比較版とのスコア一致確認）"""
+import sys
+import os
+import random
+from datetime import time
+sys.path.append(os.path.dirname(__file__))
+
+from timefold.solver import SolverFactory, SolutionManager
+from timefold.solver.config import SolverConfig, ScoreDirectorFactoryConfig
+from timefold.solver.score import HardSoftScore, constraint_provider, Joiners, ConstraintFactory, Constraint
+
+from backend.models.timefold_models import (
+    TimeTable, Lesson, Timeslot, Room, Subject, Teacher, StudentGroup,
+    daily_lesson_limit, teacher_room_stability, teacher_time_efficiency,
+    avoid_consecutive_same_subject, teacher_conflict, define_constraints
+)
+from backend.services.construction_heuristic import first_fit_decreasing, count_hard_violations
+from backend.services.local_search_engine import EncodedProblem, LateAcceptanceEngine
+from backend.services.quick_preview import preview_timetable, preview_timetable_from_json
+from backend.services.optimization_service import OptimizationService
+from backend.services.timetable_scorer import score_timetable
+
+# 旧実装（ベースライン 96f42f8 の backend/models/timefold_models.py から関数名以外そのまま複写。
+# 教師の結合はオブジェクトの等価性、絞り込みは Python ラムダ）
+def legacy_daily_lesson_limit(constraint_factory: ConstraintFactory) -> Constraint:
+    """Soft: 1日の授業数制限（新規追加）"""
+    return (constraint_factory
+            .for_each_unique_pair(Lesson)
+            .filter(lambda lesson1, lesson2:
+                lesson1.timeslot is not None and lesson2.timeslot is not None and
+                lesson1.student_group.id == lesson2.student_group.id and
+                lesson1.timeslot.day_of_week == lesson2.timeslot.day_of_week and
+                lesson1.id != lesson2.id)
+            .penalize(HardSoftScore.of(0, 5))  # 1日複数授業にペナルティ
+            .as_constraint("Daily lesson limit"))
+
+def legacy_teacher_room_stability(constraint_factory: ConstraintFactory) -> Constraint:
+    """Soft: 同じ先生はできるだけ同じ教室を使う（効率性向上）"""
+    return (constraint_factory
+            .for_each_unique_pair(Lesson,
+                Joiners.equal(lambda lesson: lesson.teacher))
+            .filter(lambda lesson1, lesson2: 
+                lesson1.room is not None and lesson2.room is not None and 
+                lesson1.room.id != lesson2.room.id)
+            .penalize(HardSoftScore.ONE_SOFT)
+            .as_constraint("Teacher room stability"))
+
+def legacy_teacher_time_efficiency(constraint_factory: ConstraintFactory) -> Constraint:
+    """Soft: 同じ先生の授業は連続する時間帯が理想的（移動効率）"""
+    return (constraint_factory
+            .for_each_unique_pair(Lesson,
+                Joiners.equal(lambda lesson: lesson.teacher))
+            .filter(lambda lesson1, lesson2:
+                lesson1.timeslot is not None and lesson2.timeslot is not None and
+                lesson1.timeslot.day_of_week == lesson2.timeslot.day_of_week and
+                abs(lesson1.timeslot.id - lesson2.timeslot.id) > 1)
+            .penalize(HardSoftScore.ONE_SOFT)
+            .as_constraint("Teacher time efficiency"))
+
+@constraint_provider
+def legacy_constraints(constraint_factory: ConstraintFactory):
+    return [
+        legacy_daily_lesson_limit(constraint_factory),
+        legacy_teacher_room_stability(constraint_factory),
+        legacy_teacher_time_efficiency(constraint_factory),
+    ]
+
+@constraint_provider
+def rewritten_constraints(constraint_factory: ConstraintFactory):
+    return [
+        daily_lesson_limit(constraint_factory),
+        teacher_room_stability(constraint_factory),
+        teacher_time_efficiency(constraint_factory),
+    ]
+
+@constraint_provider
+def boundary_constraints(constraint_factory: ConstraintFactory):
+    return [
+        avoid_consecutive_same_subject(constraint_factory),
+        teacher_conflict(constraint_factory),
+    ]
+
+def build_solution_manager(constraints) -> SolutionManager:
+    solver_config = SolverConfig(
+        solution_class=TimeTable,
+        entity_class_list=[Lesson],
+        score_director_factory_config=ScoreDirectorFactoryConfig(
+            constraint_provider_function=constraints
+        )
+    )
+    return SolutionManager.create(SolverFactory.create(solver_config))
+
+def random_timetable(rng: random.Random) -> TimeTable:
+    """ランダムな割り当て済み時間割を生成"""
+    days = ["MONDAY", "TUESDAY", "WEDNESDAY", "THURSDAY", "FRIDAY"]
+    periods = rng.randint(3, 6)
+    timeslots = []
+    for day in days:
+        for period in range(periods):
+            timeslots.append(Timeslot(len(timeslots) + 1, day, time(9 + period, 0), time(9 + period, 50)))
+
+    rooms = [Room(i, f"教室{i}") for i in range(1, rng.randint(2, 5) + 1)]
+    teachers = [Teacher(i, f"先生{i}") for i in range(1, rng.randint(2, 6) + 1)]
+    subjects = [Subject(i, f"科目{i}") for i in range(1, rng.randint(2, 6) + 1)]
+    groups = [StudentGroup(i, f"{i}組") for i in range(1, rng.randint(1, 4) + 1)]
+
+    lessons = []
+    for lesson_id in range(1, rng.randint(10, 80) + 1):
+        lesson = Lesson(lesson_id, rng.choice(subjects), rng.choice(teachers), rng.choice(groups))
+        lesson.timeslot = rng.choice(timeslots)
+        lesson.room = rng.choice(rooms)
+        lessons.append(lesson)
+
+    return TimeTable(timeslots=timeslots, rooms=rooms, lessons=lessons)
+
+def test_rewritten_constraints_match_legacy_scores():
+    """ランダムな時間割で旧実装と新実装のスコアが一致することを確認"""
+    print("🧪 制約等価性テスト開始")
+    legacy = build_solution_manager(legacy_constraints)
+    rewritten = build_solution_manager(rewritten_constraints)
+
+    rng = random.Random(20250601)
+    for trial in range(30):
+        timetable = random_timetable(rng)
+        legacy_score = legacy.update(timetable)
+        rewritten_score = rewritten.update(timetable)
+        assert legacy_score == rewritten_score, (
+            f"試行{trial}: 旧{legacy_score} != 新{rewritten_score} ({len(timetable.lessons)}授業)"
+        )
+
+    print("✅ 制約等価性テスト完了（30件一致）")
+
+def test_consecutive_periods_respect_lunch_and_day_boundaries():
+    """昼休み・日の境目を挟む隣接IDのコマは連続授業とみなさない。教師の衝突はIDで判定する"""
+    print("🧪 連続コマ判定テスト開始")
+    manager = build_solution_manager(boundary_constraints)
+    timeslots = [
+        Timeslot(1, "MONDAY", time(10, 30), time(11, 20)),
+        Timeslot(2, "MONDAY", time(11, 30), time(12, 20)),
+        Timeslot(3, "MONDAY", time(13, 10), time(14, 0)),  # 昼休み明け
+        Timeslot(4, "TUESDAY", time(8, 50), time(9, 40)),  # 翌日1限
+    ]
+    room = Room(1, "教室A")
+    subject = Subject(1, "数学")
+    group = StudentGroup(1, "1年A組")
+
+    def score_for(first: int, second: int):
+        # JSON 変換と同様に、同じ教師でも授業ごとに別オブジェクトにする
+        lesson1 = Lesson(1, subject, Teacher(1, "田中先生"), group, timeslot=timeslots[first], room=room)
+        lesson2 = Lesson(2, subject, Teacher(1, "田中先生"), group, timeslot=timeslots[second], room=room)
+        return manager.update(TimeTable(timeslots=timeslots, rooms=[room], lessons=[lesson1, lesson2]))
+
+    assert score_for(0, 1) == HardSoftScore.of(0, -3)  # 10分休みを挟む連続コマ
+    assert score_for(1, 2) == HardSoftScore.ZERO       # 昼休みを挟む
+    assert score_for(2, 3) == HardSoftScore.ZERO       # 日をまたぐ
+    assert score_for(0, 0) == HardSoftScore.of(-1, 0)  # 教師の衝突
+    print("✅ 連続コマ判定テスト完了")
+
+def test_preview_hard_violations_match_solver():
+    """プレビュー（First Fit Decreasing）の配置と違反数が、ソルバーのハードスコアと一致する"""
+    print("🧪 プレビュー違反数テスト開始")
+    manager = build_solution_manager(define_constraints)
+    optimization = OptimizationService()
+
+    rng = random.Random(20250701)
+    for trial in range(20):
+        timetable = random_timetable(rng)
+        for lesson in timetable.lessons:
+            lesson.teacher.max_daily_lessons = rng.choice([0, 2, 3])
+        # ランダム配置のまま数えた違反数
+        assert count_hard_violations(timetable.lessons) == -manager.update(timetable).hard_score
+
+        for lesson in timetable.lessons:
+            lesson.timeslot = None
+            lesson.room = None
+        # JVM なしのプレビュー（軽量オブジェクト）も同じ配置・違反数になる
+        preview = preview_timetable(preview_timetable_from_json(optimization.convert_to_json(timetable)))
+        first_fit_decreasing(timetable)
+        assert all(l.timeslot is not None and l.room is not None for l in timetable.lessons)
+        hard = count_hard_violations(timetable.lessons)
+        assert hard == -manager.update(timetable).hard_score, f"試行{trial}: {hard}"
+        assert preview["hard_violations"] == hard and preview["unassigned_lessons"] == 0
+        assert preview["lessons"] == optimization.convert_to_json(timetable)["lessons"], f"試行{trial}"
+
+    print("✅ プレビュー違反数テスト完了")
+
+def test_numpy_engine_scores_match_solver():
+    """NumPy エンジンの全体スコア・探索後のスコアが Timefold のスコアと一致する"""
+    print("🧪 NumPyエンジンのスコア一致テスト開始")
+    manager = build_solution_manager(define_constraints)
+    optimization = OptimizationService()
+
+    rng = random.Random(20250801)
+    for trial in range(20):
+        timetable = random_timetable(rng)
+        for lesson in timetable.lessons:
+            lesson.teacher.max_daily_lessons = rng.choice([0, 2, 3])
+        for lesson in timetable.lessons[:trial % 4]:
+            lesson.timeslot = None
+            lesson.room = None
+        problem = EncodedProblem(optimization.convert_to_json(timetable))
+        expected = manager.update(timetable)
+        assert problem.score(problem.initial_timeslot, problem.initial_room) == (
+            expected.hard_score, expected.soft_score), f"試行{trial}: {expected}"
+
+        # 差分更新で探索した解も、JSON に戻して Timefold で採点したスコアと一致する
+        engine = LateAcceptanceEngine(problem, seed=trial)
+        stats = engine.solve(max_seconds=0.3)
+        solved = manager.update(optimization.convert_from_json(engine.to_json()))
+        assert (stats["hard"], stats["soft"]) == (solved.hard_score, solved.soft_score), f"試行{trial}: {solved}"
+
+    print("✅ NumPyエンジンのスコア一致テスト完了")
+
+def test_standalone_scorer_matches_solver():
+    """/api/score の採点（JVM なし）が制約ごとのスコア・ハード違反の組まで Timefold と一致する"""
+    print("🧪 単体採点のスコア一致テスト開始")
+    manager = build_solution_manager(define_constraints)
+    optimization = OptimizationService()
+
+    rng = random.Random(20250815)
+    for trial in range(10):
+        timetable = random_timetable(rng)
+        for lesson in timetable.lessons:
+            lesson.teacher.max_daily_lessons = rng.choice([0, 2, 3])
+        for lesson in timetable.lessons[:trial % 4]:
+            lesson.timeslot = None
+            lesson.room = None
+        result = score_timetable(optimization.convert_to_json(timetable))
+        analysis = manager.analyze(timetable)
+        assert result["score"] == str(analysis.score), f"試行{trial}: {analysis.score}"
+
+        constraints = {c["name"]: c for c in result["constraints"]}
+        for expected in analysis.constraint_analyses:
+            actual = constraints[expected.constraint_name]
+            assert actual["score"] == str(expected.score), f"試行{trial}: {expected.constraint_name}"
+            assert actual["weight"] == str(expected.weight), f"試行{trial}: {expected.constraint_name}"
+            assert actual["match_count"] == expected.match_count, f"試行{trial}: {expected.constraint_name}"
+            if expected.constraint_name.endswith("conflict"):
+                expected_pairs = sorted(sorted(fact.id for fact in match.justification.facts)
+                                        for match in expected.matches)
+                assert sorted(sorted(v["lesson_ids"]) for v in actual["violations"]) == expected_pairs
+
+    print("✅ 単体採点のスコア一致テスト完了")
+
+def test_explain_reports_lessons_over_teacher_daily_limit():
+    """/api/explain の教師の1日上限違反は、超過した教師・曜日の授業IDを返す"""
+    print("🧪 スコア説明の上限違反テスト開始")
+    timetable = random_timetable(random.Random(20250901))
+    for lesson in timetable.lessons:
+        lesson.teacher.max_daily_lessons = 1
+
+    explanation = OptimizationService().explain_score(timetable)
+    constraint = next(c for c in explanation["constraints"] if c["name"] == "Teacher max daily lessons")
+    assert constraint["violations"], "上限違反が検出されていません"
+    lessons_by_id = {l.id: l for l in timetable.lessons}
+    for violation in constraint["violations"]:
+        assert len(violation["lesson_ids"]) > 1, violation
+        keys = {(lessons_by_id[i].teacher.id, lessons_by_id[i].timeslot.day_of_week)
+                for i in violation["lesson_ids"]}
+        assert len(keys) == 1, violation
+
+    print("✅ スコア説明の上限違反テスト完了")
+
+if __name__ == "__main__":
+    test_rewritten_constraints_match_legacy_scores()
+    test_consecutive_periods_respect_lunch_and_day_boundaries()
+    test_preview_hard_violations_match_solver()
+    test_numpy_engine_scores_match_solver()
+    test_standalone_scorer_matches_solver()
+    test_explain_reports_lessons_over_teacher_daily_limit()
@@ -1,10 +1,18 @@
 """データレイヤーのテストスクリプト"""
 import sys
 import os
+import json
+import shutil
+import tempfile
+import threading
+from collections import Counter
 sys.path.append(os.path.dirname(__file__))
 
 from backend.models.database import JSONDataRepository
-from backend.models.data_models import Subject, Teacher
+from backend.models.sqlite_repository import SQLiteDataRepository
+from backend.models.data_models import Subject, Teacher, TimeSlot
+from backend.services.customize_service import CustomizeService
+from backend.services.school_generator import SchoolGenerator, SchoolGeneratorConfig, teacher_capacity
 
 def test_data_repository():
     """データリポジトリのテスト"""
@@ -18,6 +26,7 @@ def test_data_repository():
     teachers = repo.get_teachers()
     timeslots = repo.get_timeslots()
     student_groups = repo.get_student_groups()
+    rooms = repo.get_rooms()
     
     print(f"📚 科目数: {len(subjects)}")
     for subject in subjects:
@@ -30,6 +39,10 @@ def test_data_repository():
     print(f"⏰ 時間枠数: {len(timeslots)}")
     print(f"👥 学生グループ数: {len(student_groups)}")
     
+    print(f"🏫 教室数: {len(rooms)}")
+    for room in rooms:
+        print(f"  - {room.name} (定員{room.capacity}名, 設備: {', '.join(room.equipment) or 'なし'})")
+    
     # 授業生成テスト
     lessons = repo.generate_lessons()
     print(f"📖 生成された授業数: {len(lessons)}")
@@ -41,5 +54,99 @@ def test_data_repository():
     print("✅ データリポジトリテスト完了")
     return True
 
+def test_sqlite_repository():
+    """SQLiteリポジトリのテスト（JSON データを一時ディレクトリの DB に取り込む）"""
+    print("🧪 SQLiteリポジトリテスト開始")
+    
+    data_dir = tempfile.mkdtemp()
+    try:
+        shutil.copytree("backend/data", data_dir, dirs_exist_ok=True)
+        json_repo = JSONDataRepository(data_dir)
+        repo = SQLiteDataRepository(data_dir=data_dir)
+        repo.import_from(json_repo)
+        
+        assert [s.to_dict() for s in repo.get_subjects()] == [s.to_dict() for s in json_repo.get_subjects()]
+        assert [t.to_dict() for t in repo.get_teachers()] == [t.to_dict() for t in json_repo.get_teachers()]
+        assert len(repo.generate_lessons()) == len(json_repo.generate_lessons())
+        
+        subject = repo.get_subjects()[0]
+        teachers = repo.find_teachers_for_subject(subject.name)
+        print(f"👨‍🏫 {subject.name}の担当教師: {[t.name for t in teachers]}")
+        
+        repo.save_subject(Subject(id=999, name="テスト科目"))
+        assert repo.get_subject(999).name == "テスト科目"
+        assert repo.delete_subject(999) and repo.get_subject(999) is None
+        repo.close()
+    finally:
+        shutil.rmtree(data_dir)
+    
+    print("✅ SQLiteリポジトリテスト完了")
+
+def test_concurrent_config_updates():
+    """システム設定の同時更新で変更が失われない（リポジトリを別々に持つワーカーを想定）"""
+    print("🧪 設定の同時更新テスト開始")
+    
+    data_dir = tempfile.mkdtemp()
+    try:
+        shutil.copytree("backend/data", data_dir, dirs_exist_ok=True)
+        config_file = os.path.join(data_dir, "system_config.json")
+        repos = [JSONDataRepository(data_dir), JSONDataRepository(data_dir), SQLiteDataRepository(data_dir=data_dir)]
+        
+        def increment(config):
+            return {**config, "update_count": config.get("update_count", 0) + 1}
+        
+        def worker(repo):
+            for _ in range(20):
+                repo.update_system_config(increment)
+        
+        threads = [threading.Thread(target=worker, args=(repo,)) for repo in repos for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        with open(config_file, encoding='utf-8') as f:
+            assert json.load(f)["update_count"] == 20 * len(threads)
+        
+        # 別々のサービスが別の項目を同時に更新しても、両方の変更が残る
+        with open(config_file, encoding='utf-8') as f:
+            config = json.load(f)
+        del config["update_count"]
+        with open(config_file, 'w', encoding='utf-8') as f:
+            json.dump(config, f)
+        services = [CustomizeService(data_dir), CustomizeService(data_dir)]
+        updates = [{"school_name": "同時更新テスト校"}, {"lesson_duration": 45}]
+        threads = [threading.Thread(target=service.update_config, args=(update,))
+                   for service, update in zip(services, updates)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        with open(config_file, encoding='utf-8') as f:
+            saved = json.load(f)
+        assert saved["school_name"] == "同時更新テスト校" and saved["lesson_duration"] == 45
+        repos[2].close()
+    finally:
+        shutil.rmtree(data_dir)
+    
+    print("✅ 設定の同時更新テスト完了")
+
+def test_generated_teacher_loads_fit():
+    """生成した学校で、どの教師の担当授業数も勤務可能な枠に収まる"""
+    print("🧪 生成校の教師負荷テスト開始")
+    
+    for seed in range(5):
+        for classes_per_grade in (3, 6):
+            school = SchoolGenerator(SchoolGeneratorConfig(seed=seed, classes_per_grade=classes_per_grade)).generate()
+            timeslots = [TimeSlot(**ts) for ts in school["timeslots"]]
+            load = Counter(l["teacher"]["id"] for l in school["lessons"])
+            for teacher in school["teachers"]:
+                capacity = teacher_capacity(Teacher(**teacher), timeslots)
+                assert load[teacher["id"]] <= capacity, f"seed={seed}: {teacher['name']} {load[teacher['id']]}/{capacity}"
+    
+    print("✅ 生成校の教師負荷テスト完了")
+
 if __name__ == "__main__":
     test_data_repository()
+    test_sqlite_repository()
+    test_concurrent_config_updates()
+    test_generated_teacher_loads_fit()
@@ -41,6 +41,10 @@ def test_api_routes(app):
             response = client.get('/api/teachers')
             print(f"📍 /api/teachers: {response.status_code}")
             
+            # Lessons（コンパクト形式）
+            response = client.get('/api/lessons', headers={'Accept': 'application/vnd.timetable.compact+json'})
+            print(f"📍 /api/lessons (compact): {response.status_code}, {response.mimetype}, {len(response.data)}B")
+            
             print("✅ APIルートテスト完了")
             return True
     except Exception as e:
@@ -0,0 +1,14 @@
+"""本番用 WSGI エントリポイント（gunicorn -c gunicorn.conf.py wsgi:app）"""
+import sys
+import os
+sys.path.append(os.path.dirname(__file__))
+
+from backend.app import create_app
+
+# JVM の起動とウォームアップは create_app がバックグラウンドで行うため、
+# ワーカーは起動直後から /api/test（ヘルスチェック）に応答できる
+app = create_app({
+    'DEBUG': False,
+    'HOST': '0.0.0.0',
+    'PORT': int(os.environ.get('PORT', 8000))
+})